@@ -0,0 +1,51 @@
+from time import perf_counter
+
+from torch import rand, randn
+
+from benchmarks.utils import report
+from the_great_library_of_rl.q_learning.prioritized_replay_memory import PrioritizedReplayMemory
+from the_great_library_of_rl.q_learning.replay_memory import Experience
+
+
+# CONFIG
+CAPACITIES = [10_000, 100_000, 1_000_000]
+STATE_SIZE = 4
+BATCH_SIZE = 64
+REPEATS = 1000
+
+
+# BENCHMARK
+for capacity in CAPACITIES:
+    memory = PrioritizedReplayMemory(capacity, 1, BATCH_SIZE)
+    state = randn(STATE_SIZE)
+
+    # fill the memory
+    start = perf_counter()
+    for i in range(capacity):
+        memory.add_experience(Experience(state, i % 2, 1.0, state, True))
+    add_time = (perf_counter() - start) / capacity
+
+    # spread the priorities so that sampling doesn't degenerate into uniform sampling
+    memory.update_priorities(memory.sample_indices(capacity), rand(capacity))
+
+    start = perf_counter()
+    for _ in range(REPEATS):
+        memory.sample_batch()
+    sample_time = (perf_counter() - start) / REPEATS
+
+    indices = memory.sample_indices(BATCH_SIZE)
+    errors = rand(BATCH_SIZE)
+
+    start = perf_counter()
+    for _ in range(REPEATS):
+        memory.update_priorities(indices, errors)
+    update_time = (perf_counter() - start) / REPEATS
+
+    report({
+        "benchmark": "prioritized_replay_memory",
+        "capacity": capacity,
+        "batch_size": BATCH_SIZE,
+        "add_us": add_time * 1e6,
+        "sample_batch_us": sample_time * 1e6,
+        "update_priorities_us": update_time * 1e6
+    })
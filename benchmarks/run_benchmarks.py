@@ -0,0 +1,338 @@
+"""
+Benchmark suite for the training hot paths. Every result is printed as one JSON line (and optionally appended to a
+file), so that runs can be compared over time.
+
+Usage:
+    python -m benchmarks.run_benchmarks [--output results.jsonl] [--quick] [--only trainer replay_memory ...]
+"""
+
+import os
+from argparse import ArgumentParser
+from random import Random, seed
+from shutil import rmtree
+from tempfile import mkdtemp
+
+import torch
+from torch import Tensor, randn
+from torch import bfloat16
+from torch.nn import Sequential, Linear, ReLU, Conv2d, Flatten
+from torch.optim import Adam, Optimizer
+
+from benchmarks.synthetic_environment import SyntheticEnvironment
+from benchmarks.utils import measure, report, run_info, run_isolated
+from the_great_library_of_rl.exploration_strategies.epsilon_greedy_strategy import EpsilonGreedyStrategy
+from the_great_library_of_rl.neural_network import NeuralNetwork
+from the_great_library_of_rl.performance_config import PerformanceConfig
+from the_great_library_of_rl.q_learning.dense_q_table import DenseQTable
+from the_great_library_of_rl.q_learning.dqn import DQN
+from the_great_library_of_rl.q_learning.frame_replay_memory import FrameReplayMemory
+from the_great_library_of_rl.q_learning.memory_mapped_replay_memory import MemoryMappedReplayMemory
+from the_great_library_of_rl.q_learning.prioritized_replay_memory import PrioritizedReplayMemory
+from the_great_library_of_rl.q_learning.q_table import QTable
+from the_great_library_of_rl.q_learning.replay_memory import Experience, ExperienceBatch, ReplayMemory
+from the_great_library_of_rl.q_learning.tensor_replay_memory import TensorReplayMemory
+from the_great_library_of_rl.trainer import Trainer
+
+
+STATE_SIZE = 4
+NUM_ACTIONS = 4
+SEED = 0
+
+REPLAY_MEMORIES = {
+    "ReplayMemory": ReplayMemory,
+    "TensorReplayMemory": TensorReplayMemory,
+    "PrioritizedReplayMemory": PrioritizedReplayMemory,
+    "MemoryMappedReplayMemory": lambda capacity, update_after_episodes, batch_size: MemoryMappedReplayMemory(
+        capacity, update_after_episodes, batch_size, os.path.join(mkdtemp(), "replay_memory.bin")
+    ),
+    "FrameReplayMemory": FrameReplayMemory
+}
+
+Q_TABLES = {
+    "QTable": QTable,
+    "DenseQTable": DenseQTable
+}
+
+PERFORMANCE_CONFIGS = {
+    "default": {},
+    "1_thread": {"num_threads": 1},
+    "bfloat16": {"autocast_dtype": bfloat16},
+    "channels_last": {"channels_last": True},
+    "zero_grad_fill": {"set_to_none": False}
+}
+
+# shape of the states of the convolutional network (stacked frames)
+IMAGE_SHAPE = (4, 42, 42)
+
+
+class BenchmarkNetwork(NeuralNetwork):
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.layers = Sequential(
+            Linear(STATE_SIZE, 64),
+            ReLU(),
+            Linear(64, NUM_ACTIONS)
+        )
+        self.optimizer = None
+
+    def get_optimizer(self) -> Optimizer:
+        if self.optimizer is None:
+            self.optimizer = Adam(self.parameters(), lr=0.001)
+
+        return self.optimizer
+
+    def forward(self, x: Tensor) -> Tensor:
+        return self.layers.forward(x)
+
+
+class ConvolutionalBenchmarkNetwork(NeuralNetwork):
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.layers = Sequential(
+            Conv2d(IMAGE_SHAPE[0], 16, 8, stride=4),
+            ReLU(),
+            Conv2d(16, 32, 4, stride=2),
+            ReLU(),
+            Flatten(),
+            Linear(32 * 3 * 3, 64),
+            ReLU(),
+            Linear(64, NUM_ACTIONS)
+        )
+        self.optimizer = None
+
+    def get_optimizer(self) -> Optimizer:
+        if self.optimizer is None:
+            self.optimizer = Adam(self.parameters(), lr=0.001)
+
+        return self.optimizer
+
+    def forward(self, x: Tensor) -> Tensor:
+        return self.layers(x)
+
+
+def make_experience(i: int) -> Experience:
+    return Experience(randn(STATE_SIZE), i % NUM_ACTIONS, 1.0, randn(STATE_SIZE), i % 100 != 0)
+
+
+# BENCHMARKS
+def trainer_benchmark(agent_name: str, epochs: int) -> dict:
+    """
+    Measure environment steps per second of Trainer.train on the synthetic environment.
+    """
+
+    torch.manual_seed(SEED)
+
+    tensor_states = agent_name.startswith("DQN")
+    env = SyntheticEnvironment(num_actions=NUM_ACTIONS, state_size=STATE_SIZE, tensor_states=tensor_states,
+                               seed=SEED)
+
+    if agent_name == "QTable":
+        agent = QTable(NUM_ACTIONS, 0.1, 0.95)
+    elif agent_name == "DenseQTable":
+        agent = DenseQTable(NUM_ACTIONS, 0.1, 0.95)
+    elif agent_name == "DQN":
+        agent = DQN(BenchmarkNetwork(), 0.95)
+    else:
+        agent = DQN(BenchmarkNetwork(), 0.95, replay_memory=TensorReplayMemory(100_000, 4, 64))
+
+    # the exploration is seeded too, so that every run takes the same actions
+    seed(SEED)
+    trainer = Trainer(agent, env, EpsilonGreedyStrategy(1, 0.05, 1 / epochs))
+
+    time_per_epoch = measure(lambda: trainer.train(1), epochs)
+
+    return {
+        "benchmark": "trainer",
+        "agent": agent_name,
+        "epochs": epochs,
+        "steps_per_second": env.episode_length / time_per_epoch
+    }
+
+
+def replay_memory_benchmark(memory_name: str, capacity: int, batch_size: int, repeats: int) -> dict:
+    """
+    Measure ReplayMemory.add_experience latency on a full memory and sample_batch latency.
+    """
+
+    torch.manual_seed(SEED)
+
+    memory = REPLAY_MEMORIES[memory_name](capacity, 1, batch_size)
+    experiences = [make_experience(i) for i in range(repeats)]
+
+    for i in range(capacity):
+        memory.add_experience(experiences[i % repeats])
+
+    iterator = iter(experiences)
+    add_time = measure(lambda: memory.add_experience(next(iterator)), repeats)
+    sample_time = measure(memory.sample_batch, repeats)
+
+    if isinstance(memory, MemoryMappedReplayMemory):
+        memory.close()
+        rmtree(os.path.dirname(memory.path))
+
+    return {
+        "benchmark": "replay_memory",
+        "memory": memory_name,
+        "capacity": capacity,
+        "batch_size": batch_size,
+        "add_experience_us": add_time * 1e6,
+        "sample_batch_us": sample_time * 1e6
+    }
+
+
+def experience_batch_benchmark(batch_size: int, repeats: int) -> dict:
+    """
+    Measure the cost of building an ExperienceBatch from Experience objects and from tensors.
+    """
+
+    torch.manual_seed(SEED)
+
+    experiences = [make_experience(i) for i in range(batch_size)]
+    memory = TensorReplayMemory(batch_size, 1, batch_size)
+    for e in experiences:
+        memory.add_experience(e)
+    indices = torch.arange(batch_size)
+
+    from_experiences_time = measure(lambda: ExperienceBatch(experiences), repeats)
+    from_tensors_time = measure(lambda: memory.get_batch(indices), repeats)
+
+    return {
+        "benchmark": "experience_batch",
+        "batch_size": batch_size,
+        "from_experiences_us": from_experiences_time * 1e6,
+        "from_tensors_us": from_tensors_time * 1e6
+    }
+
+
+def q_table_benchmark(table_name: str, num_states: int, repeats: int) -> dict:
+    """
+    Measure QTable.get_action and update_q_value latency for a table with the given number of states.
+    """
+
+    rng = Random(SEED)
+
+    agent = Q_TABLES[table_name](NUM_ACTIONS, 0.1, 0.95)
+    for state in range(num_states):
+        agent.update_q_value(state, rng.randrange(NUM_ACTIONS), rng.random(), rng.randrange(num_states), True)
+
+    states = [rng.randrange(num_states) for _ in range(repeats)]
+    iterator = iter(states)
+    get_action_time = measure(lambda: agent.get_action(next(iterator)), repeats)
+
+    iterator = iter(states)
+    update_time = measure(lambda: agent.update_q_value(next(iterator), 1, 1.0, states[0], True), repeats)
+
+    return {
+        "benchmark": "q_table",
+        "table": table_name,
+        "num_states": num_states,
+        "get_action_us": get_action_time * 1e6,
+        "update_q_value_us": update_time * 1e6
+    }
+
+
+def performance_benchmark(config_name: str, network_name: str, batch_size: int, repeats: int) -> dict:
+    """
+    Measure DQN updates per second (DQN.learn_from_batch) with one of the performance configs.
+    """
+
+    torch.manual_seed(SEED)
+
+    if network_name == "convolutional":
+        network = ConvolutionalBenchmarkNetwork()
+        state_shape = IMAGE_SHAPE
+    else:
+        network = BenchmarkNetwork()
+        state_shape = (STATE_SIZE,)
+
+    agent = DQN(network, 0.95, target_update_steps=100,
+                performance=PerformanceConfig(**PERFORMANCE_CONFIGS[config_name]))
+
+    batch = ExperienceBatch.from_tensors(
+        randn(batch_size, *state_shape),
+        torch.randint(NUM_ACTIONS, (batch_size,)),
+        randn(batch_size),
+        randn(batch_size, *state_shape),
+        torch.ones(batch_size)
+    )
+
+    # warm up the allocator and the kernels
+    measure(lambda: agent.learn_from_batch(batch), 10)
+    update_time = measure(lambda: agent.learn_from_batch(batch), repeats)
+
+    return {
+        "benchmark": "performance",
+        "config": config_name,
+        "network": network_name,
+        "batch_size": batch_size,
+        "updates_per_second": 1 / update_time
+    }
+
+
+def get_cases(quick: bool) -> dict:
+    """
+    Return the benchmark cases of every suite.
+
+    Args:
+        quick (bool): Use smaller sizes for a fast sanity check.
+
+    Returns:
+        dict: Lists of (function, arguments) pairs keyed by the suite name.
+    """
+
+    epochs = 5 if quick else 50
+    repeats = 200 if quick else 5000
+    capacities = [1_000, 10_000] if quick else [1_000, 10_000, 100_000]
+    table_sizes = [1_000, 10_000] if quick else [1_000, 10_000, 100_000, 1_000_000]
+
+    return {
+        "trainer": [
+            (trainer_benchmark, {"agent_name": name, "epochs": epochs})
+            for name in ["QTable", "DenseQTable", "DQN", "DQN+TensorReplayMemory"]
+        ],
+        "replay_memory": [
+            (replay_memory_benchmark, {"memory_name": name, "capacity": capacity, "batch_size": batch_size,
+                                       "repeats": repeats})
+            for name in REPLAY_MEMORIES
+            for capacity in capacities
+            for batch_size in [32, 256]
+        ],
+        "experience_batch": [
+            (experience_batch_benchmark, {"batch_size": batch_size, "repeats": repeats})
+            for batch_size in [32, 64, 256, 1024]
+        ],
+        "q_table": [
+            (q_table_benchmark, {"table_name": name, "num_states": num_states, "repeats": repeats})
+            for name in Q_TABLES
+            for num_states in table_sizes
+        ],
+        "performance": [
+            (performance_benchmark, {"config_name": name, "network_name": network_name, "batch_size": 64,
+                                     "repeats": repeats // 10})
+            for name in PERFORMANCE_CONFIGS
+            for network_name in ["dense", "convolutional"]
+        ]
+    }
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark the training hot paths.")
+    parser.add_argument("--output", help="JSON lines file to append the results to.")
+    parser.add_argument("--quick", action="store_true", help="Use small sizes for a fast sanity check.")
+    parser.add_argument(
+        "--only", nargs="+", help="Suites to run (trainer, replay_memory, experience_batch, q_table, performance)."
+    )
+    args = parser.parse_args()
+
+    info = run_info()
+    cases = get_cases(args.quick)
+
+    for suite, suite_cases in cases.items():
+        if args.only is not None and suite not in args.only:
+            continue
+
+        for function, kwargs in suite_cases:
+            result = run_isolated(function, **kwargs)
+            report({**info, **result}, args.output)
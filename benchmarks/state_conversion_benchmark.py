@@ -0,0 +1,59 @@
+from time import perf_counter
+
+from torch import tensor
+from torch import float as torch_float
+
+from benchmarks.utils import report
+from the_great_library_of_rl.builtin_environments.gymnasium_environment import GymnasiumEnvironment
+from the_great_library_of_rl.builtin_environments.tensor_gymnasium_environment import TensorGymnasiumEnvironment
+
+
+# CONFIG
+ENV_NAME = "CartPole-v1"
+STEPS = 20000
+
+
+# BENCHMARK
+def run(env: GymnasiumEnvironment, get_state) -> float:
+    """
+    Step the environment like Trainer.execute_epoch does (get_state() before and after every step).
+
+    Returns:
+        float: Average time per step in seconds.
+    """
+
+    start = perf_counter()
+
+    for i in range(STEPS):
+        get_state(env)
+        env.step(i % 2)
+        get_state(env)
+
+        if env.is_terminated():
+            env.reset()
+
+    return (perf_counter() - start) / STEPS
+
+
+# convert the state on every call, like the environment used to
+def copy_state(env: GymnasiumEnvironment):
+    return tensor(env.state, dtype=torch_float)
+
+
+raw_env = GymnasiumEnvironment(ENV_NAME)
+env_step_time = run(raw_env, lambda env: env.state)
+copy_time = run(raw_env, copy_state)
+raw_env.close()
+
+tensor_env = TensorGymnasiumEnvironment(ENV_NAME)
+cached_time = run(tensor_env, TensorGymnasiumEnvironment.get_state)
+tensor_env.close()
+
+report({
+    "benchmark": "state_conversion",
+    "env": ENV_NAME,
+    "steps": STEPS,
+    "raw_step_us": env_step_time * 1e6,
+    "convert_every_call_overhead_us": (copy_time - env_step_time) * 1e6,
+    "cached_overhead_us": (cached_time - env_step_time) * 1e6
+})
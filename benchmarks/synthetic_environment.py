@@ -0,0 +1,71 @@
+from random import Random
+
+from the_great_library_of_rl.environment import Environment
+
+
+class SyntheticEnvironment(Environment):
+    """
+    Deterministic environment for benchmarks. The agent walks through a fixed, randomly generated graph of states
+    where every state/action pair leads to a fixed next state and reward. Episodes have a fixed length, so every
+    epoch takes the same number of steps. Doesn't depend on anything outside the standard library unless tensor
+    states are requested.
+
+    Args:
+        num_states (int, optional): Number of states. Default: 100
+        num_actions (int, optional): Number of actions. Default: 4
+        episode_length (int, optional): Number of steps in an episode. Default: 200
+        state_size (int, optional): Number of features of a tensor state. Default: 4
+        tensor_states (bool, optional): Return states as feature Tensors (for DQN) instead of ints (for QTable).
+            Default: False
+        seed (int, optional): Seed used to generate the graph. Default: 0
+    """
+
+    def __init__(self, num_states: int = 100, num_actions: int = 4, episode_length: int = 200, state_size: int = 4,
+                 tensor_states: bool = False, seed: int = 0) -> None:
+        self.num_states = num_states
+        self.num_actions = num_actions
+        self.episode_length = episode_length
+
+        rng = Random(seed)
+        self.next_states = [[rng.randrange(num_states) for _ in range(num_actions)] for _ in range(num_states)]
+        self.rewards = [[rng.random() for _ in range(num_actions)] for _ in range(num_states)]
+
+        self.features = None
+        if tensor_states:
+            from torch import tensor
+
+            self.features = [tensor([rng.random() for _ in range(state_size)]) for _ in range(num_states)]
+
+        self.reset()
+
+    def reset(self, seed: int = None) -> None:
+        # the environment is deterministic, there is nothing to seed
+        self.state = 0
+        self.steps = 0
+        self.last_reward = 0
+
+    def get_state(self):
+        if self.features is None:
+            return self.state
+
+        return self.features[self.state]
+
+    def get_action_count(self) -> int:
+        return self.num_actions
+
+    def step(self, action: int) -> None:
+        self.last_reward = self.rewards[self.state][action]
+        self.state = self.next_states[self.state][action]
+        self.steps += 1
+
+    def get_reward(self) -> float:
+        return self.last_reward
+
+    def is_terminated(self) -> bool:
+        return self.steps >= self.episode_length
+
+    def close(self) -> None:
+        pass
+
+    def set_evaluation(self, value: bool) -> None:
+        self.reset()
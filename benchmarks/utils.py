@@ -0,0 +1,120 @@
+import json
+import platform
+import resource
+import subprocess
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from time import perf_counter
+from typing import Callable
+
+
+def measure(function: Callable[[], object], repeats: int) -> float:
+    """
+    Call a function repeatedly and return the average time per call.
+
+    Args:
+        function (Callable): Function to call.
+        repeats (int): Number of calls.
+
+    Returns:
+        float: Average time per call in seconds.
+    """
+
+    start = perf_counter()
+
+    for _ in range(repeats):
+        function()
+
+    return (perf_counter() - start) / repeats
+
+
+def peak_rss_mb() -> float:
+    """
+    Return the peak resident memory of the current process.
+
+    Returns:
+        float: Peak resident memory in MiB.
+    """
+
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_info() -> dict:
+    """
+    Return information identifying the run, so that results of different runs can be compared.
+
+    Returns:
+        dict: Time of the run, commit and library versions.
+    """
+
+    import numpy
+    import torch
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "numpy": numpy.__version__,
+        "machine": platform.machine(),
+        "torch_threads": torch.get_num_threads()
+    }
+
+
+def report(record: dict, output: str = None) -> None:
+    """
+    Print a result as a JSON line and optionally append it to a file.
+
+    Args:
+        record (dict): Result to report.
+        output (str, optional): Path of a JSON lines file to append the result to. Default: None
+    """
+
+    line = json.dumps(record)
+    print(line, flush=True)
+
+    if output is not None:
+        with open(output, "a") as file:
+            file.write(line + "\n")
+
+
+def _isolated_worker(queue, function, kwargs) -> None:
+    baseline = peak_rss_mb()
+    result = function(**kwargs)
+
+    result["peak_rss_mb"] = peak_rss_mb()
+    result["peak_rss_increase_mb"] = result["peak_rss_mb"] - baseline
+
+    queue.put(result)
+
+
+def run_isolated(function: Callable[..., dict], **kwargs) -> dict:
+    """
+    Run a benchmark in a fresh process, so that its peak memory isn't affected by the other benchmarks.
+
+    Args:
+        function (Callable[..., dict]): Module-level function returning the results as a dict.
+        **kwargs: Arguments of the function.
+
+    Returns:
+        dict: The results extended with the peak memory of the process ("peak_rss_mb") and its increase over the
+            memory after the imports ("peak_rss_increase_mb").
+    """
+
+    context = get_context("spawn")
+    queue = context.Queue()
+
+    process = context.Process(target=_isolated_worker, args=(queue, function, kwargs))
+    process.start()
+    result = queue.get()
+    process.join()
+
+    return result
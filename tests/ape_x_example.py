@@ -0,0 +1,64 @@
+from functools import partial
+
+from torch import Tensor
+from torch.nn import Sequential, Linear, LeakyReLU
+from torch.optim import Adam, Optimizer
+
+from the_great_library_of_rl.ape_x_trainer import ApeXTrainer
+from the_great_library_of_rl.builtin_environments.tensor_gymnasium_environment import TensorGymnasiumEnvironment
+from the_great_library_of_rl.neural_network import NeuralNetwork
+from the_great_library_of_rl.q_learning.dqn import DQN
+from the_great_library_of_rl.q_learning.tensor_replay_memory import TensorReplayMemory
+from the_great_library_of_rl.tester import Tester
+
+
+# CONFIG
+UPDATES = 20000
+NUM_ACTORS = 4
+PUBLISH_EVERY = 100
+
+LEARNING_RATE = 0.001
+GAMMA = 0.99
+
+
+# NETWORK
+# the network is sent to the actor processes, so its class must be importable (defined at the module level)
+class Model(NeuralNetwork):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.layers = Sequential(
+            Linear(4, 64),
+            LeakyReLU(),
+
+            Linear(64, 2)
+        )
+        self.optimizer = None
+
+    def get_optimizer(self) -> Optimizer:
+        if self.optimizer is None:
+            self.optimizer = Adam(self.parameters(), lr=LEARNING_RATE)
+
+        return self.optimizer
+
+    def forward(self, x: Tensor) -> Tensor:
+        return self.layers.forward(x)
+
+
+# the actors are started with spawn, which imports this file again in every actor
+if __name__ == "__main__":
+    # SETUP
+    env_factory = partial(TensorGymnasiumEnvironment, "CartPole-v1")
+
+    replay_memory = TensorReplayMemory(100000, 1, 64)
+    agent = DQN(Model(), GAMMA, replay_memory=replay_memory, target_update_steps=500, n_step=3)
+
+    trainer = ApeXTrainer(agent, env_factory, NUM_ACTORS, publish_every=PUBLISH_EVERY, seed=0)
+
+    # TRAINING
+    trainer.train(UPDATES)
+
+    # TESTING
+    env = env_factory()
+    Tester(agent, env).test()
+    env.close()
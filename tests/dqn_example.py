@@ -6,7 +6,7 @@ from the_great_library_of_rl.builtin_environments.tensor_gymnasium_environment i
 from the_great_library_of_rl.exploration_strategies.epsilon_greedy_strategy import EpsilonGreedyStrategy
 from the_great_library_of_rl.neural_network import NeuralNetwork
 from the_great_library_of_rl.q_learning.dqn import DQN
-from the_great_library_of_rl.q_learning.replay_memory import ReplayMemory
+from the_great_library_of_rl.q_learning.tensor_replay_memory import TensorReplayMemory
 from the_great_library_of_rl.tester import Tester
 from the_great_library_of_rl.trainer import Trainer
 
@@ -50,7 +50,7 @@ class Model(NeuralNetwork):
 
 # SETUP
 model = Model()
-replay_memory = ReplayMemory(100000, 30, 64)
+replay_memory = TensorReplayMemory(100000, 30, 64)
 env = TensorGymnasiumEnvironment("CartPole-v1")
 agent = DQN(model, GAMMA, replay_memory=replay_memory)
 exploration_strategy = EpsilonGreedyStrategy(EPSILON_START, EPSILON_END, EPSILON_DECAY)
@@ -0,0 +1,34 @@
+from the_great_library_of_rl.builtin_environments.gymnasium_environment import GymnasiumEnvironment
+from the_great_library_of_rl.exploration_strategies.epsilon_greedy_strategy import EpsilonGreedyStrategy
+from the_great_library_of_rl.q_learning.q_table import QTable
+from the_great_library_of_rl.sweep import Sweep, grid_search
+from the_great_library_of_rl.trainer import Trainer
+
+
+# CONFIG
+EPOCHS = 100
+RESULTS_PATH = "sweep_results.jsonl"
+
+SEARCH_SPACE = {
+    "learning_rate": [0.01, 0.1, 0.5],
+    "gamma": [0.9, 0.95, 0.99],
+    "epsilon_decay": [0.01, 0.05]
+}
+
+
+# SETUP
+def build_trainer(params: dict) -> Trainer:
+    env = GymnasiumEnvironment("CliffWalking-v1", evaluation_render_mode=None)
+    agent = QTable(env.get_action_count(), params["learning_rate"], params["gamma"])
+    exploration_strategy = EpsilonGreedyStrategy(1, 0.05, params["epsilon_decay"])
+
+    return Trainer(agent, env, exploration_strategy)
+
+
+# SWEEP
+if __name__ == "__main__":
+    sweep = Sweep(build_trainer, EPOCHS, RESULTS_PATH, seed=0)
+    results = sweep.run(grid_search(SEARCH_SPACE))
+
+    for result in results[:5]:
+        print(result["score"], result["params"])
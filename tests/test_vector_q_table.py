@@ -0,0 +1,45 @@
+from numpy import argmax
+from torch import tensor
+
+from the_great_library_of_rl.builtin_environments.vector_gymnasium_environment import VectorGymnasiumEnvironment
+from the_great_library_of_rl.exploration_strategies.epsilon_greedy_strategy import EpsilonGreedyStrategy
+from the_great_library_of_rl.q_learning.dense_q_table import DenseQTable
+from the_great_library_of_rl.q_learning.q_table import QTable
+from the_great_library_of_rl.vector_trainer import VectorTrainer
+
+
+def train_and_check(agent) -> None:
+    """
+    Train a tabular agent with a VectorTrainer on CliffWalking and check that the greedy actions follow the learned
+    q-values.
+
+    Args:
+        agent: Tabular agent to train.
+    """
+
+    env = VectorGymnasiumEnvironment("CliffWalking-v1", 4)
+    env.reset(0)
+
+    # finishes only if the exploiting copies follow what the agent learned
+    VectorTrainer(agent, env, EpsilonGreedyStrategy(1, 0.1, 0.05)).train(30)
+    env.close()
+
+    # the start state and its neighbours, batched like the states of the vectorized environment
+    states = [36, 24, 25]
+    actions = list(agent.get_actions(tensor(states, dtype=float).unsqueeze(-1)))
+
+    for state, action in zip(states, actions):
+        # the batched states are the same keys as the states of a single environment
+        q_values = agent.get_q_values(state)
+
+        assert max(q_values) != min(q_values)
+        assert action == argmax(q_values)
+        assert action == agent.get_action(state)
+
+
+def test_q_table() -> None:
+    train_and_check(QTable(4, 0.5, 0.95))
+
+
+def test_dense_q_table() -> None:
+    train_and_check(DenseQTable(4, 0.5, 0.95))
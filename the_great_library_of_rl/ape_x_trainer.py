@@ -0,0 +1,455 @@
+from copy import deepcopy
+from queue import Empty
+from random import random, randrange, seed as random_seed
+from traceback import format_exc
+from typing import Callable
+
+from torch import argmax, as_tensor, empty, stack, tensor, no_grad, manual_seed, set_num_threads
+from torch import float as torch_float, long as torch_long
+from torch.multiprocessing import get_context
+from torch.optim import Optimizer
+
+from the_great_library_of_rl.callbacks import Callback
+from the_great_library_of_rl.environment import Environment
+from the_great_library_of_rl.instrumentation import Instrumentation, NullInstrumentation
+from the_great_library_of_rl.neural_network import NeuralNetwork
+from the_great_library_of_rl.q_learning.dqn import DQN
+from the_great_library_of_rl.q_learning.n_step_accumulator import NStepAccumulator
+from the_great_library_of_rl.q_learning.replay_memory import Experience, ExperienceBatch
+
+
+def _actor(actor_id: int, env_factory: Callable[[], Environment], shared_network: NeuralNetwork, version,
+           epsilon: float, n_step: int, gamma: float, slots: list[ExperienceBatch], free_slots, queue, stop_event,
+           seed: int | None) -> None:
+    """
+    Collect experiences with a local copy of the network and send them to the learner in batches.
+
+    A batch is written into the next slot of the actor's ring of shared batches, only the index of the slot is sent
+    through the queue. The learner releases the slot after it copied the batch into the replay memory.
+
+    Args:
+        actor_id (int): Index of the actor.
+        env_factory (Callable[[], Environment]): Function that creates the actor's environment.
+        shared_network (NeuralNetwork): Network in shared memory, published by the learner.
+        version: Shared counter increased by the learner with every publication. Its lock guards the shared network.
+        epsilon (float): Probability of a random action.
+        n_step (int): Number of steps accumulated into one experience (see: NStepAccumulator).
+        gamma (float): Decay rate for future rewards.
+        slots (list[ExperienceBatch]): Ring of batches in shared memory.
+        free_slots: Semaphore counting the slots released by the learner.
+        queue: Queue to the learner.
+        stop_event: Set by the learner when the actors should exit.
+        seed (int | None): Seed of the actor.
+    """
+
+    # the actors share the cores with each other and the learner
+    set_num_threads(1)
+
+    # the learner might not drain the queue after the stop, the buffered messages are dropped
+    queue.cancel_join_thread()
+
+    send_size = len(slots[0].actions)
+    next_slot = 0
+
+    def send(experiences: list[Experience], episodes: list[tuple[float, int]]) -> bool:
+        nonlocal next_slot
+
+        # the wait is retried, so that a learner that stopped reading doesn't block the stop
+        while not free_slots.acquire(timeout=0.1):
+            if stop_event.is_set():
+                return False
+
+        slot = slots[next_slot]
+
+        stack([e.state for e in experiences], out=slot.states)
+        stack([e.next_state for e in experiences], out=slot.next_states)
+        slot.actions.copy_(tensor([e.action for e in experiences]))
+        slot.rewards.copy_(tensor([e.reward for e in experiences]))
+        slot.non_terminal.copy_(tensor([1 if e.non_terminal else 0 for e in experiences]))
+        slot.steps.copy_(tensor([e.steps for e in experiences]))
+
+        queue.put((actor_id, next_slot, episodes))
+        next_slot = (next_slot + 1) % len(slots)
+
+        return True
+
+    try:
+        if seed is not None:
+            random_seed(seed)
+            manual_seed(seed)
+
+        env = env_factory()
+
+        # environments written before seeding was supported only accept no arguments
+        if seed is None:
+            env.reset()
+        else:
+            env.reset(seed)
+        num_of_actions = env.get_action_count()
+
+        with version.get_lock():
+            network = deepcopy(shared_network)
+            local_version = version.value
+
+        accumulator = NStepAccumulator(n_step, gamma)
+
+        experiences = []
+        # (return, steps) of the episodes finished since the last send
+        episodes = []
+        total_reward = 0
+        steps = 0
+
+        while not stop_event.is_set():
+            # pull the newest weights
+            if version.value != local_version:
+                with version.get_lock():
+                    network.load_state_dict(shared_network.state_dict())
+                    local_version = version.value
+
+            state = as_tensor(env.get_state())
+
+            if random() < epsilon:
+                action = randrange(num_of_actions)
+            else:
+                with no_grad():
+                    action = argmax(network.forward(state)).item()
+
+            env.step(action)
+
+            reward = env.get_reward()
+            next_state = as_tensor(env.get_state())
+            non_terminal = not env.is_terminated()
+
+            experiences.extend(accumulator.add(state, action, reward, next_state, non_terminal))
+
+            total_reward += reward
+            steps += 1
+
+            if not non_terminal:
+                episodes.append((total_reward, steps))
+                total_reward = 0
+                steps = 0
+
+                env.reset()
+
+            # the end of an episode can complete several n-step experiences at once
+            while len(experiences) >= send_size:
+                if not send(experiences[:send_size], episodes):
+                    return
+
+                experiences = experiences[send_size:]
+                episodes = []
+
+        env.close()
+    except Exception:
+        queue.put(RuntimeError(f"Actor {actor_id} failed:\n{format_exc()}"))
+
+
+class ApeXTrainer:
+    """
+    Trains a DQN with many actors and one learner, in the style of Ape-X (Horgan et al., Distributed Prioritized
+    Experience Replay).
+
+    Every actor is a separate process with its own environment and its own epsilon. It chooses the actions with a
+    local copy of the network and sends its experiences to the learner in batches. Every actor writes its batches into
+    a small ring of preallocated batches in shared memory and only the index of the written slot goes through the
+    queue, so the experiences are neither pickled nor allocated per batch. The learner runs in the calling process:
+    it adds the received batches to the agent's replay memory and updates the agent continuously, without waiting for
+    the actors. Every publish_every updates it copies the weights into a network in shared memory, from which the
+    actors pull them before their next step.
+
+    The epsilons follow Ape-X: actor i of N explores with epsilon ** (1 + i / (N - 1) * epsilon_alpha), so some actors
+    explore a lot and others act almost greedily. With the agent's n_step > 1 the actors accumulate n-step experiences.
+    With a prioritized replay memory new experiences get the maximal priority.
+
+    Callbacks get on_train_start, on_epoch_end for every episode finished by an actor and on_train_end. The statistics
+    of an episode include the actor's index and the total number of the learner's updates. The steps happen in the
+    actors, so on_epoch_start and on_step are not called. The exploration_strategy attribute is None (the epsilons of
+    the actors are fixed), so a CheckpointCallback saves the agent and the number of episodes.
+
+    Args:
+        agent (DQN): Agent to train. Requires a replay memory that supports add_experience_batch and synchronous
+            learning.
+        env_factory (Callable[[], Environment]): Function that creates the environment in every actor, e.g.
+            functools.partial(TensorGymnasiumEnvironment, "CartPole-v1"). Must be picklable.
+        num_actors (int): Number of actor processes.
+        publish_every (int, optional): Number of updates between publications of the weights. Default: 100
+        epsilon (float, optional): Base epsilon of the actors. Default: 0.4
+        epsilon_alpha (float, optional): Spread of the actors' epsilons. Default: 7
+        send_size (int, optional): Number of experiences an actor sends together. Default: 64
+        slots_per_actor (int, optional): Number of shared batches of every actor. An actor waits when all of its
+            batches wait for the learner. Default: 4
+        min_replay_size (int, optional): Number of experiences in the replay memory before the learning starts.
+            Default: 1000
+        seed (int, optional): Seed of the actors (actor i gets seed + i). Default: None
+        callbacks (list[Callback], optional): Hooks called during the training. Default: None
+        instrumentation (Instrumentation, optional): Collects per-phase timings of the learner. Nothing is measured
+            if None. Default: None
+    """
+
+    def __init__(self, agent: DQN, env_factory: Callable[[], Environment], num_actors: int,
+                 publish_every: int = 100, epsilon: float = 0.4, epsilon_alpha: float = 7, send_size: int = 64,
+                 slots_per_actor: int = 4, min_replay_size: int = 1000, seed: int = None,
+                 callbacks: list[Callback] = None, instrumentation: Instrumentation = None) -> None:
+        if agent.replay_memory is None:
+            raise ValueError("The ApeXTrainer requires a replay memory")
+
+        if agent.asynchronous_learning:
+            raise ValueError("The ApeXTrainer already learns continuously, asynchronous learning is not supported")
+
+        self.agent = agent
+        self.env_factory = env_factory
+        self.num_actors = num_actors
+        self.publish_every = publish_every
+        self.send_size = send_size
+        self.slots_per_actor = slots_per_actor
+        self.min_replay_size = min_replay_size
+        self.seed = seed
+        self.callbacks = [] if callbacks is None else callbacks
+        self.instrumentation = NullInstrumentation() if instrumentation is None else instrumentation
+
+        if num_actors == 1:
+            self.epsilons = [epsilon]
+        else:
+            self.epsilons = [epsilon ** (1 + i / (num_actors - 1) * epsilon_alpha) for i in range(num_actors)]
+
+        # the actors are started with spawn, forking a process that uses torch's threads is not safe
+        self.context = get_context("spawn")
+
+        # number of episodes finished by the actors
+        self.epoch = 0
+        # number of experiences received from the actors
+        self.received_experiences = 0
+        # can be set by a callback to end the training
+        self.stop_training = False
+        # the actors explore with fixed epsilons, there is no exploration strategy to save (e.g. by a checkpoint)
+        self.exploration_strategy = None
+
+        self.shared_network = None
+        self.version = None
+        self.published_updates = 0
+
+        # shared batches of every actor and the semaphores counting the free ones
+        self.slots = []
+        self.free_slots = []
+
+        self.queue = None
+        self.stop_event = None
+        self.processes = []
+
+    def train(self, updates: int) -> None:
+        """
+        Start the actors and update the agent until it made the given number of updates (or a callback stopped the
+        training), then stop the actors.
+
+        Args:
+            updates (int): Number of parameter updates.
+        """
+
+        agent = self.agent
+        memory = agent.replay_memory
+
+        self.stop_training = False
+        agent.set_instrumentation(self.instrumentation)
+
+        for callback in self.callbacks:
+            callback.on_train_start(self)
+
+        target_updates = agent.get_update_count() + updates
+
+        self._start_actors()
+
+        try:
+            while agent.get_update_count() < target_updates and not self.stop_training:
+                # wait for the actors only while there is not enough to learn from
+                self._receive(block=len(memory) < self.min_replay_size)
+
+                if len(memory) < self.min_replay_size:
+                    continue
+
+                agent.learn_from_memory()
+
+                if agent.get_update_count() - self.published_updates >= self.publish_every:
+                    self._publish()
+        finally:
+            self._stop_actors()
+
+        for callback in self.callbacks:
+            callback.on_train_end(self)
+
+    def _start_actors(self) -> None:
+        """
+        Publish the current weights and start the actor processes.
+        """
+
+        context = self.context
+
+        # the network is sent to the actors once, after that only its shared tensors are updated. An optimizer kept by
+        # the network isn't needed for acting, so it isn't copied
+        network = self.agent.network
+        memo = {id(value): None for value in vars(network).values() if isinstance(value, Optimizer)}
+        self.shared_network = deepcopy(network, memo).requires_grad_(False).share_memory()
+        self.version = context.Value("q", 0)
+        self.published_updates = self.agent.get_update_count()
+
+        # the slots are shaped after a state of the environment
+        env = self.env_factory()
+        example = as_tensor(env.get_state())
+        env.close()
+
+        self.slots = [[self._allocate_slot(example) for _ in range(self.slots_per_actor)] for _ in self.epsilons]
+        self.free_slots = [context.Semaphore(self.slots_per_actor) for _ in self.epsilons]
+
+        self.queue = context.Queue()
+        self.stop_event = context.Event()
+
+        self.processes = []
+        for i, epsilon in enumerate(self.epsilons):
+            process = context.Process(
+                target=_actor,
+                args=(i, self.env_factory, self.shared_network, self.version, epsilon, self.agent.n_step,
+                      self.agent.gamma, self.slots[i], self.free_slots[i], self.queue, self.stop_event,
+                      None if self.seed is None else self.seed + i),
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+    def _allocate_slot(self, example) -> ExperienceBatch:
+        """
+        Allocate a batch in shared memory.
+
+        Args:
+            example: Example state used to determine the shape and dtype of the states.
+
+        Returns:
+            ExperienceBatch: Batch of send_size uninitialized experiences.
+        """
+
+        size = self.send_size
+
+        return ExperienceBatch.from_tensors(
+            empty((size, *example.shape), dtype=example.dtype).share_memory_(),
+            empty(size, dtype=torch_long).share_memory_(),
+            empty(size, dtype=torch_float).share_memory_(),
+            empty((size, *example.shape), dtype=example.dtype).share_memory_(),
+            empty(size, dtype=torch_float).share_memory_(),
+            empty(size, dtype=torch_long).share_memory_()
+        )
+
+    def _stop_actors(self) -> None:
+        """
+        Stop the actor processes and drop the batches they didn't deliver.
+        """
+
+        self.stop_event.set()
+
+        for process in self.processes:
+            # an actor waiting for a free slot is released by the stop event within its timeout
+            process.join(timeout=5)
+
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        self.queue.close()
+        self.queue.cancel_join_thread()
+
+        self.processes = []
+        self.slots = []
+        self.free_slots = []
+
+    def _publish(self) -> None:
+        """
+        Copy the agent's weights into the shared network.
+        """
+
+        with self.version.get_lock():
+            with no_grad():
+                shared_state = self.shared_network.state_dict()
+
+                for name, value in self.agent.network.state_dict().items():
+                    shared_state[name].copy_(value)
+
+            self.version.value += 1
+
+        self.published_updates = self.agent.get_update_count()
+        self.instrumentation.lap("publish")
+
+    def _receive(self, block: bool) -> None:
+        """
+        Add the batches waiting in the queue to the replay memory.
+
+        Args:
+            block (bool): Wait (shortly) for a batch if none is waiting.
+        """
+
+        # at most as many batches as there are slots, actors faster than the learner would never let the loop end
+        for _ in range(self.num_actors * self.slots_per_actor):
+            try:
+                message = self.queue.get(timeout=0.1) if block else self.queue.get_nowait()
+            except Empty:
+                break
+
+            # block only for the first batch
+            block = False
+
+            if isinstance(message, Exception):
+                raise message
+
+            actor_id, slot, episodes = message
+
+            with self.agent.memory_lock:
+                self.agent.replay_memory.add_experience_batch(self.slots[actor_id][slot])
+
+            if self.agent.prefetcher is not None:
+                self.agent.prefetcher.notify()
+
+            # the batch was copied into the memory, the actor can reuse the slot
+            self.free_slots[actor_id].release()
+
+            self.received_experiences += self.send_size
+            self.instrumentation.lap("replay_add")
+
+            for total_reward, steps in episodes:
+                self._end_episode(actor_id, total_reward, steps)
+
+        # also without waiting, so that the learner doesn't keep learning from the memory of dead actors
+        self._check_actors()
+
+    def _check_actors(self) -> None:
+        """
+        Raise an error if an actor exited without reporting why.
+        """
+
+        for i, process in enumerate(self.processes):
+            if not process.is_alive():
+                raise RuntimeError(f"Actor {i} exited unexpectedly with exit code {process.exitcode}")
+
+    def _end_episode(self, actor_id: int, total_reward: float, steps: int) -> None:
+        """
+        Count an episode finished by an actor and report it to the callbacks.
+
+        Args:
+            actor_id (int): Index of the actor.
+            total_reward (float): Return of the episode.
+            steps (int): Number of steps of the episode.
+        """
+
+        self.epoch += 1
+
+        if not self.callbacks:
+            return
+
+        stats = {
+            "epoch": self.epoch,
+            "actor": actor_id,
+            "steps": steps,
+            "return": total_reward,
+            "epsilon": self.epsilons[actor_id],
+            "updates": self.agent.get_update_count(),
+            "loss": self.agent.get_last_loss()
+        }
+
+        for callback in self.callbacks:
+            callback.on_epoch_end(self, stats)
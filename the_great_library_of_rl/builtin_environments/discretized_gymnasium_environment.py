@@ -0,0 +1,36 @@
+from the_great_library_of_rl.builtin_environments.gymnasium_environment import GymnasiumEnvironment
+from the_great_library_of_rl.discretizers import Discretizer
+
+
+class DiscretizedGymnasiumEnvironment(GymnasiumEnvironment):
+    """
+    Gymnasium environment that returns the states as keys of a discretizer, so that tabular agents (QTable,
+    DenseQTable, TileCodingQTable) can learn on continuous environments. See: GymnasiumEnvironment
+
+    The state is discretized once after every step or reset and the same key is returned until the environment
+    advances.
+
+    Args:
+        env_name (str): Name of the environment to create.
+        discretizer (Discretizer): Maps the observations to keys.
+        evaluation_render_mode (str, optional): Render mode used in the evaluation phase. Default: "human"
+        **kwargs: Keyword arguments passed to gymnasium.make.
+    """
+
+    def __init__(self, env_name: str, discretizer: Discretizer, evaluation_render_mode: str = "human",
+                 **kwargs) -> None:
+        self.discretizer = discretizer
+        super().__init__(env_name, evaluation_render_mode, **kwargs)
+
+        self.discrete_state = self.discretizer.discretize(self.state)
+
+    def reset(self, seed: int = None) -> None:
+        super().reset(seed)
+        self.discrete_state = self.discretizer.discretize(self.state)
+
+    def step(self, action: int) -> None:
+        super().step(action)
+        self.discrete_state = self.discretizer.discretize(self.state)
+
+    def get_state(self):
+        return self.discrete_state
@@ -7,23 +7,53 @@ class GymnasiumEnvironment(Environment):
     """
     Built-in class for handling Gymnasium environments (https://gymnasium.farama.org/).
 
+    Every environment is constructed only once per render mode and kept in a cache, so switching between training and
+    evaluation only resets the environment. All constructed environments are closed by close().
+
     Args:
         env_name (str): Name of the environment to create.
+        evaluation_render_mode (str, optional): Render mode used in the evaluation phase. The evaluation runs without
+            rendering (in the same environment as the training) if None. Default: "human"
+        **kwargs: Keyword arguments passed to gymnasium.make (the configuration of the environment).
     """
 
-    def __init__(self, env_name: str) -> None:
-        self.env = make(env_name)
+    def __init__(self, env_name: str, evaluation_render_mode: str = "human", **kwargs) -> None:
+        self.env_name = env_name
+        self.evaluation_render_mode = evaluation_render_mode
+        self.kwargs = kwargs
+
+        # constructed environments keyed by their render mode
+        self.envs = {}
+        self.env = self._get_env(None)
 
         self.num_of_actions = self.env.action_space.n
-        self.env_name = env_name
 
         self.state, _ = self.env.reset()
         self.last_reward = 0
         self.terminated = False
         self.truncated = False
 
-    def reset(self) -> None:
-        self.state, _ = self.env.reset()
+    def _get_env(self, render_mode: str):
+        """
+        Return the environment with the given render mode. It is constructed only if it isn't in the cache yet.
+
+        Args:
+            render_mode (str): Render mode of the environment. None for no rendering.
+
+        Returns:
+            The Gymnasium environment.
+        """
+
+        env = self.envs.get(render_mode)
+
+        if env is None:
+            env = make(self.env_name, render_mode=render_mode, **self.kwargs)
+            self.envs[render_mode] = env
+
+        return env
+
+    def reset(self, seed: int = None) -> None:
+        self.state, _ = self.env.reset(seed=seed)
         self.last_reward = 0
         self.terminated = False
         self.truncated = False
@@ -45,15 +75,12 @@ class GymnasiumEnvironment(Environment):
         return self.terminated or self.truncated
 
     def close(self) -> None:
-        self.env.close()
+        for env in self.envs.values():
+            env.close()
+
+        self.envs.clear()
 
     def set_evaluation(self, value: bool) -> None:
-        # set the env to evaluation
-        if value:
-            self.env = make(self.env_name, render_mode="human")
-            self.reset()
-            return
-
-        # set the env for training
-        self.env = make(self.env_name)
+        # switch to the environment of the phase, constructing it only the first time
+        self.env = self._get_env(self.evaluation_render_mode if value else None)
         self.reset()
@@ -0,0 +1,241 @@
+from multiprocessing import get_context
+from multiprocessing.connection import Connection
+from traceback import format_exc
+from typing import Callable
+
+from numpy import asarray, ndarray
+from torch import Tensor, from_numpy, zeros, empty
+from torch import float64 as torch_float64
+# registers the reductions that send tensors between processes through shared memory instead of copying them
+import torch.multiprocessing  # noqa: F401
+
+from the_great_library_of_rl.environment import Environment
+
+# how the worker's states are converted back in the main process
+_TENSOR_STATE = "tensor"
+_NUMPY_STATE = "numpy"
+_SCALAR_STATE = "scalar"
+_OBJECT_STATE = "object"
+
+
+def _worker(connection: Connection, env_factory: Callable[[], Environment]) -> None:
+    """
+    Host an environment and execute commands received from the main process.
+
+    The state is written to a shared memory buffer, together with the last reward and the terminal flag. Only states
+    that can't be stored in a buffer are sent back through the pipe.
+
+    Args:
+        connection (Connection): Worker's end of the pipe.
+        env_factory (Callable[[], Environment]): Function that creates the environment.
+    """
+
+    env = env_factory()
+
+    state = env.get_state()
+    if isinstance(state, Tensor):
+        state_kind = _TENSOR_STATE
+    elif isinstance(state, ndarray):
+        state_kind = _NUMPY_STATE
+    elif isinstance(state, (int, float, bool)):
+        state_kind = _SCALAR_STATE
+    else:
+        state_kind = _OBJECT_STATE
+
+    if state_kind == _OBJECT_STATE:
+        state_buffer = None
+    else:
+        example = state if state_kind == _TENSOR_STATE else from_numpy(asarray(state))
+        state_buffer = empty(example.shape, dtype=example.dtype).share_memory_()
+
+    # [reward, terminated]
+    info_buffer = zeros(2, dtype=torch_float64).share_memory_()
+
+    def write_state():
+        state = env.get_state()
+
+        if state_buffer is None:
+            return state
+
+        state_buffer.copy_(state if state_kind == _TENSOR_STATE else from_numpy(asarray(state)))
+
+    def write_info():
+        info_buffer[0] = env.get_reward()
+        info_buffer[1] = 1 if env.is_terminated() else 0
+
+    write_state()
+    connection.send((state_kind, state_buffer, info_buffer, env.get_action_count(), state))
+
+    while True:
+        command, value = connection.recv()
+
+        try:
+            if command == "step":
+                env.step(value)
+                write_info()
+                connection.send(write_state())
+            elif command == "reset":
+                # environments written before seeding was supported only accept no arguments
+                if value is None:
+                    env.reset()
+                else:
+                    env.reset(value)
+                write_info()
+                connection.send(write_state())
+            elif command == "set_evaluation":
+                env.set_evaluation(value)
+                write_info()
+                connection.send(write_state())
+            elif command == "close":
+                env.close()
+                connection.send(None)
+            else:
+                # the main process waits for a reply to every command
+                raise ValueError(f"Unknown command: {command}")
+        except Exception:
+            connection.send(RuntimeError(f"Environment worker failed:\n{format_exc()}"))
+
+        # the worker exits even if the environment failed to close
+        if command == "close":
+            break
+
+
+class SubprocessEnvironment(Environment):
+    """
+    Runs an environment in a separate worker process, so that a slow simulator doesn't block the main process.
+    States, rewards and terminal flags are passed back through shared memory instead of being pickled on every step.
+
+    In the pipelined mode, step() returns immediately and the main process only waits for the worker when it asks
+    for the results (get_state(), get_reward(), ...). Together with Trainer(pipeline_updates=True) this lets the
+    agent update its parameters while the environment is stepping.
+
+    Args:
+        env_factory (Callable[[], Environment]): Function that creates the environment in the worker process,
+            e.g. functools.partial(TensorGymnasiumEnvironment, "CartPole-v1"). Must be picklable if the start method
+            is not "fork".
+        pipelined (bool, optional): Don't wait for step() to finish. Default: False
+        start_method (str, optional): Multiprocessing start method ("fork", "spawn" or "forkserver"). Uses the
+            platform's default if None. Default: None
+    """
+
+    def __init__(self, env_factory: Callable[[], Environment], pipelined: bool = False,
+                 start_method: str = None) -> None:
+        self.pipelined = pipelined
+
+        context = get_context(start_method)
+        self.connection, worker_connection = context.Pipe()
+        self.process = context.Process(target=_worker, args=(worker_connection, env_factory), daemon=True)
+        self.process.start()
+        worker_connection.close()
+
+        state_kind, state_buffer, info_buffer, num_of_actions, state = self.connection.recv()
+
+        self.state_kind = state_kind
+        self.state_buffer = state_buffer
+        self.info_buffer = info_buffer
+        self.num_of_actions = num_of_actions
+
+        # states that can't be stored in the shared buffer
+        self.object_state = state
+
+        # copy of the state returned until the next command, so that every get_state() returns the same object
+        self.state_copy = None
+
+        # True while the worker is executing a command the main process hasn't waited for
+        self.pending = False
+        self.closed = False
+
+    def _send(self, command: str, value=None) -> None:
+        """
+        Send a command to the worker.
+
+        Args:
+            command (str): Name of the command.
+            value (optional): Argument of the command.
+        """
+
+        self._wait()
+        self.connection.send((command, value))
+        self.pending = True
+
+        # the worker overwrites the state buffer
+        self.state_copy = None
+
+    def _wait(self) -> None:
+        """
+        Wait for the worker to finish the last command.
+        """
+
+        if not self.pending:
+            return
+
+        response = self.connection.recv()
+        self.pending = False
+
+        if isinstance(response, Exception):
+            raise response
+
+        self.object_state = response
+
+    def reset(self, seed: int = None) -> None:
+        self._send("reset", seed)
+        self._wait()
+
+    def get_state(self):
+        self._wait()
+
+        if self.state_copy is not None:
+            return self.state_copy
+
+        # the buffer is overwritten by the next step, so the state is copied out of it (once per step)
+        if self.state_kind == _TENSOR_STATE:
+            self.state_copy = self.state_buffer.clone()
+        elif self.state_kind == _NUMPY_STATE:
+            self.state_copy = self.state_buffer.numpy().copy()
+        elif self.state_kind == _SCALAR_STATE:
+            self.state_copy = self.state_buffer.item()
+        else:
+            self.state_copy = self.object_state
+
+        return self.state_copy
+
+    def get_action_count(self) -> int:
+        return self.num_of_actions
+
+    def step(self, action: int) -> None:
+        self._send("step", action)
+
+        if not self.pipelined:
+            self._wait()
+
+    def get_reward(self) -> float:
+        self._wait()
+        return self.info_buffer[0].item()
+
+    def is_terminated(self) -> bool:
+        self._wait()
+        return self.info_buffer[1].item() != 0
+
+    def close(self) -> None:
+        if self.closed:
+            return
+
+        self.closed = True
+
+        try:
+            self._send("close")
+            self._wait()
+        except (EOFError, BrokenPipeError):
+            pass  # the worker is already gone
+        finally:
+            # the worker is shut down even if the environment failed to close
+            self.connection.close()
+            self.process.join(timeout=5)
+
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+
+    def set_evaluation(self, value: bool) -> None:
+        self._send("set_evaluation", value)
+        self._wait()
@@ -1,4 +1,5 @@
-from torch import tensor
+from numpy import ndarray
+from torch import tensor, from_numpy, dtype as torch_dtype
 from torch import float as torch_float
 
 from the_great_library_of_rl.builtin_environments.gymnasium_environment import GymnasiumEnvironment
@@ -8,15 +9,49 @@ class TensorGymnasiumEnvironment(GymnasiumEnvironment):
     """
     Gymnasium environment that returns states as Tensors. See: GymnasiumEnvironment
 
+    The state is converted once after every step or reset and the same Tensor is returned until the environment
+    advances. NumPy states are converted without copying when the dtype allows it, so the Tensor shares memory with
+    the array returned by the environment.
+
     Args:
         env_name (str): Name of the environment to create.
+        dtype (torch.dtype, optional): Dtype of the returned states. Keeps the environment's dtype if None.
+            Default: torch.float
+        evaluation_render_mode (str, optional): Render mode used in the evaluation phase. Default: "human"
+        **kwargs: Keyword arguments passed to gymnasium.make.
     """
 
-    def __init__(self, env_name: str) -> None:
-        super().__init__(env_name)
+    def __init__(self, env_name: str, dtype: torch_dtype = torch_float, evaluation_render_mode: str = "human",
+                 **kwargs) -> None:
+        self.dtype = dtype
+        super().__init__(env_name, evaluation_render_mode, **kwargs)
 
-    def get_state(self):
-        if hasattr(self.state, "__iter__"):
-            return tensor(self.state, dtype=torch_float)
+        self._convert_state()
+
+    def _convert_state(self) -> None:
+        """
+        Convert the current state to a Tensor and cache it.
+        """
+
+        state = self.state
+
+        if isinstance(state, ndarray) and state.ndim > 0 and state.flags.writeable:
+            converted = from_numpy(state)
+        elif hasattr(state, "__iter__"):
+            converted = tensor(state)
+        else:
+            converted = tensor([state])
 
-        return tensor([self.state], dtype=torch_float)
+        # no copy is made if the dtype already matches
+        self.tensor_state = converted if self.dtype is None else converted.to(self.dtype)
+
+    def reset(self, seed: int = None) -> None:
+        super().reset(seed)
+        self._convert_state()
+
+    def step(self, action: int) -> None:
+        super().step(action)
+        self._convert_state()
+
+    def get_state(self):
+        return self.tensor_state
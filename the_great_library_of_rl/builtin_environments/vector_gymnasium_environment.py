@@ -0,0 +1,176 @@
+from gymnasium import make
+from gymnasium.vector import SyncVectorEnv, AsyncVectorEnv, AutoresetMode
+from numpy import asarray
+from torch import Tensor, as_tensor, from_numpy, zeros
+from torch import float as torch_float, bool as torch_bool
+
+from the_great_library_of_rl.builtin_environments.gymnasium_environment import GymnasiumEnvironment
+
+
+class VectorGymnasiumEnvironment(GymnasiumEnvironment):
+    """
+    Runs multiple copies of a Gymnasium environment side by side and steps all of them at once. States, rewards and
+    terminal flags are returned as Tensors with the copies stacked along the first dimension.
+
+    Copies that reach a terminal state are reset automatically during the same step. Their terminal state is still
+    available through get_next_state(), while get_state() already returns the first state of the new episode.
+
+    Args:
+        env_name (str): Name of the environment to create.
+        num_envs (int): Number of copies of the environment.
+        asynchronous (bool, optional): Step the copies in separate processes (AsyncVectorEnv) instead of sequentially
+            in this process (SyncVectorEnv). Default: False
+    """
+
+    def __init__(self, env_name: str, num_envs: int, asynchronous: bool = False) -> None:
+        self.env_name = env_name
+        self.num_envs = num_envs
+        self.asynchronous = asynchronous
+
+        self.env = self._make_vector_env()
+        # only the non-rendering environment exists, see: set_evaluation
+        self.envs = {None: self.env}
+        self.num_of_actions = self.env.single_action_space.n
+
+        self.reset()
+
+    def _make_vector_env(self, **kwargs):
+        """
+        Create the vectorized environment.
+
+        Args:
+            **kwargs: Keyword arguments passed to every copy of the environment.
+
+        Returns:
+            The vectorized environment.
+        """
+
+        env_fns = [lambda: make(self.env_name, **kwargs) for _ in range(self.num_envs)]
+        vector_env_class = AsyncVectorEnv if self.asynchronous else SyncVectorEnv
+
+        return vector_env_class(env_fns, autoreset_mode=AutoresetMode.SAME_STEP)
+
+    def reset(self, seed: int = None) -> None:
+        """
+        Reset all copies of the environment.
+
+        Args:
+            seed (int, optional): Seed of the first copy, the other copies get the following seeds. The copies are
+                not reseeded if None. Default: None
+        """
+
+        state, _ = self.env.reset(seed=seed)
+
+        self.state = self._to_tensor(state)
+        self.next_state = self.state
+        self.last_reward = zeros(self.num_envs, dtype=torch_float)
+        self.terminated = zeros(self.num_envs, dtype=torch_bool)
+        self.truncated = zeros(self.num_envs, dtype=torch_bool)
+
+    @staticmethod
+    def _to_tensor(state) -> Tensor:
+        """
+        Convert a batch of states from the vectorized environment to a float Tensor.
+
+        Args:
+            state: Batch of states.
+
+        Returns:
+            Tensor: Batch of states as a Tensor of shape (num_envs, ...).
+        """
+
+        state = from_numpy(asarray(state)).to(torch_float)
+
+        # scalar states (e.g. discrete observation spaces) get their own dimension
+        if state.dim() == 1:
+            state = state.unsqueeze(-1)
+
+        return state
+
+    def get_state(self) -> Tensor:
+        """
+        Return the current states of all copies.
+
+        Returns:
+            Tensor: States of shape (num_envs, ...).
+        """
+
+        return self.state
+
+    def get_next_state(self) -> Tensor:
+        """
+        Return the states reached by the last step. Unlike get_state(), copies that were reset after the step return
+        their terminal state.
+
+        Returns:
+            Tensor: States of shape (num_envs, ...).
+        """
+
+        return self.next_state
+
+    def get_num_envs(self) -> int:
+        """
+        Return the number of copies of the environment.
+
+        Returns:
+            int: The number of copies.
+        """
+
+        return self.num_envs
+
+    def step(self, action) -> None:
+        """
+        Execute one action in every copy of the environment.
+
+        Args:
+            action: Actions to take, one for every copy.
+        """
+
+        state, reward, terminated, truncated, info = self.env.step(asarray(action))
+
+        self.state = self._to_tensor(state)
+        self.last_reward = from_numpy(asarray(reward)).to(torch_float)
+        self.terminated = as_tensor(terminated)
+        self.truncated = as_tensor(truncated)
+
+        # the copies that ended were already reset, the states they ended in are stored separately
+        self.next_state = self.state
+        if "final_obs" in info:
+            self.next_state = self.state.clone()
+
+            for i in info["_final_obs"].nonzero()[0]:
+                self.next_state[i] = self._to_tensor(asarray(info["final_obs"][i])[None])[0]
+
+    def get_reward(self) -> Tensor:
+        """
+        Return the rewards of the last step.
+
+        Returns:
+            Tensor: Rewards of shape (num_envs,).
+        """
+
+        return self.last_reward
+
+    def get_terminated(self) -> Tensor:
+        """
+        Return which copies ended with the last step.
+
+        Returns:
+            Tensor: Boolean Tensor of shape (num_envs,). True for the copies that ended.
+        """
+
+        return self.terminated | self.truncated
+
+    def is_terminated(self) -> bool:
+        """
+        Check if any of the copies ended with the last step.
+
+        Returns:
+            bool: True if at least one copy ended, False otherwise.
+        """
+
+        return bool(self.get_terminated().any())
+
+    def set_evaluation(self, value: bool) -> None:
+        # rendering multiple copies is not supported, the copies are only reset for the new phase
+        self.reset()
@@ -0,0 +1,62 @@
+class Callback:
+    """
+    Base class for hooks into the Trainer and Tester. Override the methods of the events you are interested in, the
+    rest does nothing.
+    """
+
+    def on_train_start(self, trainer) -> None:
+        """
+        Called before the first epoch of Trainer.train.
+
+        Args:
+            trainer (Trainer): The trainer.
+        """
+
+        pass
+
+    def on_epoch_start(self, runner) -> None:
+        """
+        Called before every epoch.
+
+        Args:
+            runner (Trainer | Tester): The trainer or tester running the epoch.
+        """
+
+        pass
+
+    def on_step(self, runner, state, action: int, reward: float, next_state, non_terminal: bool) -> None:
+        """
+        Called after every step of the environment.
+
+        Args:
+            runner (Trainer | Tester): The trainer or tester running the epoch.
+            state: State the action was taken in.
+            action (int): Action taken.
+            reward (float): Reward received for the action.
+            next_state: State reached after taking the action.
+            non_terminal (bool): False if the environment ended (last state was reached), True otherwise.
+        """
+
+        pass
+
+    def on_epoch_end(self, runner, stats: dict) -> None:
+        """
+        Called after every epoch.
+
+        Args:
+            runner (Trainer | Tester): The trainer or tester running the epoch.
+            stats (dict): Statistics of the epoch (epoch, steps, return, duration and for training also epsilon,
+                updates and loss).
+        """
+
+        pass
+
+    def on_train_end(self, trainer) -> None:
+        """
+        Called after the last epoch of Trainer.train.
+
+        Args:
+            trainer (Trainer): The trainer.
+        """
+
+        pass
@@ -0,0 +1,215 @@
+import os
+import random
+from threading import Thread
+
+import numpy
+import torch
+from torch import Tensor
+
+from the_great_library_of_rl.callbacks import Callback
+from the_great_library_of_rl.exploration_strategies.epsilon_greedy_strategy import EpsilonGreedyStrategy
+from the_great_library_of_rl.q_learning import QAgent
+
+
+def _prepare_state(state, copy: bool):
+    """
+    Prepare a state for saving. Tensors that are views of a larger storage (e.g. the filled part of a replay memory)
+    are compacted, because saving a view would write the whole storage.
+
+    Args:
+        state: State to prepare (nested dicts, lists and tuples of tensors and plain values).
+        copy (bool): Copy every tensor and container, so that the state can be saved while the training goes on.
+
+    Returns:
+        The prepared state.
+    """
+
+    if isinstance(state, Tensor):
+        if copy or state.untyped_storage().nbytes() != state.numel() * state.element_size():
+            return state.clone()
+
+        return state
+
+    if isinstance(state, dict):
+        return {key: _prepare_state(value, copy) for key, value in state.items()}
+
+    if isinstance(state, list):
+        return [_prepare_state(value, copy) for value in state]
+
+    if isinstance(state, tuple):
+        return tuple(_prepare_state(value, copy) for value in state)
+
+    return state
+
+
+def _create_checkpoint(agent: QAgent, exploration_strategy: EpsilonGreedyStrategy, metadata: dict,
+                       copy: bool) -> dict:
+    """
+    Collect the complete training state into a checkpoint.
+
+    Args:
+        agent (QAgent): Agent to save.
+        exploration_strategy (EpsilonGreedyStrategy): Exploration strategy to save. Can be None.
+        metadata (dict): Additional information to save. Can be None.
+        copy (bool): Copy all tensors, so that the checkpoint doesn't change with the training.
+
+    Returns:
+        dict: The checkpoint.
+    """
+
+    return _prepare_state({
+        "agent": agent.state_dict(),
+        "exploration_strategy": None if exploration_strategy is None else exploration_strategy.state_dict(),
+        "random_state": {
+            "python": random.getstate(),
+            "numpy": numpy.random.get_state(),
+            "torch": torch.get_rng_state()
+        },
+        "metadata": {} if metadata is None else metadata
+    }, copy)
+
+
+def _write_checkpoint(path: str, checkpoint: dict) -> None:
+    """
+    Write a checkpoint to the disk. The file is replaced atomically, so an interrupted write never leaves a broken
+    checkpoint behind.
+
+    Args:
+        path (str): Path of the checkpoint.
+        checkpoint (dict): The checkpoint.
+    """
+
+    temporary_path = f"{path}.tmp"
+
+    torch.save(checkpoint, temporary_path)
+    os.replace(temporary_path, path)
+
+
+def save_checkpoint(path: str, agent: QAgent, exploration_strategy: EpsilonGreedyStrategy = None,
+                    metadata: dict = None) -> None:
+    """
+    Save the complete training state: the agent (including its replay memory), the exploration strategy and the
+    state of the random number generators. Tensors and arrays are written as contiguous raw data, nothing is pickled
+    per experience or per state.
+
+    Args:
+        path (str): Path of the checkpoint.
+        agent (QAgent): Agent to save.
+        exploration_strategy (EpsilonGreedyStrategy, optional): Exploration strategy to save. Default: None
+        metadata (dict, optional): Additional information to save (e.g. the number of finished epochs). Default: None
+    """
+
+    _write_checkpoint(path, _create_checkpoint(agent, exploration_strategy, metadata, copy=False))
+
+
+def load_checkpoint(path: str, agent: QAgent, exploration_strategy: EpsilonGreedyStrategy = None) -> dict:
+    """
+    Restore the training state saved by save_checkpoint(). The file is memory-mapped, so the data is read straight
+    into the agent and its replay memory.
+
+    Args:
+        path (str): Path of the checkpoint.
+        agent (QAgent): Agent to restore. Must be configured like the saved agent.
+        exploration_strategy (EpsilonGreedyStrategy, optional): Exploration strategy to restore. Default: None
+
+    Returns:
+        dict: The metadata saved with the checkpoint.
+    """
+
+    # the checkpoint holds arbitrary states (e.g. the keys of a q-table), so it can't be loaded with weights only
+    checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=False)
+
+    agent.load_state_dict(checkpoint["agent"])
+
+    if exploration_strategy is not None and checkpoint["exploration_strategy"] is not None:
+        exploration_strategy.load_state_dict(checkpoint["exploration_strategy"])
+
+    random_state = checkpoint["random_state"]
+    random.setstate(random_state["python"])
+    numpy.random.set_state(random_state["numpy"])
+    torch.set_rng_state(random_state["torch"])
+
+    return checkpoint["metadata"]
+
+
+class CheckpointCallback(Callback):
+    """
+    Saves a checkpoint of the training every few epochs and at the end of the training (see: save_checkpoint).
+
+    With asynchronous writing, the training state is copied in memory and written to the disk by a background
+    thread, so the training only waits for the copy. If the previous checkpoint is still being written, the next one
+    waits for it. The number of finished epochs is saved as the "epoch" metadata, a training is resumed with:
+
+        trainer.epoch = load_checkpoint(path, agent, exploration_strategy)["epoch"]
+
+    Args:
+        path (str): Path of the checkpoint. Every checkpoint overwrites the previous one.
+        every_epochs (int, optional): Number of epochs between the checkpoints. Default: 1
+        asynchronous (bool, optional): Write the checkpoints in a background thread. Default: True
+    """
+
+    def __init__(self, path: str, every_epochs: int = 1, asynchronous: bool = True) -> None:
+        self.path = path
+        self.every_epochs = every_epochs
+        self.asynchronous = asynchronous
+
+        self.trainer = None
+        self.saved_epoch = None
+
+        self.thread = None
+        self.error = None
+
+    def on_train_start(self, trainer) -> None:
+        self.trainer = trainer
+
+    def on_epoch_end(self, runner, stats: dict) -> None:
+        # the callback can be shared with a tester, only the training is saved
+        if runner is self.trainer and runner.epoch % self.every_epochs == 0:
+            self.save()
+
+    def on_train_end(self, trainer) -> None:
+        if trainer.epoch != self.saved_epoch:
+            self.save()
+
+        self.wait()
+
+    def save(self) -> None:
+        """
+        Save a checkpoint of the current training state.
+        """
+
+        trainer = self.trainer
+        self.saved_epoch = trainer.epoch
+
+        checkpoint = _create_checkpoint(trainer.agent, trainer.exploration_strategy, {"epoch": trainer.epoch},
+                                        copy=self.asynchronous)
+
+        if not self.asynchronous:
+            _write_checkpoint(self.path, checkpoint)
+            return
+
+        self.wait()
+
+        self.thread = Thread(target=self._write, args=(checkpoint,))
+        self.thread.start()
+
+    def wait(self) -> None:
+        """
+        Wait until the checkpoint being written is finished. Raises the error of the write if it failed.
+        """
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+        if self.error is not None:
+            error = self.error
+            self.error = None
+
+            raise error
+
+    def _write(self, checkpoint: dict) -> None:
+        try:
+            _write_checkpoint(self.path, checkpoint)
+        except Exception as error:
+            self.error = error
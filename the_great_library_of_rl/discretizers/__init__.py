@@ -0,0 +1,49 @@
+from abc import ABC, abstractmethod
+
+from numpy import ndarray
+
+
+class Discretizer(ABC):
+    """
+    Interface for mapping continuous observations to integer keys, so that tabular agents can learn on continuous
+    environments.
+    """
+
+    @abstractmethod
+    def discretize(self, observation):
+        """
+        Return the key of a single observation.
+
+        Args:
+            observation: Observation of the environment (array-like of floats).
+
+        Returns:
+            Key of the observation, usable as a state of a tabular agent.
+        """
+
+        pass
+
+    @abstractmethod
+    def discretize_batch(self, observations) -> ndarray:
+        """
+        Return the keys of a batch of observations.
+
+        Args:
+            observations: Batch of observations, one per row.
+
+        Returns:
+            ndarray: Keys of the observations, one per row.
+        """
+
+        pass
+
+    @abstractmethod
+    def get_num_states(self) -> int:
+        """
+        Return the number of possible keys.
+
+        Returns:
+            int: Number of different keys the discretizer can return.
+        """
+
+        pass
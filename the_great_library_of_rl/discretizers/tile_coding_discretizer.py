@@ -0,0 +1,105 @@
+from numpy import ndarray, asarray, broadcast_to, arange, empty, floor, clip, maximum, minimum, subtract, multiply, add
+from numpy import cumprod, float64, int64
+
+from the_great_library_of_rl.discretizers import Discretizer
+
+
+class TileCodingDiscretizer(Discretizer):
+    """
+    Tile coding: covers the observation space with several grids of equally wide tiles (tilings), each shifted by a
+    fraction of a tile. An observation activates one tile in every tiling, so its key is the array of the indices of
+    its active tiles (one per tiling). Nearby observations share most of their tiles, which generalizes between them
+    while keeping a fine resolution. The keys are meant for TileCodingQTable.
+
+    The tilings are shifted asymmetrically (by 1, 3, 5, ... times 1 / num_tilings of a tile in the dimensions) as
+    recommended by Sutton and Barto (Reinforcement Learning: An Introduction, section 9.5.4). Every tiling has one
+    extra tile per dimension to cover the shift. Values outside of [low, high] fall into the edge tiles.
+
+    Args:
+        low: Lower bound of every dimension (or one bound for all dimensions).
+        high: Upper bound of every dimension (or one bound for all dimensions).
+        tiles: Number of tiles of every dimension in [low, high] (or one number for all dimensions).
+        num_tilings (int, optional): Number of tilings. Default: 8
+    """
+
+    def __init__(self, low, high, tiles, num_tilings: int = 8) -> None:
+        low = asarray(low, dtype=float64)
+        high = asarray(high, dtype=float64)
+        dims = max(low.size, high.size, asarray(tiles).size)
+
+        self.low = broadcast_to(low, (dims,)).copy()
+        self.high = broadcast_to(high, (dims,)).copy()
+        self.tiles = broadcast_to(asarray(tiles, dtype=int64), (dims,)).copy()
+        self.num_tilings = num_tilings
+
+        # tiles per unit of every dimension
+        self.scales = self.tiles / (self.high - self.low)
+        # the shift covers one more tile in every dimension
+        self.max_tiles = self.tiles.astype(float64)
+
+        # shift of every tiling in every dimension, as a fraction of a tile
+        displacements = 2 * arange(dims) + 1
+        self.offsets = (arange(num_tilings)[:, None] * displacements[None, :] % num_tilings) / num_tilings
+
+        tiles_per_dim = self.tiles + 1
+        strides = cumprod(tiles_per_dim[::-1])[::-1]
+        self.strides = (strides // tiles_per_dim).astype(float64)
+
+        self.tiles_per_tiling = int(strides[0])
+        # index of the first tile of every tiling
+        self.tiling_starts = (arange(num_tilings) * self.tiles_per_tiling).astype(float64)
+
+        self.scaled = empty(dims, dtype=float64)
+        self.buffer = empty((num_tilings, dims), dtype=float64)
+
+    def discretize(self, observation) -> ndarray:
+        """
+        Return the active tiles of a single observation. A new (small) array is returned for every observation, so
+        that the keys of consecutive states can be kept.
+
+        Args:
+            observation: Observation of the environment (array-like of floats).
+
+        Returns:
+            ndarray: Index of the active tile of every tiling as int64.
+        """
+
+        scaled = self.scaled
+        buffer = self.buffer
+
+        subtract(observation, self.low, out=scaled)
+        multiply(scaled, self.scales, out=scaled)
+
+        add(self.offsets, scaled, out=buffer)
+        floor(buffer, out=buffer)
+        # two ufuncs are several times faster than clip() on small arrays
+        maximum(buffer, 0, out=buffer)
+        minimum(buffer, self.max_tiles, out=buffer)
+
+        return (buffer.dot(self.strides) + self.tiling_starts).astype(int64)
+
+    def discretize_batch(self, observations) -> ndarray:
+        """
+        Return the active tiles of a batch of observations.
+
+        Args:
+            observations: Batch of observations, one per row.
+
+        Returns:
+            ndarray: Index of the active tile of every tiling, one row per observation, as int64.
+        """
+
+        scaled = (asarray(observations, dtype=float64) - self.low) * self.scales
+        cells = clip(floor(scaled[:, None, :] + self.offsets), 0, self.max_tiles)
+
+        return (cells @ self.strides + self.tiling_starts).astype(int64)
+
+    def get_num_states(self) -> int:
+        """
+        Return the number of tiles of all tilings.
+
+        Returns:
+            int: Number of different tile indices.
+        """
+
+        return self.num_tilings * self.tiles_per_tiling
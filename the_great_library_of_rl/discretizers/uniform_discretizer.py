@@ -0,0 +1,80 @@
+from numpy import ndarray, asarray, broadcast_to, empty, floor, clip, maximum, minimum, subtract, multiply, cumprod
+from numpy import prod, float64, int64
+
+from the_great_library_of_rl.discretizers import Discretizer
+
+
+class UniformDiscretizer(Discretizer):
+    """
+    Splits every dimension of the observations into equally wide bins and maps an observation to a single integer
+    key, the index of its cell in the grid of bins. Values outside of [low, high] fall into the first or last bin.
+
+    The bins are equally wide, so the bin of a value is computed directly from precomputed offsets and scales instead
+    of searching the bin edges. Single observations are discretized in preallocated buffers, so a step doesn't
+    allocate arrays.
+
+    Args:
+        low: Lower bound of every dimension (or one bound for all dimensions).
+        high: Upper bound of every dimension (or one bound for all dimensions).
+        bins: Number of bins of every dimension (or one number for all dimensions).
+    """
+
+    def __init__(self, low, high, bins) -> None:
+        low = asarray(low, dtype=float64)
+        high = asarray(high, dtype=float64)
+        dims = max(low.size, high.size, asarray(bins).size)
+
+        self.low = broadcast_to(low, (dims,)).copy()
+        self.high = broadcast_to(high, (dims,)).copy()
+        self.bins = broadcast_to(asarray(bins, dtype=int64), (dims,)).copy()
+
+        # bins per unit of every dimension
+        self.scales = self.bins / (self.high - self.low)
+        # the highest bin of every dimension, the values are clipped to it
+        self.max_bins = (self.bins - 1).astype(float64)
+
+        # key = sum of the bins weighted by the strides of the grid (the last dimension changes fastest)
+        strides = cumprod(self.bins[::-1])[::-1]
+        self.strides = (strides // self.bins).astype(float64)
+
+        self.buffer = empty(dims, dtype=float64)
+
+    def discretize(self, observation) -> int:
+        """
+        Return the key of a single observation.
+
+        Args:
+            observation: Observation of the environment (array-like of floats).
+
+        Returns:
+            int: Index of the observation's cell in the grid of bins.
+        """
+
+        buffer = self.buffer
+
+        subtract(observation, self.low, out=buffer)
+        multiply(buffer, self.scales, out=buffer)
+        floor(buffer, out=buffer)
+        # two ufuncs are several times faster than clip() on small arrays
+        maximum(buffer, 0, out=buffer)
+        minimum(buffer, self.max_bins, out=buffer)
+
+        # the keys are exact in float64 up to 2 ** 53 cells
+        return int(buffer.dot(self.strides))
+
+    def discretize_batch(self, observations) -> ndarray:
+        """
+        Return the keys of a batch of observations.
+
+        Args:
+            observations: Batch of observations, one per row.
+
+        Returns:
+            ndarray: Keys of the observations as int64.
+        """
+
+        cells = clip(floor((asarray(observations, dtype=float64) - self.low) * self.scales), 0, self.max_bins)
+        return (cells @ self.strides).astype(int64)
+
+    def get_num_states(self) -> int:
+        return int(prod(self.bins))
@@ -3,9 +3,13 @@ from abc import ABC, abstractmethod
 
 class Environment(ABC):
     @abstractmethod
-    def reset(self) -> None:
+    def reset(self, seed: int = None) -> None:
         """
         Reset the state of the environment to its initial value.
+
+        Args:
+            seed (int, optional): Seed of the environment's random number generator. Keeps the current random state if
+                None. Default: None
         """
 
         pass
@@ -30,6 +30,19 @@ class EpsilonGreedyStrategy:
 
         return random() < self.epsilon
 
+    def should_sample_random_actions(self, count: int) -> list[bool]:
+        """
+        Make an independent explore/exploit decision for multiple agents or environment copies at once.
+
+        Args:
+            count (int): Number of decisions to make.
+
+        Returns:
+            list[bool]: True for every decision to explore, False for every decision to exploit.
+        """
+
+        return [random() < self.epsilon for _ in range(count)]
+
     def decay_epsilon(self) -> None:
         """
         Decrease epsilon by the defined epsilon step and clip it to the minimum value (epsilon end).
@@ -39,3 +52,23 @@ class EpsilonGreedyStrategy:
 
         if self.epsilon < self.epsilon_end:
             self.epsilon = self.epsilon_end
+
+    def state_dict(self) -> dict:
+        """
+        Return the state of the strategy, e.g. for a checkpoint.
+
+        Returns:
+            dict: State of the strategy.
+        """
+
+        return {"epsilon": self.epsilon}
+
+    def load_state_dict(self, state_dict: dict) -> None:
+        """
+        Restore the strategy from a state returned by state_dict().
+
+        Args:
+            state_dict (dict): State of the strategy.
+        """
+
+        self.epsilon = state_dict["epsilon"]
@@ -0,0 +1,133 @@
+import csv
+import json
+from time import perf_counter
+
+
+class Instrumentation:
+    """
+    Collects timings and statistics of a training or testing run.
+
+    Time is measured in laps: every call to lap() attributes the time since the previous call to the given phase, so
+    the phases never overlap and add up to the total time. The Trainer and Tester measure "action_selection",
+    "environment_step" and "agent_update". Agents can split their update further (e.g. DQN measures "replay_add",
+    "replay_sampling" and "learn"), which is then no longer counted in "agent_update".
+
+    Every finished epoch is recorded with its statistics and phase times, and all of it can be saved as JSON or CSV.
+    """
+
+    def __init__(self) -> None:
+        # total time spent in each phase
+        self.phase_times = {}
+        # time spent in each phase during the current epoch
+        self.epoch_phase_times = {}
+        # records of the finished epochs
+        self.epochs = []
+
+        self.last_lap = perf_counter()
+
+    def lap(self, phase: str = None) -> None:
+        """
+        Attribute the time since the last lap to a phase.
+
+        Args:
+            phase (str, optional): Name of the phase. The time is discarded if None. Default: None
+        """
+
+        now = perf_counter()
+
+        if phase is not None:
+            elapsed = now - self.last_lap
+            self.phase_times[phase] = self.phase_times.get(phase, 0) + elapsed
+            self.epoch_phase_times[phase] = self.epoch_phase_times.get(phase, 0) + elapsed
+
+        self.last_lap = now
+
+    def start_epoch(self) -> None:
+        """
+        Start measuring a new epoch.
+        """
+
+        self.epoch_phase_times = {}
+        self.lap()
+
+    def end_epoch(self, stats: dict) -> None:
+        """
+        Record a finished epoch.
+
+        Args:
+            stats (dict): Statistics of the epoch (e.g. steps, return, epsilon).
+        """
+
+        record = dict(stats)
+
+        for phase, seconds in self.epoch_phase_times.items():
+            record[f"{phase}_seconds"] = seconds
+
+        self.epochs.append(record)
+
+    def summary(self) -> dict:
+        """
+        Return aggregated statistics of all recorded epochs.
+
+        Returns:
+            dict: Number of epochs and steps, mean return and the total and per-step time of every phase.
+        """
+
+        steps = sum(epoch.get("steps", 0) for epoch in self.epochs)
+        returns = [epoch["return"] for epoch in self.epochs if "return" in epoch]
+
+        summary = {
+            "epochs": len(self.epochs),
+            "steps": steps,
+            "mean_return": sum(returns) / len(returns) if returns else None
+        }
+
+        for phase, seconds in self.phase_times.items():
+            summary[f"{phase}_seconds"] = seconds
+            summary[f"{phase}_us_per_step"] = seconds / steps * 1e6 if steps else None
+
+        return summary
+
+    def to_json(self, path: str) -> None:
+        """
+        Save the summary and the records of all epochs as JSON.
+
+        Args:
+            path (str): Path of the file.
+        """
+
+        with open(path, "w") as file:
+            json.dump({"summary": self.summary(), "epochs": self.epochs}, file, indent=2)
+
+    def to_csv(self, path: str) -> None:
+        """
+        Save the records of all epochs as CSV, one row per epoch.
+
+        Args:
+            path (str): Path of the file.
+        """
+
+        columns = []
+        for epoch in self.epochs:
+            columns.extend(column for column in epoch if column not in columns)
+
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(self.epochs)
+
+
+class NullInstrumentation(Instrumentation):
+    """
+    Instrumentation that measures nothing. Used when the instrumentation is disabled, so that the measured code
+    doesn't need to check for it.
+    """
+
+    def lap(self, phase: str = None) -> None:
+        pass
+
+    def start_epoch(self) -> None:
+        pass
+
+    def end_epoch(self, stats: dict) -> None:
+        pass
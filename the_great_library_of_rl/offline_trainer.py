@@ -0,0 +1,88 @@
+import os
+
+import numpy
+from torch import from_numpy
+
+from the_great_library_of_rl.q_learning import QAgent
+from the_great_library_of_rl.q_learning.dqn import DQN
+from the_great_library_of_rl.q_learning.replay_memory import ExperienceBatch
+from the_great_library_of_rl.transition_recorder import SHARD_COLUMNS, list_shards
+
+
+class OfflineTrainer:
+    """
+    Trains an agent on a dataset of recorded transitions (see: TransitionRecorder) without stepping an environment.
+
+    The shards are read through memory maps, so only the sampled rows are loaded and a dataset can be larger than
+    the memory. Every epoch visits the shards and the transitions inside of them in a random order, in batches. A DQN
+    learns from every batch with one gradient step (see: DQN.learn_from_batch), other agents get the batch through
+    update_q_values (vectorized in DenseQTable).
+
+    Args:
+        agent (QAgent): Agent to train.
+        directory (str): Directory of the dataset.
+        batch_size (int, optional): Number of transitions in a batch. Default: 256
+        seed (int, optional): Seed of the order of the transitions. Default: None
+    """
+
+    def __init__(self, agent: QAgent, directory: str, batch_size: int = 256, seed: int = None) -> None:
+        self.agent = agent
+        self.directory = directory
+        self.batch_size = batch_size
+
+        self.rng = numpy.random.default_rng(seed)
+
+        # number of finished epochs
+        self.epoch = 0
+
+    def train(self, epochs: int) -> None:
+        """
+        Train the agent on the dataset.
+
+        Args:
+            epochs (int): Number of passes over the dataset.
+        """
+
+        shards = list_shards(self.directory)
+
+        if not shards:
+            raise ValueError(f"No shards found in {self.directory}")
+
+        for _ in range(epochs):
+            for shard in self.rng.permutation(shards):
+                self._train_on_shard(str(shard))
+
+            self.epoch += 1
+
+    def _train_on_shard(self, shard: str) -> None:
+        """
+        Learn from all transitions of a shard.
+
+        Args:
+            shard (str): Path of the shard.
+        """
+
+        columns = {name: numpy.load(os.path.join(shard, f"{name}.npy"), mmap_mode="r") for name in SHARD_COLUMNS}
+        order = self.rng.permutation(len(columns["actions"]))
+
+        for start in range(0, len(order), self.batch_size):
+            # sorted rows are read from the memory maps sequentially, the order inside a batch doesn't matter
+            rows = numpy.sort(order[start:start + self.batch_size])
+
+            # fancy indexing copies the rows out of the memory maps
+            states = columns["states"][rows]
+            actions = columns["actions"][rows]
+            rewards = columns["rewards"][rows]
+            next_states = columns["next_states"][rows]
+            non_terminal = columns["non_terminal"][rows]
+
+            if isinstance(self.agent, DQN):
+                self.agent.learn_from_batch(ExperienceBatch.from_tensors(
+                    from_numpy(states),
+                    from_numpy(actions),
+                    from_numpy(rewards),
+                    from_numpy(next_states),
+                    from_numpy(non_terminal.astype(numpy.float32))
+                ))
+            else:
+                self.agent.update_q_values(states, actions, rewards, next_states, non_terminal)
@@ -0,0 +1,85 @@
+from contextlib import nullcontext
+
+import torch
+from torch import Tensor, autocast
+from torch import dtype as torch_dtype, channels_last as torch_channels_last
+
+from the_great_library_of_rl.neural_network import NeuralNetwork
+
+
+class PerformanceConfig:
+    """
+    CPU performance settings of the training. The default settings change nothing.
+
+    Thread counts are global to the process (PyTorch has a single thread pool), so they apply to every network, not
+    only to the agent's. The number of inter-op threads can only be set before PyTorch runs any parallel work.
+
+    Args:
+        num_threads (int, optional): Number of threads used inside a single operation (intra-op). Unchanged if None.
+            Default: None
+        num_interop_threads (int, optional): Number of threads used to run independent operations in parallel
+            (inter-op). Unchanged if None. Default: None
+        autocast_dtype (torch_dtype, optional): Run the forward passes and the loss of the updates in this reduced
+            precision (e.g. torch.bfloat16) with torch.autocast. The parameters and the optimizer stay in float32.
+            Full precision if None. Default: None
+        channels_last (bool, optional): Convert the network and the 4D batches (images) to the channels-last memory
+            format, which is faster for convolutions on most CPUs. The other batches are only made contiguous.
+            Default: False
+        set_to_none (bool, optional): Reset the gradients to None instead of filling them with zeros before every
+            update, which saves a pass over the gradient memory. Default: True
+    """
+
+    def __init__(self, num_threads: int = None, num_interop_threads: int = None, autocast_dtype: torch_dtype = None,
+                 channels_last: bool = False, set_to_none: bool = True) -> None:
+        self.num_threads = num_threads
+        self.num_interop_threads = num_interop_threads
+        self.autocast_dtype = autocast_dtype
+        self.channels_last = channels_last
+        self.set_to_none = set_to_none
+
+    def apply(self, network: NeuralNetwork) -> None:
+        """
+        Set the thread counts and convert the network to the configured memory format.
+
+        Args:
+            network (NeuralNetwork): Network to convert.
+        """
+
+        if self.num_threads is not None:
+            torch.set_num_threads(self.num_threads)
+
+        # setting the inter-op threads fails once they were used, even to the same value
+        if self.num_interop_threads is not None and torch.get_num_interop_threads() != self.num_interop_threads:
+            torch.set_num_interop_threads(self.num_interop_threads)
+
+        if self.channels_last:
+            network.to(memory_format=torch_channels_last)
+
+    def autocast(self):
+        """
+        Return a context manager running the enclosed operations in the configured precision.
+
+        Returns:
+            A torch.autocast context, a context doing nothing if no autocast dtype is configured.
+        """
+
+        if self.autocast_dtype is None:
+            return nullcontext()
+
+        return autocast("cpu", dtype=self.autocast_dtype)
+
+    def format_batch(self, batch: Tensor) -> Tensor:
+        """
+        Return a batch in the memory layout the network works with best. Doesn't copy batches that are already in it.
+
+        Args:
+            batch (Tensor): Batch of states.
+
+        Returns:
+            Tensor: The batch in the configured memory format.
+        """
+
+        if self.channels_last and batch.dim() == 4:
+            return batch.contiguous(memory_format=torch_channels_last)
+
+        return batch.contiguous()
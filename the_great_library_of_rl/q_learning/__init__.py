@@ -34,6 +34,19 @@ class QAgent(ABC):
 
         raise NotImplementedError
 
+    def get_actions(self, states) -> list[int] | Tensor:
+        """
+        Return the best actions for a batch of states.
+
+        Args:
+            states: Batch of states of the environment.
+
+        Returns:
+            list[int] | Tensor: Best action for every state according to the agent.
+        """
+
+        return [self.get_action(state) for state in states]
+
     def get_q_value(self, state, action: int) -> float:
         """
         Return the q-value for a state/action pair.
@@ -74,3 +87,76 @@ class QAgent(ABC):
         """
 
         raise NotImplementedError
+
+    def update_q_values(self, states, actions, rewards, next_states, non_terminal) -> None:
+        """
+        Update the agent's q-value predictions with a batch of transitions.
+
+        Args:
+            states: Batch of states of the environment.
+            actions: Actions taken in the states.
+            rewards: Rewards experienced after taking the actions.
+            next_states: States reached after taking the actions.
+            non_terminal: False for the transitions that ended the environment, True otherwise.
+        """
+
+        for state, action, reward, next_state, nt in zip(states, actions, rewards, next_states, non_terminal):
+            self.update_q_value(state, int(action), float(reward), next_state, bool(nt))
+
+    def get_update_count(self) -> int | None:
+        """
+        Return the number of parameter updates made so far.
+
+        Returns:
+            int | None: Number of updates. None if the agent doesn't count them.
+        """
+
+        return None
+
+    def get_last_loss(self) -> float | None:
+        """
+        Return the loss of the last parameter update.
+
+        Returns:
+            float | None: The last loss. None if the agent doesn't have one.
+        """
+
+        return None
+
+    def set_instrumentation(self, instrumentation) -> None:
+        """
+        Set the instrumentation the agent can use to measure the phases of its updates.
+
+        Args:
+            instrumentation (Instrumentation): Instrumentation of the current run.
+        """
+
+        pass
+
+    def close(self) -> None:
+        """
+        Release the resources of the agent (e.g. background threads) when it's no longer trained. Does nothing by
+        default.
+        """
+
+        pass
+
+    def state_dict(self) -> dict:
+        """
+        Return the complete state of the agent (everything it learned), e.g. for a checkpoint.
+
+        Returns:
+            dict: State of the agent.
+        """
+
+        raise NotImplementedError
+
+    def load_state_dict(self, state_dict: dict) -> None:
+        """
+        Restore the agent from a state returned by state_dict().
+
+        Args:
+            state_dict (dict): State of the agent.
+        """
+
+        raise NotImplementedError
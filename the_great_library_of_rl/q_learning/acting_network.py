@@ -0,0 +1,133 @@
+from copy import deepcopy
+
+import torch
+from torch import Tensor, inference_mode, no_grad
+from torch.optim import Optimizer
+
+from the_great_library_of_rl.neural_network import NeuralNetwork
+
+
+class ActingNetwork:
+    """
+    Fast forward pass used only for choosing actions. Runs under torch.inference_mode and can optionally run an
+    optimized version of the network:
+
+    - "eager": the network itself.
+    - "trace": the network traced with torch.jit.trace. Shares the parameters with the network.
+    - "compile": the network compiled with torch.compile. Shares the parameters with the network.
+    - "frozen": a traced copy of the network frozen with torch.jit.freeze. The parameters are baked into the copy,
+      so it is rebuilt on the first forward pass after refresh_steps updates. Rebuilding costs much more than a
+      forward pass, so the actions are chosen by weights up to refresh_steps updates old.
+
+    Traced versions are built on the first forward pass, separately for every number of input dimensions. The frozen
+    versions are traced from one copy of the network, which is created once and only receives the new weights
+    (state_dict) when they are rebuilt.
+
+    Args:
+        network (NeuralNetwork): Network to act with.
+        mode (str, optional): One of "eager", "trace", "compile" or "frozen". Default: "eager"
+        refresh_steps (int, optional): Number of updates after which a frozen network is rebuilt. Default: 100
+    """
+
+    MODES = ("eager", "trace", "compile", "frozen")
+
+    def __init__(self, network: NeuralNetwork, mode: str = "eager", refresh_steps: int = 100) -> None:
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown acting mode: {mode}. Expected one of: {', '.join(self.MODES)}")
+
+        self.network = network
+        self.mode = mode
+        self.refresh_steps = refresh_steps
+
+        # optimized networks keyed by the number of input dimensions
+        self.optimized = {}
+        self.compiled = torch.compile(network) if mode == "compile" else None
+
+        # copy of the network the frozen networks are traced from
+        self.copy = None
+
+        # number of updates since the frozen networks were built
+        self.stale_updates = 0
+
+    def _copy_network(self) -> NeuralNetwork:
+        """
+        Return the copy of the network with the network's current weights.
+
+        Returns:
+            NeuralNetwork: Copy of the network in evaluation mode.
+        """
+
+        if self.copy is None:
+            # an optimizer kept by the network isn't needed for acting, so it isn't copied
+            memo = {id(value): None for value in vars(self.network).values() if isinstance(value, Optimizer)}
+            self.copy = deepcopy(self.network, memo).eval()
+        else:
+            self.copy.load_state_dict(self.network.state_dict())
+
+        return self.copy
+
+    def _build(self, x: Tensor):
+        """
+        Build an optimized version of the network for inputs like the given one.
+
+        Args:
+            x (Tensor): Example input.
+
+        Returns:
+            Optimized network.
+        """
+
+        with no_grad():
+            if self.mode == "trace":
+                return torch.jit.trace(self.network, x)
+
+            # freezing requires a network in evaluation mode and inlines its parameters, so a copy is frozen
+            return torch.jit.freeze(torch.jit.trace(self._copy_network(), x))
+
+    def forward(self, x: Tensor) -> Tensor:
+        """
+        Return the network's output after a feed forward pass without tracking gradients.
+
+        Args:
+            x (Tensor): Network's input.
+
+        Returns:
+            Tensor: Network's output. An inference tensor, it can't be used in autograd.
+        """
+
+        if self.mode == "eager":
+            with inference_mode():
+                return self.network.forward(x)
+
+        if self.mode == "compile":
+            with inference_mode():
+                return self.compiled(x)
+
+        if self.mode == "frozen" and self.stale_updates >= self.refresh_steps:
+            self.optimized.clear()
+            self.stale_updates = 0
+
+        network = self.optimized.get(x.dim())
+
+        if network is None:
+            network = self._build(x)
+            self.optimized[x.dim()] = network
+
+        with inference_mode():
+            return network(x)
+
+    def reset(self) -> None:
+        """
+        Drop all optimized networks, e.g. after the network's parameters were replaced. They are rebuilt on the next
+        forward pass.
+        """
+
+        self.optimized.clear()
+        self.stale_updates = 0
+
+    def notify_update(self) -> None:
+        """
+        Notify the acting network that the network's parameters were updated.
+        """
+
+        self.stale_updates += 1
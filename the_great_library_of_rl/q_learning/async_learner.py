@@ -0,0 +1,122 @@
+from threading import Condition, Thread
+from typing import Callable
+
+
+class AsyncLearner:
+    """
+    Runs parameter updates in a background thread, so that they overlap with stepping the environment. PyTorch
+    releases the GIL in its operators, so a CPU-bound environment and the updates run in parallel.
+
+    Every trigger() schedules one call of the update function. The learner may fall behind by a limited number of
+    triggers, after that trigger() waits for it. This keeps the ratio of updates to environment steps (the replay
+    ratio) as configured, even if the updates are slower than the environment.
+
+    Errors raised in the background thread are raised again by the next trigger() or wait().
+
+    Args:
+        update (Callable[[], None]): Function running one scheduled update.
+        max_lag (int, optional): Number of triggers the learner may fall behind. It never waits if None. Default: 1
+    """
+
+    def __init__(self, update: Callable[[], None], max_lag: int = 1) -> None:
+        self.update = update
+        self.max_lag = max_lag
+
+        self.condition = Condition()
+        # number of scheduled updates that haven't finished yet (including the running one)
+        self.pending = 0
+        self.error = None
+        self.running = False
+
+        self.thread = None
+
+    def start(self) -> None:
+        """
+        Start the background thread. Called automatically by the first trigger().
+        """
+
+        with self.condition:
+            if self.running:
+                return
+
+            self.running = True
+
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def trigger(self, count: int = 1) -> None:
+        """
+        Schedule updates. Waits if the learner is too far behind.
+
+        Args:
+            count (int, optional): Number of updates to schedule. Default: 1
+        """
+
+        if not self.running:
+            self.start()
+
+        with self.condition:
+            self._raise_error()
+
+            self.pending += count
+            self.condition.notify_all()
+
+            if self.max_lag is not None:
+                self.condition.wait_for(lambda: self.pending <= self.max_lag or self.error is not None)
+                self._raise_error()
+
+    def wait(self) -> None:
+        """
+        Wait until all scheduled updates are finished.
+        """
+
+        with self.condition:
+            self.condition.wait_for(lambda: self.pending == 0 or self.error is not None)
+            self._raise_error()
+
+    def stop(self) -> None:
+        """
+        Finish the scheduled updates and stop the background thread.
+        """
+
+        if not self.running:
+            return
+
+        self.wait()
+
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+        self.thread.join()
+        self.thread = None
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            error = self.error
+            self.error = None
+            self.pending = 0
+
+            raise error
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending > 0 or not self.running)
+
+                if not self.running:
+                    return
+
+            try:
+                self.update()
+            except Exception as error:
+                with self.condition:
+                    self.error = error
+                    self.running = False
+                    self.condition.notify_all()
+
+                return
+
+            with self.condition:
+                self.pending -= 1
+                self.condition.notify_all()
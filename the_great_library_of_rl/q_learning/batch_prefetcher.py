@@ -0,0 +1,217 @@
+from contextlib import nullcontext
+from queue import Queue, Empty, Full
+from threading import Condition, Thread
+
+from torch import empty
+
+from the_great_library_of_rl.q_learning.replay_memory import ExperienceBatch, ReplayMemory
+from the_great_library_of_rl.q_learning.tensor_replay_memory import TensorReplayMemory
+
+
+class BatchPrefetcher:
+    """
+    Samples batches from a replay memory in a background thread and keeps a small queue of them ready, so that an
+    update only pops a batch instead of waiting for the sampling. A popped batch was sampled up to queue_size batches
+    earlier, so it can miss the newest experiences.
+
+    With reused buffers the batches are gathered into a ring of preallocated tensors instead of new ones. A batch
+    then stays valid only until the next get(), after that its tensors can be overwritten.
+
+    Errors raised in the background thread are raised again by the next get(). While the memory is empty, the thread
+    sleeps until notify() is called after experiences were added. The thread runs until stop() is called.
+
+    Args:
+        replay_memory (ReplayMemory): Memory to sample from.
+        lock (optional): Lock guarding the memory. The memory must not be changed while a batch is sampled, so it's
+            required whenever other threads add experiences. Default: None
+        queue_size (int, optional): Number of batches kept ready. Default: 2
+        reuse_buffers (bool, optional): Gather the batches into reused tensors. Requires a TensorReplayMemory (or a
+            subclass). Default: False
+        pin_memory (bool, optional): Allocate the reused tensors in pinned memory, which speeds up copying them to a
+            GPU. Requires CUDA. Default: False
+    """
+
+    def __init__(self, replay_memory: ReplayMemory, lock=None, queue_size: int = 2, reuse_buffers: bool = False,
+                 pin_memory: bool = False) -> None:
+        if reuse_buffers and not isinstance(replay_memory, TensorReplayMemory):
+            raise ValueError("Reusing the batch buffers requires a TensorReplayMemory")
+
+        self.replay_memory = replay_memory
+        self.lock = nullcontext() if lock is None else lock
+        self.queue_size = queue_size
+        self.reuse_buffers = reuse_buffers
+        self.pin_memory = pin_memory
+
+        # ready batches with the generation they were sampled in
+        self.queue = Queue(queue_size)
+        # increased by clear(), batches of older generations are dropped
+        self.generation = 0
+
+        # the queue, the batch being used and the batch being sampled each need their own buffers
+        self.buffers = None
+        self.next_buffer = 0
+
+        # signalled by notify() and stop(), the thread waits on it while the memory is empty
+        self.condition = Condition()
+
+        self.error = None
+        self.running = False
+        self.thread = None
+
+    def start(self) -> None:
+        """
+        Start the background thread. Called automatically by the first get().
+        """
+
+        if self.running:
+            return
+
+        self.running = True
+
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def get(self) -> ExperienceBatch:
+        """
+        Return the next ready batch, waiting for it if there is none.
+
+        Returns:
+            ExperienceBatch: A batch of random experiences.
+        """
+
+        if not self.running:
+            self.start()
+
+        while True:
+            self._raise_error()
+
+            try:
+                generation, batch = self.queue.get(timeout=0.1)
+            except Empty:
+                continue
+
+            if generation == self.generation:
+                return batch
+
+    def notify(self) -> None:
+        """
+        Wake up the background thread if it waits for the first experiences. Should be called after experiences were
+        added to the memory.
+        """
+
+        with self.condition:
+            self.condition.notify_all()
+
+    def clear(self) -> None:
+        """
+        Drop the ready batches, e.g. after the memory was restored from a checkpoint.
+        """
+
+        self.generation += 1
+
+        while True:
+            try:
+                self.queue.get_nowait()
+            except Empty:
+                return
+
+    def stop(self) -> None:
+        """
+        Stop the background thread and drop the ready batches.
+        """
+
+        if not self.running:
+            return
+
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+        self.thread.join()
+        self.thread = None
+
+        self.clear()
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            error = self.error
+            self.error = None
+            self.running = False
+
+            raise error
+
+    def _allocate_buffers(self, batch_size: int) -> None:
+        """
+        Allocate the ring of reused batches.
+
+        Args:
+            batch_size (int): Number of experiences in a batch.
+        """
+
+        memory = self.replay_memory
+
+        def allocate(field):
+            return empty((batch_size, *field.shape[1:]), dtype=field.dtype, pin_memory=self.pin_memory)
+
+        self.buffers = [
+            ExperienceBatch.from_tensors(
+                allocate(memory.states),
+                allocate(memory.actions),
+                allocate(memory.rewards),
+                allocate(memory.next_states),
+                allocate(memory.non_terminal),
+                allocate(memory.steps)
+            )
+            for _ in range(self.queue_size + 2)
+        ]
+
+    def _sample(self) -> ExperienceBatch:
+        """
+        Sample a batch from the memory.
+
+        Returns:
+            ExperienceBatch: The sampled batch.
+        """
+
+        memory = self.replay_memory
+
+        with self.lock:
+            if not self.reuse_buffers:
+                return memory.sample_batch()
+
+            indices = memory.sample_indices(memory.batch_size)
+
+            # a memory smaller than the batch size returns fewer experiences, they don't fit the buffers
+            if len(indices) != memory.batch_size:
+                return memory.get_batch(indices)
+
+            if self.buffers is None:
+                self._allocate_buffers(memory.batch_size)
+
+            out = self.buffers[self.next_buffer]
+            self.next_buffer = (self.next_buffer + 1) % len(self.buffers)
+
+            return memory.get_batch(indices, out)
+
+    def _run(self) -> None:
+        try:
+            while self.running:
+                # wait for the first experiences, the timeout covers experiences added without a notify()
+                if len(self.replay_memory) == 0:
+                    with self.condition:
+                        self.condition.wait_for(lambda: len(self.replay_memory) > 0 or not self.running, timeout=0.1)
+
+                    continue
+
+                generation = self.generation
+                batch = self._sample()
+
+                # the put is retried, so that stop() isn't blocked by a full queue
+                while self.running:
+                    try:
+                        self.queue.put((generation, batch), timeout=0.1)
+                        break
+                    except Full:
+                        continue
+        except Exception as error:
+            self.error = error
@@ -0,0 +1,253 @@
+from numpy import ndarray, zeros, argmax, fromiter, asarray, unique, bincount, float32, int64
+from torch import from_numpy
+
+from the_great_library_of_rl.q_learning.q_table import QTable, state_keys
+
+
+class DenseQTable(QTable):
+    """
+    Q-table that keeps the q-values in a single growable 2-D float32 array. Every registered state is mapped to a
+    row of the array through an index, so a state costs 4 bytes per action plus its index entry instead of a list of
+    Python floats. See: QTable
+
+    Args:
+        num_of_actions (int): Number of possible actions in every state.
+        learning_rate (float): Learning rate for updating the q-values.
+        gamma (float): Decay rate for future rewards.
+        initial_capacity (int, optional): Number of rows to allocate up front. The array doubles in size whenever it
+            runs out of rows. Default: 1024
+    """
+
+    def __init__(self, num_of_actions: int, learning_rate: float, gamma: float, initial_capacity: int = 1024):
+        super().__init__(num_of_actions, learning_rate, gamma)
+
+        # maps states to rows of the table
+        self.index = {}
+        self.num_of_states = 0
+
+        # table to store the q-values, one row per state
+        self.table = zeros((max(1, initial_capacity), num_of_actions), dtype=float32)
+
+        # returned for non-registered states
+        self.zero_q_values = zeros(num_of_actions, dtype=float32)
+        self.zero_q_values.setflags(write=False)
+
+    def _grow(self) -> None:
+        """
+        Double the number of rows of the table.
+        """
+
+        table = zeros((max(1, 2 * len(self.table)), self.num_of_actions), dtype=float32)
+        table[:self.num_of_states] = self.table[:self.num_of_states]
+
+        self.table = table
+
+    def get_q_values(self, state) -> ndarray:
+        """
+        Return the q-values for a given state. Return zeros for non-registered states.
+
+        Args:
+            state: State of the environment.
+
+        Returns:
+            ndarray: Q-values for a given state.
+        """
+
+        row = self.index.get(state)
+
+        # check if information about the state exists
+        if row is None:
+            return self.zero_q_values
+
+        return self.table[row]
+
+    def get_action(self, state) -> int:
+        """
+        Return the best action given a state.
+
+        Args:
+            state: State of the environment.
+
+        Returns:
+            int: Best action according to the agent.
+        """
+
+        return int(argmax(self.get_q_values(state)))
+
+    def get_actions(self, states) -> ndarray:
+        """
+        Return the best actions for a batch of states using a single gather from the table. The states are converted
+        to keys like in update_q_values().
+
+        Args:
+            states: Batch of states of the environment.
+
+        Returns:
+            ndarray: Best action for every state according to the agent.
+        """
+
+        states = state_keys(states)
+
+        rows = fromiter((self.index.get(state, -1) for state in states), dtype=int64, count=len(states))
+        q_values = self.table[rows]
+
+        # non-registered states have zero q-values
+        q_values[rows < 0] = 0
+
+        return argmax(q_values, axis=1)
+
+    def register_state(self, state, check_if_exists: bool = True) -> int:
+        """
+        Add a new state to the table.
+
+        Args:
+            state: State of the environment.
+            check_if_exists (bool, optional): Check if the state already exists before editing the table. Default: True
+
+        Returns:
+            int: Row of the state in the table.
+        """
+
+        if check_if_exists:
+            row = self.index.get(state)
+
+            if row is not None:
+                return row
+
+        if self.num_of_states == len(self.table):
+            self._grow()
+
+        row = self.num_of_states
+        self.index[state] = row
+        self.num_of_states += 1
+
+        return row
+
+    def state_exists(self, state) -> bool:
+        """
+        Check if the state is registered in the table.
+
+        Args:
+            state: State of the environment.
+
+        Returns:
+            bool: True if the state exists, False otherwise.
+        """
+
+        return state in self.index
+
+    def get_q_value(self, state, action: int) -> float:
+        """
+        Return the q-value for a state/action pair.
+
+        Args:
+            state: State of the environment.
+            action (int): Action to evaluate in the given state.
+
+        Returns:
+            float: Q-value of the state/action pair. 0 if the state is not registered in the table.
+        """
+
+        return float(self.get_q_values(state)[action])
+
+    def get_max_q_value(self, state) -> float:
+        """
+        Get the maximum q-value for a given state.
+
+        Args:
+            state: State of the environment.
+
+        Returns:
+            float: Q-value of the best action.
+        """
+
+        return float(self.get_q_values(state).max())
+
+    def update_q_value(self, state, action: int, reward: float, next_state, non_terminal: bool):
+        """
+        Update the q-value in the table.
+
+        Args:
+            state: State of the environment.
+            action (int): Action taken in the state.
+            reward (float): Reward experienced after taking the action.
+            next_state: State reached after taking the action.
+            non_terminal (bool): False if the environment ended (last state was reached), True otherwise.
+        """
+
+        # make sure that the state is registered
+        row = self.register_state(state)
+
+        # calculate the expected future reward by looking at the q-value for the next state
+        expected_future_reward = self.gamma * self.get_max_q_value(next_state) if non_terminal else 0
+
+        # move the q-value towards the target by the learning rate
+        self.table[row, action] += self.learning_rate * (reward + expected_future_reward - self.table[row, action])
+
+    def update_q_values(self, states, actions, rewards, next_states, non_terminal) -> None:
+        """
+        Update the q-values with a batch of transitions at once. All targets are computed from the q-values before
+        the batch and the transitions with the same state and action are averaged into one update, so the result can
+        differ slightly from updating with the transitions one by one.
+
+        Args:
+            states: Batch of states of the environment.
+            actions: Actions taken in the states.
+            rewards: Rewards experienced after taking the actions.
+            next_states: States reached after taking the actions.
+            non_terminal: False for the transitions that ended the environment, True otherwise.
+        """
+
+        # registering needs the states as the same keys as in update_q_value()
+        states = state_keys(states)
+        next_states = state_keys(next_states)
+
+        rows = fromiter((self.register_state(state) for state in states), dtype=int64, count=len(states))
+        actions = asarray(actions, dtype=int64)
+
+        next_rows = fromiter((self.index.get(state, -1) for state in next_states), dtype=int64,
+                             count=len(next_states))
+        next_max = self.table[next_rows].max(axis=1)
+
+        # non-registered states have zero q-values
+        next_max[next_rows < 0] = 0
+
+        targets = asarray(rewards, dtype=float32) + self.gamma * next_max * asarray(non_terminal, dtype=float32)
+        errors = targets - self.table[rows, actions]
+
+        # average the errors of repeated state/action pairs, adding them up would overshoot the targets
+        pairs, inverse, counts = unique(rows * self.num_of_actions + actions, return_inverse=True, return_counts=True)
+        mean_errors = bincount(inverse, weights=errors) / counts
+
+        self.table[pairs // self.num_of_actions, pairs % self.num_of_actions] += self.learning_rate * mean_errors
+
+    def state_dict(self) -> dict:
+        """
+        Return the state of the agent, e.g. for a checkpoint. The q-values of all registered states are returned as
+        one contiguous tensor (a view of the table), the states in the order of their rows.
+
+        Returns:
+            dict: State of the agent.
+        """
+
+        return {
+            "states": list(self.index),
+            "q_values": from_numpy(self.table[:self.num_of_states])
+        }
+
+    def load_state_dict(self, state_dict: dict) -> None:
+        """
+        Restore the agent from a state returned by state_dict().
+
+        Args:
+            state_dict (dict): State of the agent.
+        """
+
+        states = state_dict["states"]
+        q_values = state_dict["q_values"]
+
+        self.index = {state: row for row, state in enumerate(states)}
+        self.num_of_states = len(states)
+
+        self.table = zeros((max(len(self.table), self.num_of_states), self.num_of_actions), dtype=float32)
+        self.table[:self.num_of_states] = q_values.numpy()
@@ -1,29 +1,142 @@
-from torch import Tensor, argmax, tensor, arange
+from contextlib import nullcontext
+from copy import deepcopy
+from threading import Lock
+
+from torch import Tensor, argmax, tensor, arange, as_tensor, no_grad
 from torch import max as torch_max
 from torch.nn.functional import mse_loss
-from torch import float as torch_float
+from torch import float as torch_float, long as torch_long
 
+from the_great_library_of_rl.instrumentation import Instrumentation, NullInstrumentation
 from the_great_library_of_rl.neural_network import NeuralNetwork
+from the_great_library_of_rl.performance_config import PerformanceConfig
 from the_great_library_of_rl.q_learning import QAgent
-from the_great_library_of_rl.q_learning.replay_memory import Experience, ReplayMemory
+from the_great_library_of_rl.q_learning.acting_network import ActingNetwork
+from the_great_library_of_rl.q_learning.async_learner import AsyncLearner
+from the_great_library_of_rl.q_learning.batch_prefetcher import BatchPrefetcher
+from the_great_library_of_rl.q_learning.n_step_accumulator import NStepAccumulator
+from the_great_library_of_rl.q_learning.replay_memory import Experience, ExperienceBatch, ReplayMemory
 
 
 class DQN(QAgent):
     """
     Q-Learning agent using neural networks to approximate Q-values for a given state.
 
+    The target q-values are always computed without tracking gradients. They can be computed by a separate target
+    network, a copy of the network that is synchronized either every few updates (hard update) or a little after
+    every update (soft/Polyak update).
+
     Args:
         network (NeuralNetwork): Neural network to use.
         gamma (float): Decay rate for future rewards.
+        replay_memory (ReplayMemory, optional): Memory to sample the experiences from. The agent learns from every
+            experience as it comes if None. Default: None
+        target_update_steps (int, optional): Use a target network and copy the network's parameters into it every
+            target_update_steps updates. Default: None
+        target_update_tau (float, optional): Use a target network and move its parameters towards the network's
+            parameters by this fraction after every update. Overrides target_update_steps. Default: None
+        double_dqn (bool, optional): Choose the best next action with the network, but evaluate it with the target
+            network (https://arxiv.org/abs/1509.06461). Requires a target network (target_update_steps or
+            target_update_tau). Default: False
+        acting_mode (str, optional): How the network runs when choosing actions. One of "eager", "trace", "compile"
+            or "frozen" (see: ActingNetwork). Default: "eager"
+        acting_refresh_steps (int, optional): Number of updates after which a frozen acting network is rebuilt.
+            Default: 100
+        reuse_forward_passes (bool, optional): Only without a replay memory. Keep the q-values computed when choosing
+            an action (with gradients) and reuse them in the update as long as the parameters haven't changed since.
+            They are reused as the current q-values in a regular Trainer and as the next state's q-values (when there
+            is no target network) in a Trainer with pipelined updates. Default: False
+        n_step (int, optional): Learn from n-step returns, bootstrapping from the state n steps later discounted by
+            gamma ** n (see: NStepAccumulator). The transitions of a batch update are accumulated per row, so every
+            row must always come from the same copy of the environment (as in VectorTrainer). Default: 1
+        gradient_steps (int, optional): Number of gradient steps run every update_after_episodes environment steps
+            of the replay memory. The replay ratio (gradient steps per environment step) is
+            gradient_steps / update_after_episodes. Default: 1
+        asynchronous_learning (bool, optional): Only with a replay memory. Run the sampling and the gradient steps in
+            a background thread (see: AsyncLearner), so that they overlap with stepping the environment. Actions are
+            then chosen by a copy of the network that receives the new weights after every batch of gradient steps.
+            The background thread runs until close() is called. Default: False
+        max_learner_lag (int, optional): Number of scheduled batches of gradient steps the background learner may
+            fall behind before the environment stepping waits for it. Never waits if None. Default: 1
+        performance (PerformanceConfig, optional): CPU performance settings of the updates (thread counts, reduced
+            precision, memory format, gradient zeroing). Default: None
+        prefetch_batches (int, optional): Only with a replay memory. Number of batches sampled ahead in a background
+            thread (see: BatchPrefetcher), so that an update only pops a ready batch. The thread runs until close() is
+            called. No prefetching if 0. Default: 0
+        reuse_batch_buffers (bool, optional): Gather the prefetched batches into reused tensors instead of allocating
+            new ones. Requires a TensorReplayMemory (or a subclass). Default: False
     """
 
-    def __init__(self, network: NeuralNetwork, gamma: float, replay_memory: ReplayMemory = None):
+    def __init__(self, network: NeuralNetwork, gamma: float, replay_memory: ReplayMemory = None,
+                 target_update_steps: int = None, target_update_tau: float = None, double_dqn: bool = False,
+                 acting_mode: str = "eager", acting_refresh_steps: int = 100, reuse_forward_passes: bool = False,
+                 n_step: int = 1, gradient_steps: int = 1, asynchronous_learning: bool = False,
+                 max_learner_lag: int = 1, performance: PerformanceConfig = None, prefetch_batches: int = 0,
+                 reuse_batch_buffers: bool = False):
+        if asynchronous_learning and replay_memory is None:
+            raise ValueError("Asynchronous learning requires a replay memory")
+
+        if prefetch_batches > 0 and replay_memory is None:
+            raise ValueError("Prefetching batches requires a replay memory")
+
+        if double_dqn and target_update_steps is None and target_update_tau is None:
+            raise ValueError("Double DQN requires a target network (target_update_steps or target_update_tau)")
+
+        # the network is converted before it's copied into the target and acting networks
+        self.performance = PerformanceConfig() if performance is None else performance
+        self.performance.apply(network)
+
         self.network = network
         self.gamma = gamma
         self.replay_memory = replay_memory
 
-        # number of elapsed episodes (counted in the update method)
-        self._episode = 0
+        self.target_update_steps = target_update_steps
+        self.target_update_tau = target_update_tau
+        self.double_dqn = double_dqn
+
+        self.target_network = None
+        if target_update_steps is not None or target_update_tau is not None:
+            self.target_network = deepcopy(network)
+            self.target_network.requires_grad_(False)
+
+        self.gradient_steps = gradient_steps
+        self.asynchronous_learning = asynchronous_learning
+
+        # the network is updated by the background learner, so the actions are chosen by a copy of it
+        acting_weights = deepcopy(network).requires_grad_(False) if asynchronous_learning else network
+
+        # network used only for choosing actions
+        self.acting_network = ActingNetwork(acting_weights, acting_mode, acting_refresh_steps)
+
+        # guard the state shared with the background threads (no-ops without them)
+        self.memory_lock = Lock() if asynchronous_learning or prefetch_batches > 0 else nullcontext()
+        self.acting_lock = Lock() if asynchronous_learning else nullcontext()
+
+        self.learner = None
+        if asynchronous_learning:
+            self.learner = AsyncLearner(self._learn_in_background, max_learner_lag)
+
+        self.prefetcher = None
+        if prefetch_batches > 0:
+            self.prefetcher = BatchPrefetcher(replay_memory, self.memory_lock, prefetch_batches, reuse_batch_buffers)
+
+        self.reuse_forward_passes = reuse_forward_passes
+        # last forward pass made when choosing an action: (state, number of updates at the time, q-values)
+        self._forward_cache = None
+
+        self.n_step = n_step
+        # accumulator for update_q_value() and one accumulator per row for update_q_values()
+        self.n_step_accumulator = NStepAccumulator(n_step, gamma) if n_step > 1 else None
+        self.batch_n_step_accumulators = []
+
+        # number of elapsed environment steps (counted in the update methods)
+        self._steps = 0
+        # number of parameter updates
+        self._updates = 0
+        # loss of the last parameter update (detached, converted to a float only when asked for)
+        self._last_loss = None
+
+        self.instrumentation = NullInstrumentation()
 
     def get_q_values(self, state: Tensor) -> Tensor:
         """
@@ -49,7 +162,32 @@ class DQN(QAgent):
             int: Best action according to the agent.
         """
 
-        return argmax(self.get_q_values(state)).item()
+        if self.reuse_forward_passes and self.replay_memory is None:
+            q_values = self._get_cached_q_values(state)
+
+            if q_values is None:
+                q_values = self.get_q_values(state)
+                self._forward_cache = (state, self._updates, q_values)
+
+            return argmax(q_values.detach()).item()
+
+        with self.acting_lock:
+            return argmax(self.acting_network.forward(state)).item()
+
+    def get_actions(self, states: Tensor) -> Tensor:
+        """
+        Return the best actions for a batch of states using a single forward pass.
+
+        Args:
+            states (Tensor): Batch of states of the environment.
+
+        Returns:
+            Tensor: Best action for every state according to the agent.
+        """
+
+        # the actions are cloned out of inference mode, so that they can be used in updates
+        with self.acting_lock:
+            return argmax(self.acting_network.forward(states), dim=-1).clone()
 
     def get_q_value(self, state, action: int) -> float:
         """
@@ -90,39 +228,450 @@ class DQN(QAgent):
             non_terminal (bool): False if the environment ended (last state was reached), True otherwise.
         """
 
-        self._episode += 1
+        self._steps += 1
+
+        if self.n_step_accumulator is None:
+            experiences = (Experience(state, action, reward, next_state, non_terminal),)
+        else:
+            experiences = self.n_step_accumulator.add(state, action, reward, next_state, non_terminal)
 
         # update without a replay memory
         if self.replay_memory is None:
-            # OPTIMIZATION NOTE: In some cases the Q value could be reused from the trainer instead
-            #                    of being recalculated
-            q = self.get_q_values(state)[action]
-            target_q = reward + self.gamma * self.get_max_q_value(next_state) if non_terminal else 0
+            for e in experiences:
+                self._learn_from_experience(e)
 
-            optimizer = self.network.get_optimizer()
+            return
 
-            optimizer.zero_grad()
-            loss = mse_loss(q, target_q)
-            loss.backward()
-            optimizer.step()
+        with self.memory_lock:
+            for e in experiences:
+                self.replay_memory.add_experience(e)
+
+        if self.prefetcher is not None:
+            self.prefetcher.notify()
+
+        self.instrumentation.lap("replay_add")
+
+        if self._steps % self.replay_memory.update_after_episodes == 0:
+            self._schedule_updates(1)
+
+    def update_q_values(self, states: Tensor, actions, rewards, next_states: Tensor, non_terminal) -> None:
+        """
+        Add a batch of experiences to the replay memory and run as many parameter updates as the replay memory
+        schedules for that many steps. Without a replay memory, the parameters are updated once on the whole batch.
+
+        Args:
+            states (Tensor): Batch of states of the environment.
+            actions: Actions taken by the agent.
+            rewards: Received/Observed rewards.
+            next_states (Tensor): New states after taking the actions.
+            non_terminal: False for the experiences that ended the environment, True otherwise.
+        """
+
+        actions = as_tensor(actions, dtype=torch_long)
+        rewards = as_tensor(rewards, dtype=torch_float)
+        non_terminal = as_tensor(non_terminal, dtype=torch_float)
+
+        if self.n_step_accumulator is None:
+            batch = ExperienceBatch.from_tensors(states, actions, rewards, next_states, non_terminal)
+        else:
+            batch = self._accumulate_batch(states, actions, rewards, next_states, non_terminal)
+
+        count = len(states)
+        previous_steps = self._steps
+        self._steps += count
+
+        # update without a replay memory
+        if self.replay_memory is None:
+            if batch is not None:
+                self.learn_from_batch(batch)
+                self.instrumentation.lap("learn")
 
             return
 
-        experience = Experience(state, action, reward, next_state, non_terminal)
-        self.replay_memory.add_experience(experience)
+        if batch is not None:
+            with self.memory_lock:
+                self.replay_memory.add_experience_batch(batch)
+
+            if self.prefetcher is not None:
+                self.prefetcher.notify()
+
+            self.instrumentation.lap("replay_add")
+
+        # number of times the update interval was crossed by this batch
+        update_after_episodes = self.replay_memory.update_after_episodes
+        updates = self._steps // update_after_episodes - previous_steps // update_after_episodes
+
+        if updates > 0:
+            self._schedule_updates(updates)
+
+    def learn_from_batch(self, batch: ExperienceBatch) -> None:
+        """
+        Update the DQN's parameters with one gradient step on a batch of experiences.
+
+        Args:
+            batch (ExperienceBatch): Batch of experiences to learn from.
+        """
 
-        if self._episode % self.replay_memory.update_after_episodes == 0:
-            batch = self.replay_memory.sample_batch()
+        states = self.performance.format_batch(batch.states)
+        next_states = self.performance.format_batch(batch.next_states)
 
+        with self.performance.autocast():
             # note: PyTorch's arange() works like range(), it is used in this case to select all q-values
             # and select the q-value for the taken action with batch.actions
-            q = self.get_q_values(batch.states)[arange(len(batch.states)), batch.actions]
+            q = self.get_q_values(states)[arange(len(states)), batch.actions]
+            # n-step experiences bootstrap from a state further ahead, so it is discounted more
+            discounts = self.gamma ** batch.steps
+
             # OPTIMIZATION NOTE: the future rewards are calculated even from non-terminal states
-            target_q = batch.rewards + self.gamma * self.get_max_q_value(batch.next_states) * batch.non_terminal
+            target_q = batch.rewards + discounts * self.get_target_max_q_value(next_states) * batch.non_terminal
+
+            if batch.weights is None:
+                loss = mse_loss(q, target_q)
+            else:
+                # prioritized memory, correct the sampling bias with the importance-sampling weights
+                loss = (batch.weights * (q - target_q) ** 2).mean()
+
+        self._optimize(loss)
+
+        # feed the errors back to the memory so that it can update the priorities
+        if batch.indices is not None:
+            with self.memory_lock:
+                self.replay_memory.update_priorities(batch.indices, target_q - q)
+
+    def get_update_count(self) -> int:
+        """
+        Return the number of parameter updates made so far.
+
+        Returns:
+            int: Number of updates.
+        """
+
+        return self._updates
+
+    def get_last_loss(self) -> float | None:
+        """
+        Return the loss of the last parameter update.
+
+        Returns:
+            float | None: The last loss. None if there was no update yet.
+        """
+
+        return None if self._last_loss is None else self._last_loss.item()
+
+    def set_instrumentation(self, instrumentation: Instrumentation) -> None:
+        """
+        Set the instrumentation used to measure the replay memory and learning phases of the updates.
+
+        Args:
+            instrumentation (Instrumentation): Instrumentation of the current run.
+        """
 
-            optimizer = self.network.get_optimizer()
+        self.instrumentation = instrumentation
+
+    def state_dict(self) -> dict:
+        """
+        Return the complete training state of the agent (network, optimizer, target network, counters and the
+        replay memory), e.g. for a checkpoint. The tensors are not copied. Waits for the background learner to finish
+        its updates first.
+
+        Returns:
+            dict: State of the agent.
+        """
+
+        self.wait_for_updates()
+
+        return {
+            "network": self.network.state_dict(),
+            "optimizer": self.network.get_optimizer().state_dict(),
+            "target_network": None if self.target_network is None else self.target_network.state_dict(),
+            "steps": self._steps,
+            "updates": self._updates,
+            "replay_memory": None if self.replay_memory is None else self.replay_memory.state_dict()
+        }
+
+    def load_state_dict(self, state_dict: dict) -> None:
+        """
+        Restore the agent from a state returned by state_dict().
+
+        Args:
+            state_dict (dict): State of the agent.
+        """
+
+        self.wait_for_updates()
+
+        self.network.load_state_dict(state_dict["network"])
+        self.network.get_optimizer().load_state_dict(state_dict["optimizer"])
+
+        if self.target_network is not None:
+            # a checkpoint without a target network starts it from the restored network
+            target_state_dict = state_dict["target_network"]
+            self.target_network.load_state_dict(
+                state_dict["network"] if target_state_dict is None else target_state_dict
+            )
+
+        if self.replay_memory is not None and state_dict["replay_memory"] is not None:
+            with self.memory_lock:
+                self.replay_memory.load_state_dict(state_dict["replay_memory"])
+
+            # the ready batches were sampled from the replaced experiences
+            if self.prefetcher is not None:
+                self.prefetcher.clear()
+                self.prefetcher.notify()
+
+        self._steps = state_dict["steps"]
+        self._updates = state_dict["updates"]
+        self._forward_cache = None
+
+        # the transitions waiting for their n-step returns belong to the interrupted run
+        if self.n_step_accumulator is not None:
+            self.n_step_accumulator.reset()
+        self.batch_n_step_accumulators = []
+
+        with self.acting_lock:
+            if self.asynchronous_learning:
+                self.acting_network.network.load_state_dict(self.network.state_dict())
+
+            self.acting_network.reset()
+
+    def get_target_max_q_value(self, state) -> Tensor:
+        """
+        Get the maximum q-value for a given state as used in the update targets. Uses the target network if there is
+        one and never tracks gradients.
+
+        Args:
+            state: State of the environment.
+
+        Returns:
+            Tensor: Target q-value of the best action.
+        """
+
+        if self.target_network is None:
+            # reuse the q-values from choosing an action in this state if the parameters haven't changed since
+            q_values = self._get_cached_q_values(state)
+
+            if q_values is not None:
+                return torch_max(q_values.detach(), dim=-1).values
+
+        target_network = self.network if self.target_network is None else self.target_network
+
+        with no_grad():
+            if not self.double_dqn:
+                return torch_max(target_network.forward(state), dim=-1).values
+
+            # pick the action with the network, evaluate it with the target network
+            best_actions = argmax(self.network.forward(state), dim=-1, keepdim=True)
+            return target_network.forward(state).gather(-1, best_actions).squeeze(-1)
+
+    def _learn_from_experience(self, e: Experience) -> None:
+        """
+        Update the DQN's parameters with one gradient step on a single experience.
+
+        Args:
+            e (Experience): Experience to learn from.
+        """
+
+        with self.performance.autocast():
+            # reuse the q-values from choosing the action if the parameters haven't changed since
+            q_values = self._get_cached_q_values(e.state)
+            if q_values is None:
+                q_values = self.get_q_values(e.state)
+
+            q = q_values[e.action]
+            target_q = tensor(float(e.reward))
+
+            if e.non_terminal:
+                target_q = target_q + self.gamma ** e.steps * self.get_target_max_q_value(e.next_state)
 
-            optimizer.zero_grad()
             loss = mse_loss(q, target_q)
-            loss.backward()
-            optimizer.step()
+
+        self._optimize(loss)
+        self.instrumentation.lap("learn")
+
+    def _accumulate_batch(self, states: Tensor, actions: Tensor, rewards: Tensor, next_states: Tensor,
+                          non_terminal: Tensor) -> ExperienceBatch | None:
+        """
+        Add a batch of transitions to the n-step accumulators, one accumulator per row.
+
+        Args:
+            states (Tensor): Batch of states of the environment.
+            actions (Tensor): Actions taken by the agent.
+            rewards (Tensor): Received/Observed rewards.
+            next_states (Tensor): New states after taking the actions.
+            non_terminal (Tensor): 0 for the transitions that ended the environment, 1 otherwise.
+
+        Returns:
+            ExperienceBatch | None: The completed n-step experiences. None if no experience was completed.
+        """
+
+        while len(self.batch_n_step_accumulators) < len(states):
+            self.batch_n_step_accumulators.append(NStepAccumulator(self.n_step, self.gamma))
+
+        experiences = []
+
+        for i, (action, reward, flag) in enumerate(zip(actions.tolist(), rewards.tolist(), non_terminal.tolist())):
+            experiences.extend(
+                self.batch_n_step_accumulators[i].add(states[i], action, reward, next_states[i], flag != 0)
+            )
+
+        if not experiences:
+            return None
+
+        return ExperienceBatch(experiences)
+
+    def wait_for_updates(self) -> None:
+        """
+        Wait until the background learner finished all scheduled updates. Returns immediately without asynchronous
+        learning.
+        """
+
+        if self.learner is not None:
+            self.learner.wait()
+
+    def close(self) -> None:
+        """
+        Finish the scheduled updates and stop the background learner and the batch prefetcher. Must be called when
+        the agent is no longer trained with asynchronous learning or prefetching, otherwise their threads keep
+        running until the process exits. The agent can still be trained afterwards, the threads are started again
+        when they are needed.
+        """
+
+        if self.learner is not None:
+            self.learner.stop()
+
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+
+    def _schedule_updates(self, count: int) -> None:
+        """
+        Run the given number of scheduled updates (each made of gradient_steps gradient steps) now or hand them to
+        the background learner.
+
+        Args:
+            count (int): Number of scheduled updates.
+        """
+
+        if self.learner is not None:
+            self.learner.trigger(count)
+            self.instrumentation.lap("learner_wait")
+            return
+
+        for _ in range(count * self.gradient_steps):
+            self.learn_from_memory()
+
+    def learn_from_memory(self) -> None:
+        """
+        Sample a batch from the replay memory and learn from it with one gradient step. Does nothing while the memory
+        is empty.
+        """
+
+        # with n-step returns the first experiences are completed only after n steps
+        if len(self.replay_memory) == 0:
+            return
+
+        batch = self._sample_batch()
+        self.instrumentation.lap("replay_sampling")
+
+        self.learn_from_batch(batch)
+        self.instrumentation.lap("learn")
+
+    def _sample_batch(self) -> ExperienceBatch:
+        """
+        Return a batch of experiences, either a prefetched one or a newly sampled one.
+
+        Returns:
+            ExperienceBatch: A batch of random experiences.
+        """
+
+        if self.prefetcher is not None:
+            return self.prefetcher.get()
+
+        with self.memory_lock:
+            return self.replay_memory.sample_batch()
+
+    def _learn_in_background(self) -> None:
+        """
+        Run one scheduled update in the background learner and hand the new weights to the acting network.
+        """
+
+        for _ in range(self.gradient_steps):
+            if len(self.replay_memory) == 0:
+                return
+
+            self.learn_from_batch(self._sample_batch())
+
+        with self.acting_lock:
+            with no_grad():
+                for acting_param, param in zip(self.acting_network.network.parameters(), self.network.parameters()):
+                    acting_param.copy_(param)
+
+                for acting_buffer, buffer in zip(self.acting_network.network.buffers(), self.network.buffers()):
+                    acting_buffer.copy_(buffer)
+
+            for _ in range(self.gradient_steps):
+                self.acting_network.notify_update()
+
+    def _get_cached_q_values(self, state) -> Tensor | None:
+        """
+        Return the q-values computed when choosing an action in the given state, if they are still valid.
+
+        Args:
+            state: State of the environment. Must be the same object that was passed to get_action().
+
+        Returns:
+            Tensor | None: The q-values (with gradients), None if they weren't computed or the parameters changed.
+        """
+
+        if self._forward_cache is None:
+            return None
+
+        cached_state, updates, q_values = self._forward_cache
+
+        if cached_state is not state or updates != self._updates:
+            return None
+
+        return q_values
+
+    def _optimize(self, loss: Tensor) -> None:
+        """
+        Take one optimizer step to minimize the loss and synchronize the target network.
+
+        Args:
+            loss (Tensor): Loss to minimize.
+        """
+
+        optimizer = self.network.get_optimizer()
+
+        optimizer.zero_grad(set_to_none=self.performance.set_to_none)
+        loss.backward()
+        optimizer.step()
+
+        self._last_loss = loss.detach()
+        self._updates += 1
+        self._update_target_network()
+
+        # the background learner notifies the acting network when it hands over the new weights
+        if not self.asynchronous_learning:
+            self.acting_network.notify_update()
+
+    def _update_target_network(self) -> None:
+        """
+        Synchronize the target network with the network according to the configured schedule.
+        """
+
+        if self.target_network is None:
+            return
+
+        # soft update
+        if self.target_update_tau is not None:
+            with no_grad():
+                for target_param, param in zip(self.target_network.parameters(), self.network.parameters()):
+                    target_param.lerp_(param, self.target_update_tau)
+
+                for target_buffer, buffer in zip(self.target_network.buffers(), self.network.buffers()):
+                    target_buffer.copy_(buffer)
+
+            return
+
+        # hard update
+        if self._updates % self.target_update_steps == 0:
+            self.target_network.load_state_dict(self.network.state_dict())
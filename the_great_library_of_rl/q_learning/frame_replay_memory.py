@@ -0,0 +1,322 @@
+from collections import deque
+
+from torch import Tensor, as_tensor, empty, zeros, arange, randint, maximum, cat
+from torch import float as torch_float, long as torch_long, bool as torch_bool
+
+from the_great_library_of_rl.q_learning.replay_memory import Experience, ExperienceBatch, ReplayMemory
+
+
+class FrameReplayMemory(ReplayMemory):
+    """
+    Replay memory that stores every observation only once. Consecutive experiences share an observation (the next
+    state of one is the state of the next one), so the observations are kept in a ring buffer in the order they
+    happened and the next states are reconstructed when a batch is sampled. The observations are stored in the dtype
+    of the given states, so states from TensorGymnasiumEnvironment(dtype=None) keep e.g. the uint8 of the pixels.
+
+    With frame stacking, the states are expected to be stacks of the last frame_stack frames along the first
+    dimension (e.g. from gymnasium's FrameStackObservation) and only the newest frame of every state is stored. The
+    stacks are rebuilt at sample time. Frames before the start of an episode are replaced by its first frame, like
+    FrameStackObservation(padding_type="reset") does.
+
+    The experiences must be added in the order they happened, one episode after another (as DQN does, including
+    n-step experiences). The terminal observation of every episode takes one extra slot of the memory.
+
+    Args:
+        capacity (int): Maximum number of stored observations. Exceeding it will overwrite the oldest records.
+        update_after_episodes (int): Number of environment steps until a parameter update.
+        batch_size (int): Number of experiences to sample.
+        frame_stack (int, optional): Number of frames stacked in every state. 1 stores the whole states. Default: 1
+    """
+
+    def __init__(self, capacity: int, update_after_episodes: int, batch_size: int, frame_stack: int = 1) -> None:
+        super().__init__(capacity, update_after_episodes, batch_size)
+
+        self.frame_stack = frame_stack
+
+        # one slot per observation, the experience fields belong to the experience starting in the slot
+        self.frames = None
+        self.actions = None
+        self.rewards = None
+        self.non_terminal = None
+        self.steps = None
+        # False for the slots holding only the terminal observation of an episode
+        self.is_transition = None
+        # absolute index of the first slot of the episode every slot belongs to
+        self.episode_starts = None
+
+        # number of slots ever written, slot i is stored at index i % capacity
+        self.total = 0
+        # number of transitions among the stored slots
+        self.transitions = 0
+        # absolute index of the first slot of the current episode
+        self.episode_start = 0
+        # absolute indices of the transitions whose next observation wasn't written yet, with the index of that slot
+        self.pending = deque()
+
+    def __len__(self) -> int:
+        # the oldest transitions can be missing the frames to stack, they are not sampled
+        oldest = max(0, self.total - self.capacity)
+        incomplete = 0
+
+        if self.frame_stack > 1 and oldest > 0:
+            indices = arange(oldest, min(oldest + self.frame_stack - 1, self.total))
+            slots = indices % self.capacity
+
+            # only transitions count, the terminal observations and the pending transitions are excluded already
+            complete = indices + self.steps[slots] < self.total
+            incomplete = int((self.is_transition[slots] & complete & ~self._can_sample(indices)).sum())
+
+        return max(0, self.transitions - len(self.pending) - incomplete)
+
+    def _allocate(self, frame: Tensor) -> None:
+        """
+        Allocate the storage for all slots.
+
+        Args:
+            frame (Tensor): Example frame used to determine the shape and dtype of the stored observations.
+        """
+
+        self.frames = empty((self.capacity, *frame.shape), dtype=frame.dtype)
+        self.actions = zeros(self.capacity, dtype=torch_long)
+        self.rewards = zeros(self.capacity, dtype=torch_float)
+        self.non_terminal = zeros(self.capacity, dtype=torch_float)
+        self.steps = zeros(self.capacity, dtype=torch_long)
+        self.is_transition = zeros(self.capacity, dtype=torch_bool)
+        self.episode_starts = zeros(self.capacity, dtype=torch_long)
+
+    def _get_frame(self, state) -> Tensor:
+        """
+        Return the part of a state that is stored.
+
+        Args:
+            state: State of the environment.
+
+        Returns:
+            Tensor: The newest frame with frame stacking, the whole state otherwise.
+        """
+
+        state = as_tensor(state)
+        return state[-1] if self.frame_stack > 1 else state
+
+    def _write_slot(self, frame: Tensor, e: Experience = None) -> None:
+        """
+        Write an observation into the next slot.
+
+        Args:
+            frame (Tensor): The observation.
+            e (Experience, optional): Experience starting with the observation. None for a terminal observation.
+                Default: None
+        """
+
+        if self.frames is None:
+            self._allocate(frame)
+
+        i = self.total % self.capacity
+
+        # the overwritten slot is forgotten
+        if self.total >= self.capacity and self.is_transition[i]:
+            self.transitions -= 1
+
+        self.frames[i] = frame
+        self.episode_starts[i] = self.episode_start
+        self.is_transition[i] = e is not None
+
+        if e is not None:
+            self.actions[i] = e.action
+            self.rewards[i] = e.reward
+            self.non_terminal[i] = 1 if e.non_terminal else 0
+            self.steps[i] = e.steps
+
+            self.transitions += 1
+            self.pending.append((self.total, self.total + e.steps))
+
+        self.total += 1
+
+        # the next observations of the waiting transitions are written in order
+        while self.pending and self.pending[0][1] < self.total:
+            self.pending.popleft()
+
+    def add_experience(self, e: Experience) -> None:
+        """
+        Add a new experience to the replay memory. The oldest records will be overwritten if the capacity is
+        exceeded.
+
+        Args:
+            e: Experience to add. Must directly follow the previously added experience.
+        """
+
+        self._write_slot(self._get_frame(e.state), e)
+
+        # the last experience of an episode (a terminal one-step experience) is followed by its terminal observation
+        if not e.non_terminal and e.steps == 1:
+            self._write_slot(self._get_frame(e.next_state))
+            self.episode_start = self.total
+
+    def add_experience_batch(self, batch: ExperienceBatch) -> None:
+        """
+        Not supported: the experiences of a batch come from different copies of the environment, but the memory
+        relies on the experiences following each other.
+
+        Args:
+            batch (ExperienceBatch): Experiences to add.
+        """
+
+        raise TypeError("FrameReplayMemory only supports experiences from a single environment")
+
+    def _can_sample(self, indices: Tensor) -> Tensor:
+        """
+        Check which slots hold experiences whose states and next states are stored.
+
+        Args:
+            indices (Tensor): Absolute indices of the slots.
+
+        Returns:
+            Tensor: Boolean Tensor, True for the slots that can be sampled.
+        """
+
+        slots = indices % self.capacity
+        oldest = max(0, self.total - self.capacity)
+        first_frames = maximum(indices - (self.frame_stack - 1), self.episode_starts[slots])
+
+        return self.is_transition[slots] & (indices + self.steps[slots] < self.total) & (first_frames >= oldest)
+
+    def _stack(self, indices: Tensor) -> Tensor:
+        """
+        Gather the states ending with the given slots.
+
+        Args:
+            indices (Tensor): Absolute indices of the slots.
+
+        Returns:
+            Tensor: The states, with the frames stacked along the second dimension if frame stacking is used.
+        """
+
+        if self.frame_stack == 1:
+            return self.frames[indices % self.capacity]
+
+        offsets = arange(self.frame_stack - 1, -1, -1)
+        starts = self.episode_starts[indices % self.capacity]
+
+        # the frames from before the episode are replaced by its first frame
+        frame_indices = maximum(indices[:, None] - offsets[None, :], starts[:, None])
+
+        return self.frames[frame_indices % self.capacity]
+
+    def sample_indices(self, batch_size: int) -> Tensor:
+        """
+        Return absolute indices of random experiences that can be sampled (random with replacement).
+
+        Args:
+            batch_size (int): Number of indices to sample.
+
+        Returns:
+            Tensor: Absolute indices of the sampled experiences.
+        """
+
+        oldest = max(0, self.total - self.capacity)
+        stored = self.total - oldest
+        indices = []
+        found = 0
+
+        # only a few slots can't be sampled (the terminal observations, the newest and the oldest experiences), so the
+        # invalid picks are simply drawn again
+        for _ in range(16):
+            candidates = oldest + randint(stored, (2 * batch_size,))
+            candidates = candidates[self._can_sample(candidates)]
+
+            indices.append(candidates)
+            found += len(candidates)
+
+            if found >= batch_size:
+                return cat(indices)[:batch_size]
+
+        # almost nothing can be sampled yet, pick from the complete list
+        candidates = arange(oldest, self.total)
+        candidates = candidates[self._can_sample(candidates)]
+
+        return candidates[randint(len(candidates), (batch_size,))]
+
+    def sample_batch(self, batch_size_overwrite: int = None) -> ExperienceBatch:
+        """
+        Return a batch of random experiences from the memory (random with replacement).
+
+        Args:
+            batch_size_overwrite (int): Number of experiences to sample. (Overwrites the object's batch size property.)
+
+        Returns:
+            ExperienceBatch: An object containing the batch of experiences.
+        """
+
+        batch_size = self.batch_size if batch_size_overwrite is None else batch_size_overwrite
+
+        indices = self.sample_indices(min(batch_size, len(self)))
+        slots = indices % self.capacity
+
+        return ExperienceBatch.from_tensors(
+            self._stack(indices),
+            self.actions[slots],
+            self.rewards[slots],
+            self._stack(indices + self.steps[slots]),
+            self.non_terminal[slots],
+            self.steps[slots]
+        )
+
+    def state_dict(self) -> dict:
+        """
+        Return the state of the memory, e.g. for a checkpoint. Every field is returned as a contiguous tensor.
+
+        Returns:
+            dict: State of the memory.
+        """
+
+        fields = None
+
+        if self.frames is not None:
+            size = min(self.total, self.capacity)
+
+            fields = {
+                "frames": self.frames[:size],
+                "actions": self.actions[:size],
+                "rewards": self.rewards[:size],
+                "non_terminal": self.non_terminal[:size],
+                "steps": self.steps[:size],
+                "is_transition": self.is_transition[:size],
+                "episode_starts": self.episode_starts[:size]
+            }
+
+        return {
+            "fields": fields,
+            "capacity": self.capacity,
+            "total": self.total,
+            "transitions": self.transitions,
+            "episode_start": self.episode_start,
+            "pending": list(self.pending)
+        }
+
+    def load_state_dict(self, state_dict: dict) -> None:
+        """
+        Restore the memory from a state returned by state_dict().
+
+        Args:
+            state_dict (dict): State of the memory.
+        """
+
+        # the slots are stored by their absolute index, which depends on the capacity
+        if state_dict["capacity"] != self.capacity:
+            raise ValueError(
+                f"The state was saved from a memory with a capacity of {state_dict['capacity']}, got {self.capacity}"
+            )
+
+        self.total = state_dict["total"]
+        self.transitions = state_dict["transitions"]
+        self.episode_start = state_dict["episode_start"]
+        self.pending = deque(state_dict["pending"])
+
+        fields = state_dict["fields"]
+        if fields is None:
+            return
+
+        self._allocate(fields["frames"][0])
+
+        for name, values in fields.items():
+            getattr(self, name)[:len(values)] = values
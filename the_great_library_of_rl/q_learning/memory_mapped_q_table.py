@@ -0,0 +1,293 @@
+import os
+import sqlite3
+
+from numpy import memmap, float32
+from torch import from_numpy
+
+from the_great_library_of_rl.q_learning.dense_q_table import DenseQTable
+
+
+def _plain_state(state):
+    """
+    Convert a state made of numpy or torch values (e.g. numpy.int64(5)) into plain Python values, so that equal states
+    have the same repr().
+
+    Args:
+        state: State of the environment.
+
+    Returns:
+        The state as Python scalars, sequences become tuples.
+    """
+
+    if hasattr(state, "tolist"):
+        state = state.tolist()
+
+    if isinstance(state, (list, tuple)):
+        return tuple(_plain_state(value) for value in state)
+
+    return state
+
+
+class PersistentStateIndex:
+    """
+    Mapping of states to rows stored in an SQLite database. Rows are looked up lazily and cached in memory, so
+    opening the index doesn't load it. New entries are written to the database when commit() is called.
+
+    States are identified by their repr(), so they must have a stable text representation (e.g. ints, strings or
+    tuples of them). Numpy and torch values are converted to Python values first, so numpy.int64(5) and 5 are the same
+    state.
+
+    Args:
+        path (str): Path to the database file. Created if it doesn't exist.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS states (key BLOB PRIMARY KEY, row INTEGER NOT NULL)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value INTEGER)")
+        self.connection.commit()
+
+        self.cache = {}
+        self.uncommitted = []
+        self.count = self.get_metadata("count", 0)
+
+    def get_metadata(self, name: str, default: int = None) -> int:
+        """
+        Return a stored metadata value.
+
+        Args:
+            name (str): Name of the value.
+            default (int, optional): Value returned if nothing is stored under the name. Default: None
+
+        Returns:
+            int: The stored value.
+        """
+
+        result = self.connection.execute("SELECT value FROM metadata WHERE name = ?", (name,)).fetchone()
+        return default if result is None else result[0]
+
+    def set_metadata(self, name: str, value: int) -> None:
+        """
+        Store a metadata value. The value is written with the next commit.
+
+        Args:
+            name (str): Name of the value.
+            value (int): Value to store.
+        """
+
+        self.connection.execute("INSERT OR REPLACE INTO metadata VALUES (?, ?)", (name, value))
+
+    def get(self, state, default=None):
+        state = _plain_state(state)
+        row = self.cache.get(state)
+
+        if row is not None:
+            return row
+
+        result = self.connection.execute("SELECT row FROM states WHERE key = ?", (repr(state).encode(),)).fetchone()
+
+        if result is None:
+            return default
+
+        self.cache[state] = result[0]
+        return result[0]
+
+    def __contains__(self, state) -> bool:
+        return self.get(state) is not None
+
+    def __setitem__(self, state, row: int) -> None:
+        state = _plain_state(state)
+        self.cache[state] = row
+        self.uncommitted.append((repr(state).encode(), row))
+        self.count = max(self.count, row + 1)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def commit(self) -> None:
+        """
+        Write the new entries to the database.
+        """
+
+        self.connection.executemany("INSERT OR REPLACE INTO states VALUES (?, ?)", self.uncommitted)
+        self.uncommitted = []
+
+        self.set_metadata("count", self.count)
+        self.connection.commit()
+
+    def get_keys(self) -> list[bytes]:
+        """
+        Commit the new entries and return the stored keys in the order of their rows.
+
+        Returns:
+            list[bytes]: Encoded states, one per row.
+        """
+
+        self.commit()
+        return [key for key, in self.connection.execute("SELECT key FROM states ORDER BY row")]
+
+    def set_keys(self, keys: list[bytes]) -> None:
+        """
+        Replace all entries with the given keys, the n-th key is mapped to the n-th row.
+
+        Args:
+            keys (list[bytes]): Encoded states, one per row (see: get_keys).
+        """
+
+        self.connection.execute("DELETE FROM states")
+        self.connection.executemany("INSERT INTO states VALUES (?, ?)", ((key, row) for row, key in enumerate(keys)))
+
+        self.cache = {}
+        self.uncommitted = []
+        self.count = len(keys)
+
+        self.commit()
+
+    def close(self) -> None:
+        """
+        Commit the new entries and close the database.
+        """
+
+        self.commit()
+        self.connection.close()
+
+
+class MemoryMappedQTable(DenseQTable):
+    """
+    Q-table whose q-values live in a memory-mapped file, for state spaces that don't fit in memory. Only the rows
+    that are touched are paged in by the operating system. The mapping of states to rows is kept in a persistent
+    index next to the file (see: PersistentStateIndex).
+
+    Opening an existing table is instant, nothing is loaded or unpickled. A run can be resumed, or a table handed to
+    another process, by calling flush() (or close()) and opening the same path again.
+
+    Args:
+        num_of_actions (int): Number of possible actions in every state.
+        learning_rate (float): Learning rate for updating the q-values.
+        gamma (float): Decay rate for future rewards.
+        path (str): Path prefix of the table. The q-values are stored in "<path>.q" and the index in "<path>.index".
+        initial_capacity (int, optional): Number of rows to allocate when a new table is created. The file doubles in
+            size whenever it runs out of rows. Default: 1024
+    """
+
+    def __init__(self, num_of_actions: int, learning_rate: float, gamma: float, path: str,
+                 initial_capacity: int = 1024):
+        super().__init__(num_of_actions, learning_rate, gamma, initial_capacity=1)
+
+        self.path = path
+        self.table_path = f"{path}.q"
+
+        self.index = PersistentStateIndex(f"{path}.index")
+        self.num_of_states = len(self.index)
+
+        stored_num_of_actions = self.index.get_metadata("num_of_actions")
+        if stored_num_of_actions is None:
+            self.index.set_metadata("num_of_actions", num_of_actions)
+            self.index.commit()
+        elif stored_num_of_actions != num_of_actions:
+            raise ValueError(
+                f"The table at {path} stores {stored_num_of_actions} actions per state, got {num_of_actions}"
+            )
+
+        if not os.path.exists(self.table_path):
+            self._resize_file(max(1, initial_capacity))
+
+        self.table = self._open_table()
+
+    def _row_bytes(self) -> int:
+        return self.num_of_actions * float32().itemsize
+
+    def _resize_file(self, rows: int) -> None:
+        """
+        Resize the table file to the given number of rows. New rows are zero.
+
+        Args:
+            rows (int): Number of rows.
+        """
+
+        with open(self.table_path, "ab") as file:
+            file.truncate(rows * self._row_bytes())
+
+    def _open_table(self) -> memmap:
+        """
+        Map the table file to memory.
+
+        Returns:
+            memmap: The q-values, one row per state.
+        """
+
+        rows = os.path.getsize(self.table_path) // self._row_bytes()
+        return memmap(self.table_path, dtype=float32, mode="r+", shape=(rows, self.num_of_actions))
+
+    def _grow(self) -> None:
+        """
+        Double the number of rows of the table file.
+        """
+
+        self.table.flush()
+        rows = 2 * len(self.table)
+
+        # release the old mapping before resizing the file
+        self.table = None
+
+        self._resize_file(rows)
+        self.table = self._open_table()
+
+    def flush(self) -> None:
+        """
+        Write all changes to the disk.
+        """
+
+        self.table.flush()
+        self.index.commit()
+
+    def close(self) -> None:
+        """
+        Write all changes to the disk and close the files.
+        """
+
+        self.flush()
+        self.index.close()
+        self.table = None
+
+    def state_dict(self) -> dict:
+        """
+        Return the state of the agent, e.g. for a checkpoint. Unlike the table files, which keep changing, the state is
+        a snapshot: it holds a copy of the q-values of all registered states and their keys in the order of the rows.
+
+        Returns:
+            dict: State of the agent.
+        """
+
+        self.flush()
+
+        return {
+            "keys": self.index.get_keys(),
+            "q_values": from_numpy(self.table[:self.num_of_states].copy())
+        }
+
+    def load_state_dict(self, state_dict: dict) -> None:
+        """
+        Restore the agent from a state returned by state_dict(). The table files are overwritten with the snapshot.
+
+        Args:
+            state_dict (dict): State of the agent.
+        """
+
+        keys = state_dict["keys"]
+        q_values = state_dict["q_values"].numpy()
+
+        if q_values.shape[1:] != (self.num_of_actions,):
+            raise ValueError(f"The state stores {q_values.shape[1]} actions per state, got {self.num_of_actions}")
+
+        while len(self.table) < len(keys):
+            self._grow()
+
+        self.table[:len(keys)] = q_values
+        # rows of states registered after the snapshot are cleared, they are zero in a new row
+        self.table[len(keys):self.num_of_states] = 0
+
+        self.index.set_keys(keys)
+        self.num_of_states = len(keys)
+
+        self.flush()
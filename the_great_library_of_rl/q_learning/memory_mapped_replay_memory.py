@@ -0,0 +1,266 @@
+import os
+import shutil
+
+from numpy import dtype as numpy_dtype, memmap, int64, float32
+from torch import Tensor, empty, from_numpy
+
+from the_great_library_of_rl.q_learning.replay_memory import Experience, ExperienceBatch
+from the_great_library_of_rl.q_learning.tensor_replay_memory import TensorReplayMemory
+
+
+class MemoryMappedReplayMemory(TensorReplayMemory):
+    """
+    Replay memory stored in a memory-mapped file of fixed-size records, for capacities that don't fit in memory.
+    Every record holds one experience (state, action, reward, next state, non-terminal flag and step count), so
+    sampling an experience touches one place of the file. The operating system keeps the recently used pages in
+    memory and writes the rest to the disk. See: TensorReplayMemory
+
+    The fields are exposed as strided tensors over the file, so inserting and sampling work exactly like in
+    TensorReplayMemory (sampling a batch is one gather per field, no per-experience Python objects).
+
+    The file is created when the first experience is added, because that is when the shape and dtype of the states
+    become known. It is sparse, the disk space is used only as the memory fills. New experiences never overwrite an
+    existing file, it can only be replaced by a snapshot with load_state_dict().
+
+    The file keeps changing after a checkpoint, so state_dict() copies it to a snapshot ("<path>.<generation>") that
+    load_state_dict() copies back. The generation is increased by the first write after a flush, so a memory that
+    didn't change since the last snapshot isn't copied again. Only the last two snapshots are kept, the previous one
+    stays restorable while the newest checkpoint is being written.
+
+    Args:
+        capacity (int): Maximum size of the memory. Exceeding it will overwrite the oldest records.
+        update_after_episodes (int): Number of environment steps until a parameter update.
+        batch_size (int): Number of experiences to sample.
+        path (str): Path of the file with the records.
+    """
+
+    def __init__(self, capacity: int, update_after_episodes: int, batch_size: int, path: str) -> None:
+        super().__init__(capacity, update_after_episodes, batch_size)
+
+        self.path = path
+        self.records = None
+
+        # version of the records, increased by the first write after a flush
+        self.generation = 0
+        self.dirty = False
+
+        # generations with a snapshot, the oldest first
+        self.snapshots = []
+
+    def _snapshot_path(self, generation: int) -> str:
+        """
+        Return the path of the snapshot of a generation.
+
+        Args:
+            generation (int): Generation of the records.
+
+        Returns:
+            str: Path of the snapshot.
+        """
+
+        return f"{self.path}.{generation}"
+
+    def _mark_dirty(self) -> None:
+        """
+        Start a new generation before the first write after a flush.
+        """
+
+        if self.dirty:
+            return
+
+        # the first write creates the file, an existing one is never overwritten
+        if self.records is None and os.path.exists(self.path):
+            raise FileExistsError(
+                f"The records of a replay memory already exist at {self.path}, restore them with load_state_dict() or "
+                f"remove the file"
+            )
+
+        self.generation += 1
+        self.dirty = True
+
+    def add_experience(self, e: Experience) -> None:
+        self._mark_dirty()
+        super().add_experience(e)
+
+    def add_experience_batch(self, batch: ExperienceBatch) -> Tensor:
+        self._mark_dirty()
+        return super().add_experience_batch(batch)
+
+    def _record_dtype(self, state_shape: tuple, state_dtype: str) -> numpy_dtype:
+        """
+        Return the layout of one record. The fields are aligned, so that they can be viewed as tensors.
+
+        Args:
+            state_shape (tuple): Shape of a state.
+            state_dtype (str): Numpy dtype of a state.
+
+        Returns:
+            numpy_dtype: Dtype of a record.
+        """
+
+        return numpy_dtype([
+            ("states", state_dtype, state_shape),
+            ("next_states", state_dtype, state_shape),
+            ("actions", int64),
+            ("rewards", float32),
+            ("non_terminal", float32),
+            ("steps", int64)
+        ], align=True)
+
+    def _open(self, state_shape: tuple, state_dtype: str, mode: str) -> None:
+        """
+        Map the file to memory and view the fields of the records as tensors.
+
+        Args:
+            state_shape (tuple): Shape of a state.
+            state_dtype (str): Numpy dtype of a state.
+            mode (str): Mode of the mapping ("w+" creates the file, "r+" opens an existing one).
+        """
+
+        self.records = memmap(self.path, dtype=self._record_dtype(state_shape, state_dtype), mode=mode,
+                              shape=(self.capacity,))
+
+        self.states = from_numpy(self.records["states"])
+        self.actions = from_numpy(self.records["actions"])
+        self.rewards = from_numpy(self.records["rewards"])
+        self.next_states = from_numpy(self.records["next_states"])
+        self.non_terminal = from_numpy(self.records["non_terminal"])
+        self.steps = from_numpy(self.records["steps"])
+
+    def _allocate(self, state: Tensor) -> None:
+        """
+        Create the file for all records.
+
+        Args:
+            state (Tensor): Example state used to determine the shape and dtype of the stored states.
+        """
+
+        state_dtype = empty(0, dtype=state.dtype).numpy().dtype.str
+        self._open(tuple(state.shape), state_dtype, "w+")
+
+    def flush(self) -> None:
+        """
+        Write all changes to the disk.
+        """
+
+        if self.records is not None:
+            self.records.flush()
+
+        # the next write starts a new generation
+        self.dirty = False
+
+    def close(self) -> None:
+        """
+        Write all changes to the disk and close the file. The memory is empty afterwards.
+        """
+
+        self.flush()
+
+        self.records = None
+        self.states = None
+        self.actions = None
+        self.rewards = None
+        self.next_states = None
+        self.non_terminal = None
+        self.steps = None
+
+        self.position = 0
+        self.size = 0
+
+    def _take_snapshot(self) -> str:
+        """
+        Copy the records to the snapshot of the current generation (unless it exists) and remove the snapshots older
+        than the previous one.
+
+        Returns:
+            str: Path of the snapshot.
+        """
+
+        snapshot_path = self._snapshot_path(self.generation)
+
+        if not self.snapshots or self.snapshots[-1] != self.generation:
+            # a snapshot is complete or missing, never partially written
+            temporary_path = f"{snapshot_path}.tmp"
+            shutil.copyfile(self.path, temporary_path)
+            os.replace(temporary_path, snapshot_path)
+
+            self.snapshots.append(self.generation)
+
+        while len(self.snapshots) > 2:
+            old_snapshot_path = self._snapshot_path(self.snapshots.pop(0))
+
+            if os.path.exists(old_snapshot_path):
+                os.remove(old_snapshot_path)
+
+        return snapshot_path
+
+    def state_dict(self) -> dict:
+        """
+        Write all changes to the disk, take a snapshot of the file and return its location and layout. The
+        experiences are not copied into the state, the snapshot on the disk is the persistent state.
+
+        Returns:
+            dict: State of the memory.
+        """
+
+        self.flush()
+
+        state_dict = {
+            "path": self.path,
+            "capacity": self.capacity,
+            "position": self.position,
+            "size": self.size,
+            "generation": self.generation
+        }
+
+        if self.records is not None:
+            state_dict["snapshot"] = self._take_snapshot()
+            state_dict["state_shape"] = self.records.dtype["states"].shape
+            state_dict["state_dtype"] = self.records.dtype["states"].base.str
+
+        return state_dict
+
+    def load_state_dict(self, state_dict: dict) -> None:
+        """
+        Restore the records from the snapshot described by a state returned by state_dict(). The records written to
+        the file after the state was saved are discarded.
+
+        Args:
+            state_dict (dict): State of the memory.
+        """
+
+        if state_dict["capacity"] != self.capacity:
+            raise ValueError(
+                f"The state was saved from a memory with a capacity of {state_dict['capacity']}, got {self.capacity}"
+            )
+
+        snapshot_path = state_dict.get("snapshot")
+
+        if snapshot_path is not None and not os.path.exists(snapshot_path):
+            raise FileNotFoundError(f"The snapshot of the replay memory is missing: {snapshot_path}")
+
+        # release the current mapping before the file is replaced
+        self.close()
+
+        self.path = state_dict["path"]
+        self.position = state_dict["position"]
+        self.size = state_dict["size"]
+        self.generation = state_dict["generation"]
+        self.dirty = False
+
+        if snapshot_path is None:
+            # the memory was empty, the records written afterwards are discarded
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+            self.snapshots = []
+            return
+
+        temporary_path = f"{self.path}.tmp"
+        shutil.copyfile(snapshot_path, temporary_path)
+        os.replace(temporary_path, self.path)
+
+        # the restored snapshot is kept until two newer ones exist
+        self.snapshots = [self.generation]
+
+        self._open(state_dict["state_shape"], state_dict["state_dtype"], "r+")
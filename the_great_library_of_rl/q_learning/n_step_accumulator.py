@@ -0,0 +1,100 @@
+from collections import deque
+
+from the_great_library_of_rl.q_learning.replay_memory import Experience
+
+
+class NStepAccumulator:
+    """
+    Turns one-step transitions into n-step experiences. The reward of an n-step experience is the discounted sum of
+    the next n rewards and its next state is the state n steps later, so the agent bootstraps from gamma ** n times
+    the value of that state (see: Experience.steps). Credit for a reward then propagates n steps per update instead
+    of one.
+
+    The discounted sum is updated incrementally in O(1) per step. To keep the floating point error from growing, it
+    is recomputed from the stored rewards once every n steps, which is still O(1) amortized. When the episode ends,
+    the remaining transitions are emitted as shorter, terminal experiences.
+
+    Args:
+        n (int): Number of steps to accumulate.
+        gamma (float): Decay rate for future rewards. Should match the agent's gamma.
+    """
+
+    def __init__(self, n: int, gamma: float) -> None:
+        if n < 1:
+            raise ValueError(f"The number of steps must be at least 1, got {n}")
+
+        self.n = n
+        self.gamma = gamma
+
+        # gamma ** i for every position in the window
+        self.discounts = [gamma ** i for i in range(n)]
+
+        # (state, action, reward) of the transitions waiting for their n-step return
+        self.window = deque()
+        # discounted sum of the rewards in the window
+        self.discounted_sum = 0
+        # number of incremental updates of the sum since it was last recomputed
+        self.updates_since_refresh = 0
+
+    def add(self, state, action: int, reward: float, next_state, non_terminal: bool) -> list[Experience]:
+        """
+        Add a transition and return the experiences that were completed by it.
+
+        Args:
+            state: State of the environment.
+            action (int): Action taken by the agent.
+            reward (float): Received/Observed reward.
+            next_state: New state after taking the action.
+            non_terminal (bool): False if the environment ended (last state was reached), True otherwise.
+
+        Returns:
+            list[Experience]: One experience once the window is full, all remaining ones when the episode ended and
+                none otherwise.
+        """
+
+        self.discounted_sum += self.discounts[len(self.window)] * reward
+        self.window.append((state, action, reward))
+
+        if not non_terminal:
+            return [self._pop(next_state, False) for _ in range(len(self.window))]
+
+        if len(self.window) == self.n:
+            return [self._pop(next_state, True)]
+
+        return []
+
+    def reset(self) -> None:
+        """
+        Drop the waiting transitions, e.g. when an episode is cut off without reaching a terminal state.
+        """
+
+        self.window.clear()
+        self.discounted_sum = 0
+        self.updates_since_refresh = 0
+
+    def _pop(self, next_state, non_terminal: bool) -> Experience:
+        """
+        Remove the oldest transition from the window and return it as an n-step experience.
+
+        Args:
+            next_state: State after the newest transition.
+            non_terminal (bool): False if the newest transition ended the environment, True otherwise.
+
+        Returns:
+            Experience: The oldest transition with the discounted sum of the rewards in the window.
+        """
+
+        state, action, reward = self.window.popleft()
+        experience = Experience(state, action, self.discounted_sum, next_state, non_terminal, len(self.window) + 1)
+
+        self.updates_since_refresh += 1
+
+        # the sum can't be shifted by dividing with a zero gamma, and it drifts slowly otherwise
+        if self.gamma == 0 or self.updates_since_refresh >= self.n:
+            self.discounted_sum = sum(d * r for d, (_, _, r) in zip(self.discounts, self.window))
+            self.updates_since_refresh = 0
+        else:
+            # remove the oldest reward and move every other one a step closer
+            self.discounted_sum = (self.discounted_sum - reward) / self.gamma
+
+        return experience
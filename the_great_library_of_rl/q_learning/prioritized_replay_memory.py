@@ -0,0 +1,165 @@
+from numpy import full
+from torch import Tensor, from_numpy
+from torch import float as torch_float
+
+from the_great_library_of_rl.q_learning.replay_memory import Experience, ExperienceBatch
+from the_great_library_of_rl.q_learning.sum_tree import SumTree
+from the_great_library_of_rl.q_learning.tensor_replay_memory import TensorReplayMemory
+
+
+class PrioritizedReplayMemory(TensorReplayMemory):
+    """
+    Replay memory that samples experiences proportionally to their priority (https://arxiv.org/abs/1511.05952).
+    The priority of an experience is derived from its last temporal difference error, so the agent trains more on
+    experiences it predicts poorly. The bias introduced by the non-uniform sampling is corrected with
+    importance-sampling weights (see: ExperienceBatch.weights).
+
+    Priorities are stored in a sum-tree, so both updating a priority and sampling take O(log N).
+
+    Args:
+        capacity (int): Maximum size of the memory. Exceeding it will overwrite the oldest records.
+        update_after_episodes (int): Number of environment steps until a parameter update.
+        batch_size (int): Number of experiences to sample.
+        alpha (float, optional): How much the priorities affect sampling. 0 means uniform sampling. Default: 0.6
+        beta (float, optional): Starting strength of the importance-sampling correction. 1 means full correction.
+            Default: 0.4
+        beta_step (float, optional): How much beta increases with every sampled batch (up to 1). Default: 0
+        priority_epsilon (float, optional): Small constant added to the errors so that no experience has a zero
+            priority. Default: 1e-6
+    """
+
+    def __init__(self, capacity: int, update_after_episodes: int, batch_size: int, alpha: float = 0.6,
+                 beta: float = 0.4, beta_step: float = 0, priority_epsilon: float = 1e-6) -> None:
+        super().__init__(capacity, update_after_episodes, batch_size)
+
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_step = beta_step
+        self.priority_epsilon = priority_epsilon
+
+        self.tree = SumTree(capacity)
+
+        # new experiences get the highest priority seen so far, so that each of them is sampled at least once
+        self.max_priority = 1.0
+
+    def add_experience(self, e: Experience) -> None:
+        """
+        Add a new experience to the replay memory with the maximum priority. The oldest record will be overwritten if
+        the capacity is exceeded.
+
+        Args:
+            e: Experience to add.
+        """
+
+        index = self.position
+        super().add_experience(e)
+
+        self.tree.set(index, self.max_priority)
+
+    def add_experience_batch(self, batch: ExperienceBatch) -> Tensor:
+        """
+        Add a batch of experiences to the replay memory with the maximum priority. The oldest records will be
+        overwritten if the capacity is exceeded.
+
+        Args:
+            batch (ExperienceBatch): Experiences to add.
+
+        Returns:
+            Tensor: Indices where the experiences were written.
+        """
+
+        indices = super().add_experience_batch(batch)
+        self.tree.update(indices.numpy(), full(len(indices), self.max_priority))
+
+        return indices
+
+    def sample_indices(self, batch_size: int) -> Tensor:
+        """
+        Return indices of stored experiences sampled proportionally to their priorities.
+
+        Args:
+            batch_size (int): Number of indices to sample.
+
+        Returns:
+            Tensor: Indices of the sampled experiences.
+        """
+
+        return from_numpy(self.tree.sample(batch_size, self.size))
+
+    def get_batch(self, indices: Tensor, out: ExperienceBatch = None) -> ExperienceBatch:
+        """
+        Gather the experiences at the given indices into a batch along with their importance-sampling weights.
+
+        Args:
+            indices (Tensor): Indices of the experiences.
+            out (ExperienceBatch, optional): Batch to overwrite instead of allocating a new one. Default: None
+
+        Returns:
+            ExperienceBatch: An object containing the batch of experiences.
+        """
+
+        batch = super().get_batch(indices, out)
+
+        # w_i = (N * P(i)) ^ -beta, normalized by the largest weight in the batch
+        probabilities = self.tree.get(indices.numpy()) / self.tree.total()
+        weights = (self.size * probabilities) ** -self.beta
+        weights /= weights.max()
+
+        batch.indices = indices
+        batch.weights = from_numpy(weights).to(torch_float)
+
+        # anneal the correction towards full strength
+        self.beta = min(1.0, self.beta + self.beta_step)
+
+        return batch
+
+    def update_priorities(self, indices: Tensor, td_errors: Tensor) -> None:
+        """
+        Update the priorities of sampled experiences using their new temporal difference errors.
+
+        Args:
+            indices (Tensor): Indices of the experiences (see: ExperienceBatch.indices).
+            td_errors (Tensor): Temporal difference errors of the experiences.
+        """
+
+        priorities = (td_errors.detach().abs().double().numpy() + self.priority_epsilon) ** self.alpha
+
+        self.tree.update(indices.numpy(), priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+    def state_dict(self) -> dict:
+        """
+        Return the state of the memory, e.g. for a checkpoint. See: TensorReplayMemory.state_dict
+
+        Returns:
+            dict: State of the memory.
+        """
+
+        state_dict = super().state_dict()
+
+        state_dict["capacity"] = self.capacity
+        state_dict["tree"] = from_numpy(self.tree.tree)
+        state_dict["max_priority"] = self.max_priority
+        state_dict["beta"] = self.beta
+
+        return state_dict
+
+    def load_state_dict(self, state_dict: dict) -> None:
+        """
+        Restore the memory from a state returned by state_dict().
+
+        Args:
+            state_dict (dict): State of the memory.
+        """
+
+        # the priorities are stored by index in the tree, which depends on the capacity
+        if state_dict["capacity"] != self.capacity:
+            raise ValueError(
+                f"The state was saved from a memory with a capacity of {state_dict['capacity']}, got {self.capacity}"
+            )
+
+        super().load_state_dict(state_dict)
+
+        self.tree.tree[:] = state_dict["tree"].numpy()
+        self.max_priority = state_dict["max_priority"]
+        self.beta = state_dict["beta"]
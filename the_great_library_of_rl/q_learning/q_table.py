@@ -1,6 +1,40 @@
 from the_great_library_of_rl.q_learning import QAgent
 
 
+def _to_key(value):
+    """
+    Convert a nested list into nested tuples.
+    """
+
+    if isinstance(value, list):
+        return tuple(_to_key(item) for item in value)
+
+    return value
+
+
+def state_keys(states) -> list:
+    """
+    Convert a batch of states to keys of a q-table. The states are converted to Python values and the rows of a
+    multidimensional batch become tuples, so a batch produces the same keys as the states of a single environment
+    (e.g. (1, 2, 0) instead of an unhashable array row). A batch of shape (N, 1), e.g. of a vectorized discrete
+    environment, produces the scalars (3.0 is the same key as the state 3).
+
+    Args:
+        states: Batch of states (array, tensor or sequence), one per row.
+
+    Returns:
+        list: Hashable key of every state.
+    """
+
+    if getattr(states, "ndim", 1) <= 1:
+        return states.tolist() if hasattr(states, "tolist") else list(states)
+
+    if states.ndim == 2 and states.shape[1] == 1:
+        return states[:, 0].tolist()
+
+    return [_to_key(row) for row in states.tolist()]
+
+
 class QTable(QAgent):
     """
     Q-Learning agent that works by storing the q-values in a table of states and actions.
@@ -62,6 +96,19 @@ class QTable(QAgent):
 
         return max_q_index
 
+    def get_actions(self, states) -> list[int]:
+        """
+        Return the best actions for a batch of states. The states are converted to keys like in update_q_values().
+
+        Args:
+            states: Batch of states of the environment.
+
+        Returns:
+            list[int]: Best action for every state according to the agent.
+        """
+
+        return [self.get_action(state) for state in state_keys(states)]
+
     def register_state(self, state, check_if_exists: bool = True):
         """
         Add a new state to the table.
@@ -144,3 +191,39 @@ class QTable(QAgent):
 
         # update the table with the adjusted and target q-value
         self.table[state][action] = adjusted_current_value + target_q
+
+    def update_q_values(self, states, actions, rewards, next_states, non_terminal) -> None:
+        """
+        Update the q-values with a batch of transitions, one after another. The states are converted to the same keys
+        as the states of the environment (see: state_keys), so e.g. recorded array rows update the states learned
+        online.
+
+        Args:
+            states: Batch of states of the environment.
+            actions: Actions taken in the states.
+            rewards: Rewards experienced after taking the actions.
+            next_states: States reached after taking the actions.
+            non_terminal: False for the transitions that ended the environment, True otherwise.
+        """
+
+        super().update_q_values(state_keys(states), actions, rewards, state_keys(next_states), non_terminal)
+
+    def state_dict(self) -> dict:
+        """
+        Return the state of the agent, e.g. for a checkpoint.
+
+        Returns:
+            dict: State of the agent.
+        """
+
+        return {"table": self.table}
+
+    def load_state_dict(self, state_dict: dict) -> None:
+        """
+        Restore the agent from a state returned by state_dict().
+
+        Args:
+            state_dict (dict): State of the agent.
+        """
+
+        self.table = {state: list(q_values) for state, q_values in state_dict["table"].items()}
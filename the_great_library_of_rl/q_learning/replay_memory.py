@@ -1,6 +1,6 @@
 from random import sample
 
-from torch import Tensor, stack, tensor
+from torch import Tensor, stack, tensor, ones_like
 
 
 class Experience:
@@ -13,20 +13,28 @@ class Experience:
         reward (float): Received/Observed reward.
         next_state (Tensor): New state after taking the action.
         non_terminal (bool): False if the environment ended (last state was reached), True otherwise.
+        steps (int, optional): Number of environment steps between the state and the next state. The reward is the
+            discounted sum of their rewards and the value of the next state is discounted by gamma ** steps
+            (see: NStepAccumulator). Default: 1
     """
 
-    def __init__(self, state: Tensor, action: int, reward: float, next_state: Tensor, non_terminal: bool) -> None:
+    def __init__(self, state: Tensor, action: int, reward: float, next_state: Tensor, non_terminal: bool,
+                 steps: int = 1) -> None:
         self.state = state
         self.action = action
         self.reward = reward
         self.next_state = next_state
         self.non_terminal = non_terminal
+        self.steps = steps
 
 
 class ExperienceBatch:
     """
     A batch of experience from a replay memory. Extracts states, rewards, actions, and next states from the
     experience objects into tensors ready for training.
+
+    Batches sampled from a prioritized memory also carry the indices of the sampled experiences and their
+    importance-sampling weights. Both are None otherwise.
     """
 
     def __init__(self, experiences: list[Experience]) -> None:
@@ -35,6 +43,7 @@ class ExperienceBatch:
         rewards = []
         next_states = []
         non_terminal = []
+        steps = []
 
         # OPTIMIZATION NOTE: A loop like this may not be optimal.
         for e in experiences:
@@ -43,12 +52,51 @@ class ExperienceBatch:
             rewards.append(e.reward)
             next_states.append(e.next_state)
             non_terminal.append(1 if e.non_terminal else 0)
+            steps.append(e.steps)
 
         self.states = stack(states)
         self.actions = tensor(actions)
         self.rewards = tensor(rewards)
         self.next_states = stack(next_states)
         self.non_terminal = tensor(non_terminal)
+        self.steps = tensor(steps)
+
+        self.indices = None
+        self.weights = None
+
+    @classmethod
+    def from_tensors(cls, states: Tensor, actions: Tensor, rewards: Tensor, next_states: Tensor,
+                     non_terminal: Tensor, steps: Tensor = None, indices: Tensor = None,
+                     weights: Tensor = None) -> "ExperienceBatch":
+        """
+        Create a batch directly from already batched tensors, skipping the per-experience extraction.
+
+        Args:
+            states (Tensor): Batch of states.
+            actions (Tensor): Batch of actions.
+            rewards (Tensor): Batch of rewards.
+            next_states (Tensor): Batch of next states.
+            non_terminal (Tensor): Batch of non-terminal flags (1 for non-terminal, 0 for terminal).
+            steps (Tensor, optional): Batch of step counts (see: Experience). All ones if None. Default: None
+            indices (Tensor, optional): Indices of the experiences in the replay memory. Default: None
+            weights (Tensor, optional): Importance-sampling weights of the experiences. Default: None
+
+        Returns:
+            ExperienceBatch: An object containing the batch of experiences.
+        """
+
+        batch = cls.__new__(cls)
+
+        batch.states = states
+        batch.actions = actions
+        batch.rewards = rewards
+        batch.next_states = next_states
+        batch.non_terminal = non_terminal
+        batch.steps = ones_like(actions) if steps is None else steps
+        batch.indices = indices
+        batch.weights = weights
+
+        return batch
 
 
 class ReplayMemory:
@@ -57,7 +105,7 @@ class ReplayMemory:
 
     Args:
         capacity (int): Maximum size of the memory. Exceeding it will delete the oldest records.
-        update_after_episodes (int): Number of episodes until a parameter update.
+        update_after_episodes (int): Number of environment steps until a parameter update.
         batch_size (int): Number of experiences to sample.
     """
 
@@ -67,6 +115,9 @@ class ReplayMemory:
         self.batch_size = batch_size
         self.experiences = []
 
+    def __len__(self) -> int:
+        return len(self.experiences)
+
     def add_experience(self, e: Experience) -> None:
         """
         Add a new experience to the replay memory. The oldest record will be deleted if the capacity is exceeded.
@@ -80,6 +131,25 @@ class ReplayMemory:
         if self.capacity < len(self.experiences):
             self.experiences.pop(0)
 
+    def add_experience_batch(self, batch: ExperienceBatch) -> None:
+        """
+        Add a batch of experiences to the replay memory. The oldest records will be deleted if the capacity is
+        exceeded.
+
+        Args:
+            batch (ExperienceBatch): Experiences to add.
+        """
+
+        for i in range(len(batch.states)):
+            self.add_experience(Experience(
+                batch.states[i],
+                int(batch.actions[i]),
+                float(batch.rewards[i]),
+                batch.next_states[i],
+                bool(batch.non_terminal[i]),
+                int(batch.steps[i])
+            ))
+
     def sample_batch(self, batch_size_overwrite: int = None) -> ExperienceBatch:
         """
         Return a list of random experiences from the memory (random without replacement).
@@ -98,3 +168,51 @@ class ReplayMemory:
             return ExperienceBatch(self.experiences)
 
         return ExperienceBatch(sample(self.experiences, batch_size))
+
+    def update_priorities(self, indices: Tensor, td_errors: Tensor) -> None:
+        """
+        Update the priorities of sampled experiences. Does nothing, because the experiences are sampled uniformly.
+
+        Args:
+            indices (Tensor): Indices of the experiences (see: ExperienceBatch.indices).
+            td_errors (Tensor): Temporal difference errors of the experiences.
+        """
+
+        pass
+
+    def state_dict(self) -> dict:
+        """
+        Return the stored experiences as contiguous tensors (one per field), e.g. for a checkpoint.
+
+        Returns:
+            dict: State of the memory.
+        """
+
+        if not self.experiences:
+            return {"batch": None}
+
+        batch = ExperienceBatch(self.experiences)
+
+        return {
+            "batch": {
+                "states": batch.states,
+                "actions": batch.actions,
+                "rewards": batch.rewards,
+                "next_states": batch.next_states,
+                "non_terminal": batch.non_terminal,
+                "steps": batch.steps
+            }
+        }
+
+    def load_state_dict(self, state_dict: dict) -> None:
+        """
+        Restore the memory from a state returned by state_dict().
+
+        Args:
+            state_dict (dict): State of the memory.
+        """
+
+        self.experiences = []
+
+        if state_dict["batch"] is not None:
+            self.add_experience_batch(ExperienceBatch.from_tensors(**state_dict["batch"]))
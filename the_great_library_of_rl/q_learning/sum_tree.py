@@ -0,0 +1,112 @@
+from numpy import ndarray, zeros, ones, arange, where, minimum, float64, int64
+from numpy.random import random
+
+
+class SumTree:
+    """
+    Binary tree where every node holds the sum of its children. The leaves hold priorities, which makes it possible
+    to update a priority and to sample a leaf proportionally to its priority in O(log N).
+
+    Args:
+        capacity (int): Number of leaves.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+
+        # number of levels below the root, the leaves are stored at the last level
+        self.depth = max(1, (capacity - 1).bit_length())
+        self.leaf_start = 1 << self.depth
+
+        # the root is stored at index 1, the children of node i are stored at 2i and 2i + 1
+        self.tree = zeros(2 * self.leaf_start, dtype=float64)
+
+    def total(self) -> float:
+        """
+        Return the sum of all priorities.
+
+        Returns:
+            float: Sum of all priorities.
+        """
+
+        return float(self.tree[1])
+
+    def get(self, indices: ndarray) -> ndarray:
+        """
+        Return the priorities of the given leaves.
+
+        Args:
+            indices (ndarray): Indices of the leaves.
+
+        Returns:
+            ndarray: Priorities of the leaves.
+        """
+
+        return self.tree[indices + self.leaf_start]
+
+    def set(self, index: int, priority: float) -> None:
+        """
+        Set the priority of a single leaf.
+
+        Args:
+            index (int): Index of the leaf.
+            priority (float): New priority.
+        """
+
+        tree = self.tree
+        node = index + self.leaf_start
+        tree[node] = priority
+
+        # recompute the sums all the way up to the root (recomputing avoids accumulating floating point errors)
+        node >>= 1
+        while node >= 1:
+            tree[node] = tree[2 * node] + tree[2 * node + 1]
+            node >>= 1
+
+    def update(self, indices: ndarray, priorities: ndarray) -> None:
+        """
+        Set the priorities of multiple leaves at once. If an index repeats, the last priority is used.
+
+        Args:
+            indices (ndarray): Indices of the leaves.
+            priorities (ndarray): New priorities.
+        """
+
+        tree = self.tree
+        nodes = indices + self.leaf_start
+        tree[nodes] = priorities
+
+        # recompute the sums level by level, every level is a single vectorized operation
+        # (repeated parents are fine, they are assigned the same sum)
+        for _ in range(self.depth):
+            nodes = nodes >> 1
+            tree[nodes] = tree[2 * nodes] + tree[2 * nodes + 1]
+
+    def sample(self, batch_size: int, size: int) -> ndarray:
+        """
+        Sample leaves proportionally to their priorities. The total priority is split into equal segments and one
+        leaf is sampled from each segment (stratified sampling).
+
+        Args:
+            batch_size (int): Number of leaves to sample.
+            size (int): Number of leaves in use. Used to guard against floating point errors.
+
+        Returns:
+            ndarray: Indices of the sampled leaves.
+        """
+
+        tree = self.tree
+        segment = self.total() / batch_size
+        values = (arange(batch_size) + random(batch_size)) * segment
+        nodes = ones(batch_size, dtype=int64)
+
+        # walk from the root to the leaves, for all values at once
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_values = tree[left]
+            go_right = values > left_values
+
+            values = where(go_right, values - left_values, values)
+            nodes = where(go_right, left + 1, left)
+
+        return minimum(nodes - self.leaf_start, size - 1)
@@ -0,0 +1,239 @@
+from torch import Tensor, as_tensor, empty, randint, arange, index_select
+from torch import float as torch_float, long as torch_long
+
+from the_great_library_of_rl.q_learning.replay_memory import Experience, ExperienceBatch, ReplayMemory
+
+
+class TensorReplayMemory(ReplayMemory):
+    """
+    Replay memory implemented as a ring buffer over preallocated tensors. Every field of the experiences (states,
+    actions, rewards, next states, non-terminal flags and step counts) is kept in its own contiguous tensor, which
+    makes inserting an experience O(1) and sampling a batch a single index gather per field. Can be used anywhere a
+    ReplayMemory is expected.
+
+    The tensors are allocated when the first experience is added, because that is when the shape and dtype of the
+    states become known.
+
+    Args:
+        capacity (int): Maximum size of the memory. Exceeding it will overwrite the oldest records.
+        update_after_episodes (int): Number of environment steps until a parameter update.
+        batch_size (int): Number of experiences to sample.
+    """
+
+    def __init__(self, capacity: int, update_after_episodes: int, batch_size: int) -> None:
+        super().__init__(capacity, update_after_episodes, batch_size)
+
+        self.states = None
+        self.actions = None
+        self.rewards = None
+        self.next_states = None
+        self.non_terminal = None
+        self.steps = None
+
+        # index where the next experience will be written
+        self.position = 0
+        # number of stored experiences
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _allocate(self, state: Tensor) -> None:
+        """
+        Allocate the storage for all fields of the experiences.
+
+        Args:
+            state (Tensor): Example state used to determine the shape and dtype of the stored states.
+        """
+
+        self.states = empty((self.capacity, *state.shape), dtype=state.dtype)
+        self.actions = empty(self.capacity, dtype=torch_long)
+        self.rewards = empty(self.capacity, dtype=torch_float)
+        self.next_states = empty((self.capacity, *state.shape), dtype=state.dtype)
+        self.non_terminal = empty(self.capacity, dtype=torch_float)
+        self.steps = empty(self.capacity, dtype=torch_long)
+
+    def add_experience(self, e: Experience) -> None:
+        """
+        Add a new experience to the replay memory. The oldest record will be overwritten if the capacity is exceeded.
+
+        Args:
+            e: Experience to add.
+        """
+
+        state = as_tensor(e.state)
+
+        if self.states is None:
+            self._allocate(state)
+
+        i = self.position
+
+        self.states[i] = state
+        self.actions[i] = e.action
+        self.rewards[i] = e.reward
+        self.next_states[i] = as_tensor(e.next_state)
+        self.non_terminal[i] = 1 if e.non_terminal else 0
+        self.steps[i] = e.steps
+
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_experience_batch(self, batch: ExperienceBatch) -> Tensor:
+        """
+        Add a batch of experiences to the replay memory with one index write per field. The oldest records will be
+        overwritten if the capacity is exceeded.
+
+        Args:
+            batch (ExperienceBatch): Experiences to add.
+
+        Returns:
+            Tensor: Indices where the experiences were written.
+        """
+
+        states = batch.states
+        next_states = batch.next_states
+        count = len(states)
+
+        # an empty batch can't be used to allocate the memory
+        if count == 0:
+            return empty(0, dtype=torch_long)
+
+        if self.states is None:
+            self._allocate(states[0])
+
+        # only the newest experiences fit if the batch is larger than the memory
+        skip = max(0, count - self.capacity)
+        indices = (self.position + arange(skip, count)) % self.capacity
+
+        self.states[indices] = states[skip:].to(self.states.dtype)
+        self.actions[indices] = batch.actions[skip:].to(torch_long)
+        self.rewards[indices] = batch.rewards[skip:].to(torch_float)
+        self.next_states[indices] = next_states[skip:].to(self.next_states.dtype)
+        self.non_terminal[indices] = batch.non_terminal[skip:].to(torch_float)
+        self.steps[indices] = batch.steps[skip:].to(torch_long)
+
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+
+        return indices
+
+    def sample_indices(self, batch_size: int) -> Tensor:
+        """
+        Return random indices of stored experiences (random with replacement).
+        All indices are returned if the batch size exceeds the number of stored experiences.
+
+        Args:
+            batch_size (int): Number of indices to sample.
+
+        Returns:
+            Tensor: Indices of the sampled experiences.
+        """
+
+        if batch_size >= self.size:
+            return arange(self.size)
+
+        return randint(self.size, (batch_size,))
+
+    def get_batch(self, indices: Tensor, out: ExperienceBatch = None) -> ExperienceBatch:
+        """
+        Gather the experiences at the given indices into a batch.
+
+        Args:
+            indices (Tensor): Indices of the experiences.
+            out (ExperienceBatch, optional): Batch whose tensors are overwritten with the experiences instead of
+                allocating new ones (see: BatchPrefetcher). Its tensors must have the size of the indices.
+                Default: None
+
+        Returns:
+            ExperienceBatch: An object containing the batch of experiences.
+        """
+
+        if out is not None:
+            index_select(self.states, 0, indices, out=out.states)
+            index_select(self.actions, 0, indices, out=out.actions)
+            index_select(self.rewards, 0, indices, out=out.rewards)
+            index_select(self.next_states, 0, indices, out=out.next_states)
+            index_select(self.non_terminal, 0, indices, out=out.non_terminal)
+            index_select(self.steps, 0, indices, out=out.steps)
+
+            return out
+
+        return ExperienceBatch.from_tensors(
+            self.states[indices],
+            self.actions[indices],
+            self.rewards[indices],
+            self.next_states[indices],
+            self.non_terminal[indices],
+            self.steps[indices]
+        )
+
+    def sample_batch(self, batch_size_overwrite: int = None) -> ExperienceBatch:
+        """
+        Return a batch of random experiences from the memory (random with replacement).
+        All stored experiences are returned if the batch size exceeds their count.
+
+        Args:
+            batch_size_overwrite (int): Number of experiences to sample. (Overwrites the object's batch size property.)
+
+        Returns:
+            ExperienceBatch: An object containing the batch of experiences.
+        """
+
+        batch_size = self.batch_size if batch_size_overwrite is None else batch_size_overwrite
+
+        return self.get_batch(self.sample_indices(batch_size))
+
+    def state_dict(self) -> dict:
+        """
+        Return the state of the memory, e.g. for a checkpoint. The stored part of every field is returned as a
+        contiguous tensor (a view of the storage), so it can be saved without any per-experience work.
+
+        Returns:
+            dict: State of the memory.
+        """
+
+        fields = None
+
+        if self.states is not None:
+            size = self.size
+
+            fields = {
+                "states": self.states[:size],
+                "actions": self.actions[:size],
+                "rewards": self.rewards[:size],
+                "next_states": self.next_states[:size],
+                "non_terminal": self.non_terminal[:size],
+                "steps": self.steps[:size]
+            }
+
+        return {"fields": fields, "position": self.position, "size": self.size}
+
+    def load_state_dict(self, state_dict: dict) -> None:
+        """
+        Restore the memory from a state returned by state_dict(). The experiences keep their indices, so the
+        capacity must be large enough to hold all of them.
+
+        Args:
+            state_dict (dict): State of the memory.
+        """
+
+        size = state_dict["size"]
+        fields = state_dict["fields"]
+
+        if size > self.capacity:
+            raise ValueError(f"The state holds {size} experiences, the capacity of the memory is {self.capacity}")
+
+        self.position = state_dict["position"] % self.capacity
+        self.size = size
+
+        if fields is None:
+            return
+
+        self._allocate(fields["states"][0])
+
+        self.states[:size] = fields["states"]
+        self.actions[:size] = fields["actions"]
+        self.rewards[:size] = fields["rewards"]
+        self.next_states[:size] = fields["next_states"]
+        self.non_terminal[:size] = fields["non_terminal"]
+        self.steps[:size] = fields["steps"]
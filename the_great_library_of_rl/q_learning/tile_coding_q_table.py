@@ -0,0 +1,133 @@
+from numpy import ndarray, zeros, argmax, asarray, float32
+from torch import from_numpy
+
+from the_great_library_of_rl.q_learning import QAgent
+
+
+class TileCodingQTable(QAgent):
+    """
+    Q-Learning agent for tile-coded states (see: TileCodingDiscretizer). Every tile has a weight per action and the
+    q-values of a state are the sums of the weights of its active tiles. An update moves the weights of the active
+    tiles by learning_rate / (number of active tiles) of the error, so the q-value moves by the learning rate.
+
+    Args:
+        num_of_actions (int): Number of possible actions in every state.
+        num_of_tiles (int): Number of tiles of all tilings (see: TileCodingDiscretizer.get_num_states).
+        learning_rate (float): Learning rate for updating the q-values.
+        gamma (float): Decay rate for future rewards.
+    """
+
+    def __init__(self, num_of_actions: int, num_of_tiles: int, learning_rate: float, gamma: float):
+        self.num_of_actions = num_of_actions
+        self.learning_rate = learning_rate
+        self.gamma = gamma
+
+        # weights of every tile and action
+        self.weights = zeros((num_of_tiles, num_of_actions), dtype=float32)
+
+    def get_q_values(self, state) -> ndarray:
+        """
+        Return the q-values for a given state.
+
+        Args:
+            state: Indices of the active tiles.
+
+        Returns:
+            ndarray: Q-values for a given state.
+        """
+
+        return self.weights[state].sum(axis=0)
+
+    def get_action(self, state) -> int:
+        """
+        Return the best action given a state.
+
+        Args:
+            state: Indices of the active tiles.
+
+        Returns:
+            int: Best action according to the agent.
+        """
+
+        return int(argmax(self.get_q_values(state)))
+
+    def get_actions(self, states) -> ndarray:
+        """
+        Return the best actions for a batch of states using a single gather from the weights.
+
+        Args:
+            states: Indices of the active tiles, one row per state.
+
+        Returns:
+            ndarray: Best action for every state according to the agent.
+        """
+
+        return argmax(self.weights[asarray(states)].sum(axis=1), axis=1)
+
+    def get_q_value(self, state, action: int) -> float:
+        """
+        Return the q-value for a state/action pair.
+
+        Args:
+            state: Indices of the active tiles.
+            action (int): Action to evaluate in the given state.
+
+        Returns:
+            float: Q-value of the state/action pair.
+        """
+
+        return float(self.weights[state, action].sum())
+
+    def get_max_q_value(self, state) -> float:
+        """
+        Get the maximum q-value for a given state.
+
+        Args:
+            state: Indices of the active tiles.
+
+        Returns:
+            float: Q-value of the best action.
+        """
+
+        return float(self.get_q_values(state).max())
+
+    def update_q_value(self, state, action: int, reward: float, next_state, non_terminal: bool):
+        """
+        Update the weights of the state's active tiles.
+
+        Args:
+            state: Indices of the active tiles.
+            action (int): Action taken in the state.
+            reward (float): Reward experienced after taking the action.
+            next_state: Indices of the active tiles of the state reached after taking the action.
+            non_terminal (bool): False if the environment ended (last state was reached), True otherwise.
+        """
+
+        # calculate the expected future reward by looking at the q-values for the next state
+        expected_future_reward = self.gamma * self.get_max_q_value(next_state) if non_terminal else 0
+
+        error = reward + expected_future_reward - self.get_q_value(state, action)
+
+        # every active tile takes an equal share of the step (the tiles of a state are distinct)
+        self.weights[state, action] += self.learning_rate / len(state) * error
+
+    def state_dict(self) -> dict:
+        """
+        Return the state of the agent, e.g. for a checkpoint. The weights are returned as a tensor sharing memory
+        with the agent.
+
+        Returns:
+            dict: State of the agent.
+        """
+
+        return {"weights": from_numpy(self.weights)}
+
+    def load_state_dict(self, state_dict: dict) -> None:
+        """
+        Restore the agent from a state returned by state_dict().
+
+        Args:
+            state_dict (dict): State of the agent.
+        """
+
+        self.weights[:] = state_dict["weights"].numpy()
@@ -0,0 +1,280 @@
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from multiprocessing import get_context
+from statistics import mean, median
+from time import perf_counter
+from traceback import format_exc
+from typing import Callable
+
+import numpy
+import torch
+
+from the_great_library_of_rl.callbacks import Callback
+from the_great_library_of_rl.trainer import Trainer
+
+
+def grid_search(space: dict[str, list]) -> list[dict]:
+    """
+    Return every combination of the given values.
+
+    Args:
+        space (dict[str, list]): Values to try for every parameter.
+
+    Returns:
+        list[dict]: Parameters of every trial.
+    """
+
+    names = list(space)
+    return [dict(zip(names, values)) for values in product(*(space[name] for name in names))]
+
+
+def random_search(space: dict, num_trials: int, seed: int = None) -> list[dict]:
+    """
+    Return randomly sampled parameters.
+
+    Every parameter is sampled from its entry in the search space: one element of a list, a uniform float from a
+    (low, high) tuple or the result of a function called with a random.Random instance (e.g. for a log-uniform
+    distribution: lambda rng: 10 ** rng.uniform(-4, -2)).
+
+    Args:
+        space (dict): Distribution of every parameter.
+        num_trials (int): Number of trials to sample.
+        seed (int, optional): Seed of the sampling, the same seed gives the same trials. Default: None
+
+    Returns:
+        list[dict]: Parameters of every trial.
+    """
+
+    rng = random.Random(seed)
+
+    def sample(distribution):
+        if isinstance(distribution, list):
+            return rng.choice(distribution)
+
+        if isinstance(distribution, tuple):
+            return rng.uniform(*distribution)
+
+        return distribution(rng)
+
+    return [{name: sample(distribution) for name, distribution in space.items()} for _ in range(num_trials)]
+
+
+class MedianStoppingCallback(Callback):
+    """
+    Stops a trial whose running average return is below the median of the other trials' running averages at the
+    same epoch (the median stopping rule).
+
+    The running averages are shared between the trials through a dict, which can be a multiprocessing manager dict
+    when the trials run in different processes.
+
+    Args:
+        histories (dict): Running averages of the returns of every trial (lists indexed by the epoch), shared by all
+            trials.
+        trial (int): Key of this trial in the histories.
+        grace_epochs (int, optional): Number of epochs that are never stopped. Default: 10
+        min_trials (int, optional): Minimum number of other trials that reached the epoch to compare with.
+            Default: 3
+        check_every (int, optional): Number of epochs between publishing the running averages and checking the
+            rule. Default: 1
+    """
+
+    def __init__(self, histories: dict, trial: int, grace_epochs: int = 10, min_trials: int = 3,
+                 check_every: int = 1) -> None:
+        self.histories = histories
+        self.trial = trial
+        self.grace_epochs = grace_epochs
+        self.min_trials = min_trials
+        self.check_every = check_every
+
+        self.running_averages = []
+        self.total_return = 0
+        self.stopped = False
+
+    def on_epoch_end(self, runner, stats: dict) -> None:
+        self.total_return += stats["return"]
+
+        epoch = len(self.running_averages) + 1
+        self.running_averages.append(self.total_return / epoch)
+
+        if epoch % self.check_every != 0:
+            return
+
+        # a manager dict returns copies, so the whole history is assigned again
+        self.histories[self.trial] = self.running_averages
+
+        if epoch <= self.grace_epochs:
+            return
+
+        others = [
+            history[epoch - 1] for trial, history in self.histories.items()
+            if trial != self.trial and len(history) >= epoch
+        ]
+
+        if len(others) >= self.min_trials and self.running_averages[-1] < median(others):
+            self.stopped = True
+            runner.stop_training = True
+
+    def on_train_end(self, trainer) -> None:
+        self.histories[self.trial] = self.running_averages
+
+
+class _ReturnRecorder(Callback):
+    """
+    Records the return of every epoch.
+    """
+
+    def __init__(self) -> None:
+        self.returns = []
+
+    def on_epoch_end(self, runner, stats: dict) -> None:
+        self.returns.append(stats["return"])
+
+
+def _init_worker(num_threads: int) -> None:
+    """
+    Limit the number of threads of a worker process, so that the workers don't compete for the cores.
+
+    Args:
+        num_threads (int): Number of intra-op threads of PyTorch.
+    """
+
+    torch.set_num_threads(num_threads)
+
+
+def _run_trial(build_trainer: Callable[[dict], Trainer], trial: int, params: dict, epochs: int, score_epochs: int,
+               seed: int, histories: dict, stopping: dict) -> dict:
+    """
+    Build and train one trial.
+
+    Returns:
+        dict: Result of the trial. Errors are recorded in the result instead of being raised.
+    """
+
+    start_time = perf_counter()
+    recorder = _ReturnRecorder()
+    stopping_callback = None
+
+    result = {"trial": trial, "params": params}
+    trainer = None
+
+    try:
+        if seed is not None:
+            random.seed(seed + trial)
+            numpy.random.seed(seed + trial)
+            torch.manual_seed(seed + trial)
+
+        trainer = build_trainer(params)
+        trainer.callbacks.append(recorder)
+
+        if stopping is not None:
+            stopping_callback = MedianStoppingCallback(histories, trial, **stopping)
+            trainer.callbacks.append(stopping_callback)
+
+        trainer.train(epochs)
+    except Exception:
+        result["error"] = format_exc()
+    finally:
+        # the environment (and e.g. its worker processes) and the agent's threads are released however the trial ended
+        if trainer is not None:
+            for close in (trainer.environment.close, trainer.agent.close):
+                try:
+                    close()
+                except Exception:
+                    result.setdefault("error", format_exc())
+
+    returns = recorder.returns
+
+    result.update({
+        "epochs": len(returns),
+        "stopped_early": stopping_callback is not None and stopping_callback.stopped,
+        "score": mean(returns[-score_epochs:]) if returns else None,
+        "returns": returns,
+        "duration_seconds": perf_counter() - start_time
+    })
+
+    return result
+
+
+class Sweep:
+    """
+    Runs hyperparameter trials in a pool of processes and writes their results to a JSON lines file, one line per
+    trial as it finishes.
+
+    A trial is built by a function taking the trial's parameters (see: grid_search and random_search) and returning
+    the Trainer to run, so any Trainer, agent (DQN, QTable, ...), replay memory or exploration strategy setting can
+    be tuned. The function is sent to the worker processes, so it must be defined at the module level, and the script
+    starting the sweep must be guarded by if __name__ == "__main__".
+
+    Args:
+        build_trainer (Callable[[dict], Trainer]): Function building the Trainer of a trial from its parameters.
+        epochs (int): Number of epochs of every trial.
+        results_path (str): JSON lines file the results are appended to.
+        num_workers (int, optional): Number of processes. The number of cores if None. Default: None
+        threads_per_worker (int, optional): Number of PyTorch threads of every process. Default: 1
+        score_epochs (int, optional): The score of a trial is the average return of its last score_epochs epochs.
+            Default: 10
+        early_stopping (bool, optional): Stop trials with the median stopping rule (see: MedianStoppingCallback).
+            Default: True
+        grace_epochs (int, optional): Number of epochs of every trial that are never stopped. Default: 10
+        min_trials (int, optional): Minimum number of other trials to compare with before stopping. Default: 3
+        seed (int, optional): Seed of the random number generators, trial i uses seed + i. Default: None
+    """
+
+    def __init__(self, build_trainer: Callable[[dict], Trainer], epochs: int, results_path: str,
+                 num_workers: int = None, threads_per_worker: int = 1, score_epochs: int = 10,
+                 early_stopping: bool = True, grace_epochs: int = 10, min_trials: int = 3, seed: int = None) -> None:
+        self.build_trainer = build_trainer
+        self.epochs = epochs
+        self.results_path = results_path
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker
+        self.score_epochs = score_epochs
+        self.early_stopping = early_stopping
+        self.grace_epochs = grace_epochs
+        self.min_trials = min_trials
+        self.seed = seed
+
+    def run(self, trials: list[dict]) -> list[dict]:
+        """
+        Run the trials.
+
+        Args:
+            trials (list[dict]): Parameters of every trial.
+
+        Returns:
+            list[dict]: Results of the trials sorted by their score (best first). Every result contains the trial's
+                index, parameters, number of epochs, whether it was stopped early, score, returns, duration and, if
+                it failed, the error.
+        """
+
+        # fork would copy the parent's PyTorch thread pools into the workers
+        context = get_context("spawn")
+        results = []
+
+        with context.Manager() as manager, ProcessPoolExecutor(
+            self.num_workers, mp_context=context, initializer=_init_worker, initargs=(self.threads_per_worker,)
+        ) as executor:
+            histories = manager.dict()
+
+            stopping = None
+            if self.early_stopping:
+                stopping = {"grace_epochs": self.grace_epochs, "min_trials": self.min_trials}
+
+            futures = [
+                executor.submit(_run_trial, self.build_trainer, i, params, self.epochs, self.score_epochs, self.seed,
+                                histories, stopping)
+                for i, params in enumerate(trials)
+            ]
+
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+
+                # parameters that aren't JSON serializable (e.g. dtypes) are written as strings
+                with open(self.results_path, "a") as file:
+                    file.write(json.dumps(result, default=str) + "\n")
+
+        return sorted(results, key=lambda result: float("-inf") if result["score"] is None else result["score"],
+                      reverse=True)
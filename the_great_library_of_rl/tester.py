@@ -1,13 +1,35 @@
-from time import sleep
+from statistics import mean, pstdev
+from time import sleep, perf_counter
 
+from torch import zeros, float64 as torch_float64, long as torch_long
+
+from the_great_library_of_rl.callbacks import Callback
 from the_great_library_of_rl.environment import Environment
+from the_great_library_of_rl.instrumentation import Instrumentation, NullInstrumentation
 from the_great_library_of_rl.q_learning import QAgent
 
 
 class Tester:
-    def __init__(self, agent: QAgent, environment: Environment) -> None:
+    """
+    Tests an agent on an environment.
+
+    Args:
+        agent (QAgent): Agent to test.
+        environment (Environment): Environment to test on.
+        callbacks (list[Callback], optional): Hooks called during the testing. Default: None
+        instrumentation (Instrumentation, optional): Collects per-phase timings and per-epoch statistics. Nothing is
+            measured if None. Default: None
+    """
+
+    def __init__(self, agent: QAgent, environment: Environment, callbacks: list[Callback] = None,
+                 instrumentation: Instrumentation = None) -> None:
         self.agent = agent
         self.environment = environment
+        self.callbacks = [] if callbacks is None else callbacks
+        self.instrumentation = NullInstrumentation() if instrumentation is None else instrumentation
+
+        # number of finished tests
+        self.epoch = 0
 
     def test(self, delay: float = 0) -> None:
         """
@@ -17,15 +39,186 @@ class Tester:
             delay (float, optional): Optional time delay between each step.
         """
 
+        instrumentation = self.instrumentation
+        callbacks = self.callbacks
+
         # make sure the env is in a testing/evaluation mode
         self.environment.set_evaluation(True)
 
+        start_time = perf_counter()
+        instrumentation.start_epoch()
+
+        for callback in callbacks:
+            callback.on_epoch_start(self)
+
+        steps = 0
+        total_reward = 0
+
         while True:
             state = self.environment.get_state()
             action = self.agent.get_action(state)
+            instrumentation.lap("action_selection")
+
             self.environment.step(action)
+            instrumentation.lap("environment_step")
 
             sleep(delay)
+            instrumentation.lap()
+
+            steps += 1
+
+            # the transition is only read if someone uses it
+            if callbacks or not isinstance(instrumentation, NullInstrumentation):
+                reward = self.environment.get_reward()
+                total_reward += reward
+
+                for callback in callbacks:
+                    callback.on_step(self, state, action, reward, self.environment.get_state(),
+                                     not self.environment.is_terminated())
 
             if self.environment.is_terminated():
                 break
+
+        self.epoch += 1
+
+        if callbacks or not isinstance(instrumentation, NullInstrumentation):
+            stats = {
+                "epoch": self.epoch,
+                "steps": steps,
+                "return": total_reward,
+                "duration_seconds": perf_counter() - start_time
+            }
+
+            instrumentation.end_epoch(stats)
+
+            for callback in callbacks:
+                callback.on_epoch_end(self, stats)
+
+    def evaluate(self, episodes: int, seed: int = None) -> dict:
+        """
+        Evaluate the agent headlessly (nothing is rendered) over multiple episodes and return statistics of their
+        returns and lengths.
+
+        With a vectorized environment (one with get_num_envs(), e.g. VectorGymnasiumEnvironment), the episodes are
+        split evenly between the copies and the actions of all copies are chosen with one batched forward pass (see:
+        QAgent.get_actions). An asynchronous environment steps the copies in a pool of processes. Other environments
+        run the episodes one after another.
+
+        Args:
+            episodes (int): Number of episodes to run. At least 1.
+            seed (int, optional): Seed of the environment, the same seed gives the same episodes. Default: None
+
+        Returns:
+            dict: Number of episodes, mean, standard deviation, minimum and maximum of the returns, mean length and
+                the returns and lengths of all episodes.
+        """
+
+        if episodes < 1:
+            raise ValueError(f"At least one episode is required, got {episodes}")
+
+        # duck-typed, so that the tester doesn't depend on gymnasium
+        if hasattr(self.environment, "get_num_envs"):
+            returns, lengths = self._evaluate_vectorized(episodes, seed)
+        else:
+            returns, lengths = self._evaluate_sequentially(episodes, seed)
+
+        return {
+            "episodes": len(returns),
+            "mean_return": mean(returns),
+            "std_return": pstdev(returns),
+            "min_return": min(returns),
+            "max_return": max(returns),
+            "mean_length": mean(lengths),
+            "returns": returns,
+            "lengths": lengths
+        }
+
+    def _evaluate_sequentially(self, episodes: int, seed: int) -> tuple[list[float], list[int]]:
+        """
+        Run the episodes one after another.
+
+        Args:
+            episodes (int): Number of episodes to run.
+            seed (int): Seed of the first episode, the other episodes get the following seeds. Can be None.
+
+        Returns:
+            tuple[list[float], list[int]]: Return and length of every episode.
+        """
+
+        # test() leaves the environment in the evaluation mode, which renders
+        self.environment.set_evaluation(False)
+
+        returns = []
+        lengths = []
+
+        for episode in range(episodes):
+            # environments written before seeding was supported only accept no arguments
+            if seed is None:
+                self.environment.reset()
+            else:
+                self.environment.reset(seed + episode)
+
+            total_reward = 0
+            steps = 0
+
+            while True:
+                self.environment.step(self.agent.get_action(self.environment.get_state()))
+
+                total_reward += self.environment.get_reward()
+                steps += 1
+
+                if self.environment.is_terminated():
+                    break
+
+            returns.append(total_reward)
+            lengths.append(steps)
+
+        self.environment.reset()
+
+        return returns, lengths
+
+    def _evaluate_vectorized(self, episodes: int, seed: int) -> tuple[list[float], list[int]]:
+        """
+        Run the episodes in all copies of a vectorized environment at once.
+
+        Args:
+            episodes (int): Number of episodes to run.
+            seed (int): Seed of the environment. Can be None.
+
+        Returns:
+            tuple[list[float], list[int]]: Return and length of every episode, ordered by the copy that ran them.
+        """
+
+        environment = self.environment
+        num_envs = environment.get_num_envs()
+
+        # every copy runs a fixed number of episodes, taking the first episodes to finish would favor short ones
+        quotas = [episodes // num_envs + (1 if i < episodes % num_envs else 0) for i in range(num_envs)]
+        returns = [[] for _ in range(num_envs)]
+        lengths = [[] for _ in range(num_envs)]
+        remaining = sum(quotas)
+
+        current_returns = zeros(num_envs, dtype=torch_float64)
+        current_lengths = zeros(num_envs, dtype=torch_long)
+
+        environment.reset(seed=seed)
+
+        while remaining > 0:
+            environment.step(self.agent.get_actions(environment.get_state()))
+
+            current_returns += environment.get_reward()
+            current_lengths += 1
+
+            # the finished copies were already reset by the environment
+            for i in environment.get_terminated().nonzero().flatten().tolist():
+                if len(returns[i]) < quotas[i]:
+                    returns[i].append(float(current_returns[i]))
+                    lengths[i].append(int(current_lengths[i]))
+                    remaining -= 1
+
+                current_returns[i] = 0
+                current_lengths[i] = 0
+
+        environment.reset()
+
+        return [r for copy in returns for r in copy], [length for copy in lengths for length in copy]
@@ -1,15 +1,43 @@
 from random import randrange
+from time import perf_counter
 
+from the_great_library_of_rl.callbacks import Callback
 from the_great_library_of_rl.environment import Environment
 from the_great_library_of_rl.exploration_strategies.epsilon_greedy_strategy import EpsilonGreedyStrategy
+from the_great_library_of_rl.instrumentation import Instrumentation, NullInstrumentation
 from the_great_library_of_rl.q_learning import QAgent
 
 
 class Trainer:
-    def __init__(self, agent: QAgent, environment: Environment, exploration_strategy: EpsilonGreedyStrategy):
+    """
+    Trains an agent on an environment.
+
+    Args:
+        agent (QAgent): Agent to train.
+        environment (Environment): Environment to train on.
+        exploration_strategy (EpsilonGreedyStrategy): Exploration strategy.
+        pipeline_updates (bool, optional): Update the agent with each transition only after the next action was sent
+            to the environment. With a pipelined environment (see: SubprocessEnvironment) the update then runs while
+            the environment is stepping. The agent learns from every transition one step later. Default: False
+        callbacks (list[Callback], optional): Hooks called during the training. Default: None
+        instrumentation (Instrumentation, optional): Collects per-phase timings and per-epoch statistics. Nothing is
+            measured if None. Default: None
+    """
+
+    def __init__(self, agent: QAgent, environment: Environment, exploration_strategy: EpsilonGreedyStrategy,
+                 pipeline_updates: bool = False, callbacks: list[Callback] = None,
+                 instrumentation: Instrumentation = None):
         self.agent = agent
         self.environment = environment
         self.exploration_strategy = exploration_strategy
+        self.pipeline_updates = pipeline_updates
+        self.callbacks = [] if callbacks is None else callbacks
+        self.instrumentation = NullInstrumentation() if instrumentation is None else instrumentation
+
+        # number of finished epochs
+        self.epoch = 0
+        # can be set by a callback to end the training after the current epoch
+        self.stop_training = False
 
     def train(self, epochs: int) -> None:
         """
@@ -22,6 +50,12 @@ class Trainer:
         # make sure the env is in a training phase
         self.environment.set_evaluation(False)
 
+        self.stop_training = False
+        self.agent.set_instrumentation(self.instrumentation)
+
+        for callback in self.callbacks:
+            callback.on_train_start(self)
+
         for _ in range(epochs):
             self.execute_epoch()
 
@@ -31,12 +65,33 @@ class Trainer:
             # update epsilon
             self.exploration_strategy.decay_epsilon()
 
+            if self.stop_training:
+                break
+
+        for callback in self.callbacks:
+            callback.on_train_end(self)
+
     def execute_epoch(self) -> None:
         """
         Execute one epoch of training.
         """
 
+        instrumentation = self.instrumentation
+        callbacks = self.callbacks
+
+        start_time = perf_counter()
+        start_updates = self.agent.get_update_count()
+        instrumentation.start_epoch()
+
+        for callback in callbacks:
+            callback.on_epoch_start(self)
+
         run = True
+        steps = 0
+        total_reward = 0
+
+        # transition waiting for an update (only used when the updates are pipelined)
+        pending = None
 
         while run:
             # get the current state of the env
@@ -44,21 +99,66 @@ class Trainer:
 
             # choose an action with respect to the exploration strategy
             action = self.__get_action(state)
+            instrumentation.lap("action_selection")
 
             # execute the action
             self.environment.step(action)
+            instrumentation.lap("environment_step")
+
+            # learn from the previous transition while the env is stepping
+            if pending is not None:
+                self.agent.update_q_value(*pending)
+                pending = None
+                instrumentation.lap("agent_update")
 
             # pull important information from the environment
             reward = self.environment.get_reward()
             next_state = self.environment.get_state()
             non_terminal = not self.environment.is_terminated()
+            instrumentation.lap("environment_step")
 
             # update the agent's brain
-            self.agent.update_q_value(state, action, reward, next_state, non_terminal)
+            if self.pipeline_updates:
+                pending = (state, action, reward, next_state, non_terminal)
+            else:
+                self.agent.update_q_value(state, action, reward, next_state, non_terminal)
+                instrumentation.lap("agent_update")
+
+            for callback in callbacks:
+                callback.on_step(self, state, action, reward, next_state, non_terminal)
+
+            steps += 1
+            total_reward += reward
 
             # check if the loop should keep going
             run = non_terminal
 
+        # learn from the last transition of the epoch
+        if pending is not None:
+            self.agent.update_q_value(*pending)
+            instrumentation.lap("agent_update")
+
+        self.epoch += 1
+
+        # the statistics are only collected if someone uses them
+        if callbacks or not isinstance(instrumentation, NullInstrumentation):
+            end_updates = self.agent.get_update_count()
+
+            stats = {
+                "epoch": self.epoch,
+                "steps": steps,
+                "return": total_reward,
+                "epsilon": self.exploration_strategy.epsilon,
+                "updates": None if end_updates is None else end_updates - start_updates,
+                "loss": self.agent.get_last_loss(),
+                "duration_seconds": perf_counter() - start_time
+            }
+
+            instrumentation.end_epoch(stats)
+
+            for callback in callbacks:
+                callback.on_epoch_end(self, stats)
+
     def __get_action(self, state) -> int:
         """
         Choose an action with respect to the exploration strategy.
@@ -0,0 +1,158 @@
+import os
+from glob import glob
+
+import numpy
+
+from the_great_library_of_rl.callbacks import Callback
+
+
+# columns of a shard, every column is saved as <name>.npy
+SHARD_COLUMNS = ("states", "actions", "rewards", "next_states", "non_terminal")
+
+
+def list_shards(directory: str) -> list[str]:
+    """
+    Return the finished shards of a dataset in the order they were written.
+
+    Args:
+        directory (str): Directory of the dataset.
+
+    Returns:
+        list[str]: Paths of the shards.
+    """
+
+    return sorted(path for path in glob(os.path.join(directory, "shard_*")) if not path.endswith(".tmp"))
+
+
+class TransitionRecorder(Callback):
+    """
+    Records the transitions of the training into a dataset of shards on the disk, so that they can be reused by
+    other runs (see: OfflineTrainer).
+
+    A shard is a directory holding one .npy file per column (states, actions, rewards, next_states, non_terminal).
+    The transitions are collected in preallocated column buffers and every full buffer is written as one shard with a
+    single bulk write per column. The last, partially filled shard is written at the end of the training. A shard is
+    written under a temporary name and renamed when it's complete, so a reader never sees half of a shard.
+
+    New shards are added to the shards already in the directory, so multiple runs can record into the same dataset,
+    also at the same time: a shard number is claimed by atomically creating its temporary directory, a recorder that
+    loses the race moves on to the next number.
+
+    Args:
+        directory (str): Directory of the dataset. Created if it doesn't exist.
+        shard_size (int, optional): Number of transitions in a shard. Default: 65536
+    """
+
+    def __init__(self, directory: str, shard_size: int = 65536) -> None:
+        self.directory = directory
+        self.shard_size = shard_size
+
+        os.makedirs(directory, exist_ok=True)
+
+        # the shards are numbered after the existing ones (a hint, the numbers are claimed in flush())
+        self.next_shard = len(list_shards(directory))
+
+        self.trainer = None
+        self.columns = None
+        self.size = 0
+
+    def _allocate(self, state) -> None:
+        """
+        Allocate the column buffers.
+
+        Args:
+            state: Example state used to determine the shape and dtype of the stored states.
+        """
+
+        state = numpy.asarray(state)
+
+        self.columns = {
+            "states": numpy.empty((self.shard_size, *state.shape), dtype=state.dtype),
+            "actions": numpy.empty(self.shard_size, dtype=numpy.int64),
+            "rewards": numpy.empty(self.shard_size, dtype=numpy.float32),
+            "next_states": numpy.empty((self.shard_size, *state.shape), dtype=state.dtype),
+            "non_terminal": numpy.empty(self.shard_size, dtype=numpy.bool_)
+        }
+
+    def record(self, state, action: int, reward: float, next_state, non_terminal: bool) -> None:
+        """
+        Add a transition to the buffers. Writes a shard when they are full.
+
+        Args:
+            state: State the action was taken in.
+            action (int): Action taken.
+            reward (float): Reward received for the action.
+            next_state: State reached after taking the action.
+            non_terminal (bool): False if the environment ended (last state was reached), True otherwise.
+        """
+
+        if self.columns is None:
+            self._allocate(state)
+
+        i = self.size
+        columns = self.columns
+
+        columns["states"][i] = state
+        columns["actions"][i] = action
+        columns["rewards"][i] = reward
+        columns["next_states"][i] = next_state
+        columns["non_terminal"][i] = non_terminal
+
+        self.size += 1
+
+        if self.size == self.shard_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the buffered transitions as a new shard.
+        """
+
+        if self.size == 0:
+            return
+
+        path, temporary_path = self._claim_shard()
+
+        for name in SHARD_COLUMNS:
+            numpy.save(os.path.join(temporary_path, f"{name}.npy"), self.columns[name][:self.size])
+
+        os.rename(temporary_path, path)
+
+        self.size = 0
+
+    def _claim_shard(self) -> tuple[str, str]:
+        """
+        Claim the next free shard number by creating its temporary directory. Creating a directory is atomic, so
+        recorders writing into the same dataset never claim the same number.
+
+        Returns:
+            tuple[str, str]: Path of the shard and of its (created) temporary directory.
+        """
+
+        while True:
+            path = os.path.join(self.directory, f"shard_{self.next_shard:06d}")
+            temporary_path = f"{path}.tmp"
+            self.next_shard += 1
+
+            try:
+                os.mkdir(temporary_path)
+            except FileExistsError:
+                continue  # another recorder is writing the shard
+
+            # the shard could have been finished (and its temporary directory renamed) by another recorder
+            if os.path.exists(path):
+                os.rmdir(temporary_path)
+                continue
+
+            return path, temporary_path
+
+    def on_train_start(self, trainer) -> None:
+        self.trainer = trainer
+
+    def on_step(self, runner, state, action: int, reward: float, next_state, non_terminal: bool) -> None:
+        # the callback can be shared with a tester, only the training is recorded
+        if runner is self.trainer:
+            self.record(state, action, reward, next_state, non_terminal)
+
+    def on_train_end(self, trainer) -> None:
+        self.flush()
@@ -0,0 +1,97 @@
+from torch import Tensor, as_tensor, randint, where
+from torch import long as torch_long, bool as torch_bool
+
+from the_great_library_of_rl.builtin_environments.vector_gymnasium_environment import VectorGymnasiumEnvironment
+from the_great_library_of_rl.exploration_strategies.epsilon_greedy_strategy import EpsilonGreedyStrategy
+from the_great_library_of_rl.q_learning import QAgent
+
+
+class VectorTrainer:
+    """
+    Trainer that steps multiple copies of an environment at once. Actions for all copies are chosen with one batched
+    call to the agent and all transitions of a step are passed to the agent together.
+
+    Args:
+        agent (QAgent): Agent to train.
+        environment (VectorGymnasiumEnvironment): Vectorized environment to train on.
+        exploration_strategy (EpsilonGreedyStrategy): Exploration strategy. Every copy makes its own explore/exploit
+            decision.
+    """
+
+    def __init__(self, agent: QAgent, environment: VectorGymnasiumEnvironment,
+                 exploration_strategy: EpsilonGreedyStrategy):
+        self.agent = agent
+        self.environment = environment
+        self.exploration_strategy = exploration_strategy
+
+    def train(self, epochs: int) -> None:
+        """
+        Train the agent on the given environment.
+
+        Args:
+            epochs: Number of episodes the agent should finish, counted across all copies of the environment.
+        """
+
+        # make sure the env is in a training phase
+        self.environment.set_evaluation(False)
+
+        finished_epochs = 0
+
+        while finished_epochs < epochs:
+            finished = self.execute_step()
+
+            # update epsilon once for every finished episode
+            for _ in range(finished):
+                self.exploration_strategy.decay_epsilon()
+
+            finished_epochs += finished
+
+    def execute_step(self) -> int:
+        """
+        Execute one step in every copy of the environment. Copies that end are reset automatically.
+
+        Returns:
+            int: Number of copies that finished an episode.
+        """
+
+        # get the current states of the envs
+        states = self.environment.get_state()
+
+        # choose actions with respect to the exploration strategy
+        actions = self.__get_actions(states)
+
+        # execute the actions
+        self.environment.step(actions)
+
+        # pull important information from the environment
+        rewards = self.environment.get_reward()
+        next_states = self.environment.get_next_state()
+        terminated = self.environment.get_terminated()
+
+        # update the agent's brain
+        self.agent.update_q_values(states, actions, rewards, next_states, ~terminated)
+
+        return int(terminated.sum())
+
+    def __get_actions(self, states: Tensor) -> Tensor:
+        """
+        Choose an action for every copy of the environment with respect to the exploration strategy.
+
+        Args:
+            states (Tensor): States of the environment copies.
+
+        Returns:
+            Tensor: The actions to take. Each one either random or determined by the agent.
+        """
+
+        num_envs = self.environment.get_num_envs()
+        explore = as_tensor(self.exploration_strategy.should_sample_random_actions(num_envs), dtype=torch_bool)
+        random_actions = randint(self.environment.get_action_count(), (num_envs,))
+
+        # skip the agent entirely if every copy explores
+        if explore.all():
+            return random_actions
+
+        agent_actions = as_tensor(self.agent.get_actions(states), dtype=torch_long)
+
+        return where(explore, random_actions, agent_actions)